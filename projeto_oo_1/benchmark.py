@@ -0,0 +1,460 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import contextlib
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Os módulos da estante ficam em nivel1/ (os mesmos que a GUI importa)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nivel1'))
+
+import tkinter as tk
+from tkinter import ttk
+
+from banco_de_dados import abrir_conexao, setup_database, Estante, PaginadorKeyset, HQ, criar_item
+from gui_estante_virtual import EstanteApp, ListaVirtual, LIMITE_MODO_VIRTUAL, TODOS_OS_TIPOS
+
+# --- BENCHMARKS DA ESTANTE E DA TABELA (TREEVIEW) ---
+# Cada tamanho gera uma estante sintética (Livros, Revistas e HQs misturados)
+# num banco temporário, sempre com a mesma semente, e mede as operações
+# principais. Os tempos (mediana das repetições, em ms) são gravados em JSON
+# para comparar commits:
+#   python benchmark.py executar --tamanhos 1000 10000 100000 --saida atual.json
+#   python benchmark.py comparar base.json atual.json --tolerancia 0.25
+# 'comparar' (ou 'executar --base') termina com código 1 se algo ficou mais lento.
+
+VERSAO_FORMATO = 1
+TAMANHOS_PADRAO = (1000, 10000, 100000)
+SEMENTE = 2024
+
+PALAVRAS = ('sombra', 'mar', 'cidade', 'noite', 'tempo', 'casa', 'estrela', 'rio', 'vento',
+            'memória', 'jardim', 'fogo', 'silêncio', 'viagem', 'lua', 'pedra', 'caminho', 'sonho')
+NOMES = ('Ana', 'Bruno', 'Clara', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Heitor', 'Iara', 'João')
+SOBRENOMES = ('Silva', 'Souza', 'Lima', 'Costa', 'Rocha', 'Alves', 'Moura', 'Teixeira', 'Araújo')
+MESES = ('Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+         'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro')
+
+
+def gerar_registros(quantidade: int, rng: random.Random):
+    """Registros no formato de criar_item(), com IDs reprodutíveis."""
+    for numero in range(quantidade):
+        dados = {
+            'id': '%032x' % rng.getrandbits(128),
+            'titulo': f"{rng.choice(PALAVRAS).title()} {rng.choice(PALAVRAS)} {numero}",
+            'autor': f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+        }
+        sorteio = rng.random()
+        if sorteio < 0.5:
+            dados.update(tipo='Livro', paginas=rng.randint(40, 900))
+        elif sorteio < 0.8:
+            dados.update(tipo='Revista', edicao=str(rng.randint(1, 300)), mes_publicacao=rng.choice(MESES))
+        else:
+            dados.update(tipo='HQ', desenhista=f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}")
+        yield dados
+
+def medir(funcao: Callable[[], Any], repeticoes: int = 1) -> float:
+    """Mediana, em ms, de 'repeticoes' execuções de 'funcao'."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+def medir_por_operacao(funcao: Callable[[Any], Any], argumentos: List[Any]) -> float:
+    """Tempo médio, em ms, de funcao(arg) para cada argumento."""
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcao(argumento)
+    return (time.perf_counter() - inicio) * 1000 / max(1, len(argumentos))
+
+
+# --- TREEVIEW: TK DE VERDADE (DISPLAY/XVFB) OU SIMULADA ---
+class TreeviewSimulada:
+    """Imita a parte da ttk.Treeview usada pela EstanteApp, sem precisar de tela.
+
+    Mede só o custo do lado Python (montar valores, diferenças, paginação);
+    o desenho do Tk fica de fora. O JSON registra qual modo foi usado.
+    """
+
+    def __init__(self):
+        self._linhas: Dict[str, Tuple[tuple, tuple]] = {}
+        self._anexadas: List[str] = []
+        self._foco = ''
+
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self._linhas[iid] = (tuple(values), tuple(tags))
+        self._anexadas.append(iid)
+        return iid
+
+    def delete(self, *iids):
+        removidos = set(iids)
+        for iid in iids:
+            self._linhas.pop(iid, None)
+        self._anexadas = [iid for iid in self._anexadas if iid not in removidos]
+
+    def exists(self, iid):
+        return iid in self._linhas
+
+    def item(self, iid, values=(), tags=()):
+        self._linhas[iid] = (tuple(values), tuple(tags))
+
+    def get_children(self, item=''):
+        return tuple(self._anexadas)
+
+    def set_children(self, item, *iids):
+        self._anexadas = list(iids)
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self._foco
+        self._foco = iid
+
+    def selection_set(self, *iids):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+
+class BarraSimulada:
+    def configure(self, **kwargs):
+        pass
+
+    def set(self, primeiro, ultimo):
+        pass
+
+
+class _Valor:
+    """Substitui um tk.StringVar (só get())."""
+
+    def __init__(self, valor: str):
+        self._valor = valor
+
+    def get(self) -> str:
+        return self._valor
+
+
+class PainelDeMedicao:
+    """O mínimo da EstanteApp para atualizar a tabela sem abrir a janela.
+
+    Reaproveita os próprios métodos da EstanteApp, então o código medido é o
+    mesmo que roda na aplicação; só a Treeview pode ser real ou simulada.
+    """
+    _aplicar_diferencas = EstanteApp._aplicar_diferencas
+    _valores_da_linha = staticmethod(EstanteApp._valores_da_linha)
+    _filtro_atual = EstanteApp._filtro_atual
+
+    def __init__(self, tree, barra, leitor: Estante, modo_virtual: bool):
+        self.tree = tree
+        self.busca_var = _Valor('')
+        self.filtro_tipo_var = _Valor(TODOS_OS_TIPOS)
+        self.filtro_autor_var = _Valor('')
+        self.filtro_titulo_var = _Valor('')
+        self._coluna_ordenada = None
+        self.lista_virtual = None
+        if modo_virtual:
+            paginador = PaginadorKeyset(leitor._get_db_connection())
+            self.lista_virtual = ListaVirtual(tree, barra, paginador)
+
+
+@contextlib.contextmanager
+def ambiente_tk(modo: str):
+    """Entrega (descricao, criar_widgets) para o modo pedido.
+
+    'auto' usa o display atual, ou inicia um Xvfb se ele estiver instalado,
+    e cai para a Treeview simulada quando não houver como abrir o Tk.
+    """
+    if modo == 'simulado':
+        yield 'simulado', lambda: (TreeviewSimulada(), BarraSimulada())
+        return
+
+    xvfb = None
+    if not os.environ.get('DISPLAY') and shutil.which('Xvfb'):
+        os.environ['DISPLAY'] = ':99'
+        xvfb = subprocess.Popen(['Xvfb', ':99', '-screen', '0', '1280x1024x24'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(0.5)
+    try:
+        try:
+            raiz = tk.Tk()
+        except tk.TclError:
+            if modo == 'real':
+                raise
+            yield 'simulado', lambda: (TreeviewSimulada(), BarraSimulada())
+            return
+        raiz.withdraw()
+
+        def criar_widgets():
+            for filho in raiz.winfo_children():
+                filho.destroy()
+            tree = ttk.Treeview(raiz, columns=('tipo', 'titulo', 'autor', 'id_curto'), show='headings')
+            return tree, ttk.Scrollbar(raiz, orient='vertical')
+
+        try:
+            yield ('xvfb' if xvfb else 'tk'), criar_widgets
+        finally:
+            raiz.destroy()
+    finally:
+        if xvfb:
+            xvfb.terminate()
+            xvfb.wait()
+
+
+# --- SUÍTE ---
+def alterar_por_outra_conexao(caminho: str, rng: random.Random, quantidade: int = 50) -> None:
+    """Remove e insere 'quantidade' itens por outra conexão (como outro programa faria)."""
+    outra = abrir_conexao(caminho)
+    outra.execute("BEGIN")
+    outra.execute("DELETE FROM itens WHERE id IN (SELECT id FROM itens ORDER BY id LIMIT ?)", (quantidade,))
+    outra.executemany("INSERT INTO itens VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      [tuple(criar_item(dados).to_dict().values()) for dados in gerar_registros(quantidade, rng)])
+    outra.execute("COMMIT")
+    outra.close()
+
+def _pico_de_memoria_kib(funcao: Callable[[], Any]) -> float:
+    """Pico de memória alocada pelo Python durante 'funcao', em KiB (tracemalloc).
+
+    O cache de páginas do SQLite e as páginas mapeadas (mmap) não entram na
+    conta: pertencem ao SQLite e ao sistema operacional, não ao Python.
+    """
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def medir_somente_leitura(caminho: str, termos: List[str], repeticoes: int = 3) -> Dict[str, float]:
+    """Modo somente leitura (mode=ro, mmap, nada na memória) x modo padrão da Estante (carga completa)."""
+    resultados: Dict[str, float] = {}
+
+    def sessao(**modo):
+        # Uma consulta típica: abrir, buscar, filtrar e mostrar a primeira página por título
+        with Estante(db_path=caminho, **modo) as estante:
+            for termo in termos[:5]:
+                estante.buscar_ids(termo)
+            estante.filtrar_ids(tipo='Livro', autor='a', titulo='s')
+            PaginadorKeyset(estante._get_db_connection(), ordem='titulo').linhas(0, 50)
+
+    resultados['memoria_padrao_kib'] = _pico_de_memoria_kib(sessao)
+    resultados['memoria_somente_leitura_kib'] = _pico_de_memoria_kib(lambda: sessao(somente_leitura=True))
+    resultados['abrir_padrao_ms'] = medir(lambda: Estante(db_path=caminho).fechar())
+    resultados['abrir_somente_leitura_ms'] = medir(
+        lambda: Estante(db_path=caminho, somente_leitura=True).fechar(), repeticoes)
+    # Comparáveis a buscar_ids_ms, filtrar_combinado_ms e ordenar_titulo_ms
+    with Estante(db_path=caminho, somente_leitura=True) as leitor:
+        resultados['somente_leitura_buscar_ids_ms'] = medir_por_operacao(leitor.buscar_ids, termos)
+        resultados['somente_leitura_filtrar_ms'] = medir(
+            lambda: leitor.filtrar_ids(tipo='Livro', autor='a', titulo='s'), repeticoes)
+        total = leitor.contar_itens()
+        resultados['somente_leitura_ordenar_ms'] = medir(
+            lambda: PaginadorKeyset(leitor._get_db_connection(), ordem='titulo', decrescente=True)
+            .linhas(total // 2, 50), repeticoes)
+    return resultados
+
+LINHA_DE_COMANDO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nivel1', 'linha_de_comando.py')
+
+def medir_partida_cli(caminho: str, execucoes: int = 5) -> float:
+    """Tempo (ms) de um processo novo de 'linha_de_comando.py estatisticas', do início ao fim.
+
+    Usa o menor de 'execucoes' tempos: a abertura de um processo varia muito
+    com o resto da máquina, e o menor valor é o que o código consegue."""
+    comando = [sys.executable, LINHA_DE_COMANDO, '--db', caminho, 'estatisticas']
+    tempos = []
+    for _ in range(execucoes):
+        inicio = time.perf_counter()
+        subprocess.run(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return min(tempos)
+
+def medir_tamanho(tamanho: int, pasta: str, criar_widgets, repeticoes: int = 3) -> Dict[str, float]:
+    """Gera uma estante com 'tamanho' itens e mede cada operação."""
+    rng = random.Random(SEMENTE + tamanho)
+    caminho = os.path.join(pasta, f'estante_{tamanho}.db')
+    conn = abrir_conexao(caminho)
+    setup_database(conn)
+    estante = Estante(conn, carregar=False)
+    resultados: Dict[str, float] = {}
+
+    resultados['importar_ms'] = medir(lambda: estante.importar_em_lote(gerar_registros(tamanho, rng)))
+    ids = estante.filtrar_ids()
+    amostra_ids = rng.sample(ids, min(100, len(ids)))
+    termos = [f"{rng.choice(PALAVRAS)} {rng.choice(PALAVRAS)[:3]}" for _ in range(20)]
+
+    resultados['carregar_ms'] = medir(estante._carregar_itens_db, repeticoes)
+    resultados['contar_ms'] = medir(estante.contar_itens, repeticoes)
+
+    novos = [criar_item(dados) for dados in gerar_registros(200, rng)]
+    resultados['inserir_ms'] = medir_por_operacao(estante.adicionar_item, novos)
+    # Outros 200 itens com escrita adiada: um único COMMIT no fim (incluído na conta)
+    adiada = Estante(abrir_conexao(caminho), carregar=False, escrita_adiada=True)
+    novos_adiados = [criar_item(dados) for dados in gerar_registros(200, rng)]
+    resultados['inserir_adiado_ms'] = medir(lambda: (
+        [adiada.adicionar_item(item) for item in novos_adiados], adiada.descarregar())) / len(novos_adiados)
+    adiada.fechar()
+
+    resultados['buscar_ids_ms'] = medir_por_operacao(estante.buscar_ids, termos)
+    resultados['buscar_por_titulo_ms'] = medir_por_operacao(estante.buscar_por_titulo, termos[:5])
+    # Mesmos termos com uma letra a menos (erro de digitação) na busca por trigramas
+    resultados['buscar_aproximado_ms'] = medir_por_operacao(
+        estante.buscar_aproximado_ids, [termo[:2] + termo[3:] for termo in termos])
+
+    resultados['filtrar_tipo_memoria_ms'] = medir(lambda: estante.itens_do_tipo(HQ), repeticoes)
+    resultados['filtrar_tipo_db_ms'] = medir(lambda: estante.filtrar_ids(tipo='HQ'), repeticoes)
+    resultados['filtrar_combinado_ms'] = medir(
+        lambda: estante.filtrar_ids(tipo='Livro', autor='a', titulo='s'), repeticoes)
+    resultados['estatisticas_ms'] = medir(estante.estatisticas, repeticoes)
+    # Clique no cabeçalho "Título" (decrescente) e salto para o meio da lista
+    resultados['ordenar_titulo_ms'] = medir(
+        lambda: PaginadorKeyset(estante._get_db_connection(), ordem='titulo', decrescente=True)
+        .linhas(tamanho // 2, 50), repeticoes)
+
+    resultados['remover_prefixo_ms'] = medir_por_operacao(
+        estante.remover_item, [item_id[:8] for item_id in amostra_ids])
+
+    # Tabela: preenchimento inicial e "Atualizar Lista" após mudanças feitas por outra conexão
+    modo_virtual = tamanho > LIMITE_MODO_VIRTUAL
+    tree, barra = criar_widgets()
+    painel = PainelDeMedicao(tree, barra, estante, modo_virtual)
+    if modo_virtual:
+        resultados['treeview_preencher_ms'] = medir(painel.lista_virtual.renderizar, repeticoes)
+    else:
+        resultados['treeview_preencher_ms'] = medir(lambda: painel._aplicar_diferencas(novos=estante.itens))
+
+    alterar_por_outra_conexao(caminho, rng)
+    if modo_virtual:
+        resultados['treeview_atualizar_ms'] = medir(painel.lista_virtual.invalidar)
+    else:
+        resultados['treeview_atualizar_ms'] = medir(
+            lambda: painel._aplicar_diferencas(*estante.sincronizar_com_db()))
+
+    # Change feed: outra leva de mudanças externas, aplicada só pelos itens citados no registro
+    estante.sincronizar_alteracoes(limite=tamanho + 1000)
+    alterar_por_outra_conexao(caminho, rng)
+    resultados['sincronizar_alteracoes_ms'] = medir(
+        lambda: estante.houve_escrita_externa() and estante.sincronizar_alteracoes())
+
+    # Somente leitura x padrão (outra conexão no mesmo arquivo; tudo já confirmado)
+    resultados.update(medir_somente_leitura(caminho, termos, repeticoes))
+
+    # Linha de comando: processo novo (imports + abertura do banco + comando)
+    resultados['cli_partida_ms'] = medir_partida_cli(caminho)
+
+    estante.fechar()
+    return {nome: round(valor, 3) for nome, valor in resultados.items()}
+
+def _commit_atual() -> Optional[str]:
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+def executar(tamanhos: List[int], modo_tk: str = 'auto', repeticoes: int = 3) -> Dict[str, Any]:
+    """Roda a suíte inteira e devolve o documento JSON de resultados."""
+    documento: Dict[str, Any] = {
+        'formato': VERSAO_FORMATO,
+        'quando': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'resultados': {},
+    }
+    with ambiente_tk(modo_tk) as (descricao_tk, criar_widgets), tempfile.TemporaryDirectory() as pasta:
+        documento['tk'] = descricao_tk
+        for tamanho in tamanhos:
+            print(f"⏱️ Medindo {tamanho} item(ns)...", flush=True)
+            # As operações da estante imprimem mensagens; aqui elas só atrapalham
+            with contextlib.redirect_stdout(io.StringIO()):
+                documento['resultados'][str(tamanho)] = medir_tamanho(tamanho, pasta, criar_widgets, repeticoes)
+    return documento
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any], tolerancia: float = 0.25,
+             piso_ms: float = 1.0) -> List[str]:
+    """Imprime as diferenças e devolve as regressões encontradas.
+
+    Uma medida regrediu se ficou mais de 'tolerancia' (25%) mais lenta E a
+    diferença passa de 'piso_ms' (evita alarmes com tempos minúsculos).
+    """
+    regressoes = []
+    for tamanho, medidas in atual['resultados'].items():
+        anteriores = base['resultados'].get(tamanho, {})
+        print(f"\n📊 {tamanho} item(ns) ({base.get('commit') or 'base'} -> {atual.get('commit') or 'atual'})")
+        for nome, valor in medidas.items():
+            # Memória (_kib) segue a mesma regra dos tempos: mais é pior
+            unidade = 'KiB' if nome.endswith('_kib') else 'ms'
+            anterior = anteriores.get(nome)
+            if anterior is None:
+                print(f"  {nome:<30} {valor:>10.3f} {unidade}   (nova medida)")
+                continue
+            variacao = (valor - anterior) / anterior if anterior else 0.0
+            regrediu = valor > anterior * (1 + tolerancia) and valor - anterior > piso_ms
+            marca = '❌' if regrediu else '  '
+            print(f"{marca}{nome:<30} {anterior:>10.3f} -> {valor:>10.3f} {unidade}  ({variacao:+.0%})")
+            if regrediu:
+                regressoes.append(f"{tamanho} itens / {nome}: {anterior:.3f} -> {valor:.3f} {unidade} "
+                                  f"({variacao:+.0%})")
+    if base.get('tk') != atual.get('tk'):
+        print(f"\n⚠️ Treeview medida em modos diferentes ({base.get('tk')} x {atual.get('tk')}).")
+    return regressoes
+
+def _ler_json(caminho: str) -> Dict[str, Any]:
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def _relatar_regressoes(regressoes: List[str]) -> int:
+    if not regressoes:
+        print("\n✅ Nenhuma regressão de desempenho.")
+        return 0
+    print(f"\n❌ {len(regressoes)} regressão(ões) de desempenho:")
+    for regressao in regressoes:
+        print(f"  - {regressao}")
+    return 1
+
+
+# --- EXECUÇÃO PELA LINHA DE COMANDO ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks da Estante Virtual.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_executar = subcomandos.add_parser('executar', help="roda a suíte e grava os tempos em JSON")
+    parser_executar.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO),
+                                 help="quantidades de itens (ex.: 1000 10000 100000 1000000)")
+    parser_executar.add_argument('--saida', default='benchmark.json', help="arquivo JSON de resultados")
+    parser_executar.add_argument('--tk', choices=('auto', 'real', 'simulado'), default='auto',
+                                 help="Treeview real (display ou Xvfb) ou simulada")
+    parser_executar.add_argument('--repeticoes', type=int, default=3)
+    parser_executar.add_argument('--base', help="JSON anterior para comparar ao final")
+    parser_executar.add_argument('--tolerancia', type=float, default=0.25)
+
+    parser_comparar = subcomandos.add_parser('comparar', help="compara dois JSON de resultados")
+    parser_comparar.add_argument('base')
+    parser_comparar.add_argument('atual')
+    parser_comparar.add_argument('--tolerancia', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.comando == 'executar':
+        documento = executar(args.tamanhos, args.tk, args.repeticoes)
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(documento, arquivo, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados ({documento['tk']}) salvos em '{args.saida}'.")
+        if args.base:
+            sys.exit(_relatar_regressoes(comparar(_ler_json(args.base), documento, args.tolerancia)))
+    else:
+        sys.exit(_relatar_regressoes(comparar(_ler_json(args.base), _ler_json(args.atual), args.tolerancia)))
@@ -1,6 +1,18 @@
+import os
+import sys
+import json
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from banco_de_dados import setup_database, Estante, Livro, Revista, HQ, ItemDeLeitura 
+from tkinter import ttk, messagebox, simpledialog, filedialog
+from banco_de_dados import DB_NAME, abrir_conexao, setup_database, modo_somente_leitura_do_ambiente, Estante, PaginadorKeyset, PaginadorBusca, PaginadorAproximado, Livro, Revista, HQ, ItemDeLeitura, criar_item 
+from importacao import ler_arquivo
+from trabalhador_db import TrabalhadorDB, OperacaoCancelada
+from escrita_adiada import ADICIONAR, ativada_pelo_ambiente
+from multiplas_estantes import nome_da_estante
+import instrumentacao
+
+# Referência para medir as fases da inicialização (tempo até a primeira pintura)
+_INICIO = time.perf_counter()
 
 
 # --- 1. CONFIGURAÇÕES VISUAIS PERSONALIZADAS (ESTILO TTK) ---
@@ -10,6 +22,44 @@ COR_LAVANDA = '#E6E6FA'
 COR_ROXO_CLARO = '#9370DB'    
 COR_BRANCO = '#FFFFFF'
 
+ALTURA_LINHA = 25
+
+# Acima deste número de itens a tabela entra no modo virtual (lista paginada)
+LIMITE_MODO_VIRTUAL = 5000
+
+# Espera após a última tecla antes de disparar a busca (em ms)
+ATRASO_BUSCA_MS = 150
+
+# Intervalo com que a GUI recolhe os resultados do TrabalhadorDB (em ms)
+INTERVALO_RESULTADOS_MS = 50
+
+# Com escrita adiada, intervalo com que a GUI pede ao trabalhador para gravar
+# o grupo pendente, se o prazo dele venceu (em ms)
+INTERVALO_DESCARGA_MS = 500
+
+# Intervalo da verificação de escritas de outros programas no mesmo arquivo (em ms)
+INTERVALO_ALTERACOES_MS = 1000
+
+# Resultados mostrados pela busca aproximada (os mais parecidos primeiro)
+LIMITE_BUSCA_APROXIMADA = 200
+
+# Colunas da tabela: título do cabeçalho e ordenação do banco usada ao clicar nele
+COLUNAS_DA_TABELA = {
+    'tipo': ('Tipo', 'tipo'),
+    'titulo': ('Título', 'titulo'),
+    'autor': ('Autor/Escritor', 'autor'),
+    'id_curto': ('ID (Curto)', 'id'),
+}
+
+# Opção do filtro de tipo que não restringe nada
+TODOS_OS_TIPOS = 'Todos'
+
+# Linhas exibidas de imediato na abertura, antes de a carga completa terminar
+LINHAS_PRIMEIRA_TELA = 100
+
+# Se definida, cada inicialização acrescenta seus tempos (JSON) a este arquivo
+VARIAVEL_LOG_INICIALIZACAO = 'ESTANTE_TEMPOS_INICIALIZACAO'
+
 def configurar_estilo():
     """Configura o tema e estilos personalizados usando ttk."""
     style = ttk.Style()
@@ -57,7 +107,7 @@ def configurar_estilo():
                     background=COR_BRANCO,
                     fieldbackground=COR_BRANCO,
                     foreground='#333333',
-                    rowheight=25)
+                    rowheight=ALTURA_LINHA)
     
     # Ajusta o foco da seleção (linha roxa)
     style.map('Estante.Treeview', 
@@ -65,26 +115,304 @@ def configurar_estilo():
               foreground=[('selected', COR_BRANCO)])
 
 
+# --- 1.1 LISTA VIRTUAL (PARA ESTANTES MUITO GRANDES) ---
+class ListaVirtual:
+    """Mantém na Treeview apenas as linhas visíveis, buscadas página a página no DB.
+
+    A barra de rolagem representa a coleção inteira, mas só existem itens do Tk
+    para a janela visível; um pequeno buffer de linhas fica em memória para que
+    rolagens curtas não precisem consultar o banco.
+    """
+
+    def __init__(self, tree, scrollbar, paginador, buffer=50):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.paginador = paginador
+        self.buffer = buffer
+        self.inicio = 0
+        self._visiveis = 20
+        self._buffer_inicio = 0
+        self._linhas_buffer = []
+
+        self.scrollbar.configure(command=self._ao_rolar)
+        self.tree.configure(yscrollcommand=lambda *args: None)
+        self.tree.bind('<Configure>', self._ao_redimensionar)
+        self.tree.bind('<MouseWheel>', lambda e: self.rolar(-1 if e.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda e: self.rolar(-1))
+        self.tree.bind('<Button-5>', lambda e: self.rolar(1))
+        self.tree.bind('<Up>', lambda e: self._navegar_teclado(-1))
+        self.tree.bind('<Down>', lambda e: self._navegar_teclado(1))
+
+    def _ao_redimensionar(self, event):
+        visiveis = max(1, (event.height - ALTURA_LINHA) // ALTURA_LINHA)
+        if visiveis != self._visiveis:
+            self._visiveis = visiveis
+            self.ir_para(self.inicio)
+
+    def _ao_rolar(self, *args):
+        if args[0] == 'moveto':
+            self.ir_para(int(float(args[1]) * self.paginador.total))
+        elif args[0] == 'scroll':
+            passo = self._visiveis if args[2] == 'pages' else 1
+            self.rolar(int(args[1]) * passo)
+
+    def _navegar_teclado(self, direcao):
+        # Nas bordas da janela visível, rola a lista em vez de perder o foco
+        filhos = self.tree.get_children()
+        if not filhos:
+            return
+        borda = filhos[0] if direcao < 0 else filhos[-1]
+        if self.tree.focus() == borda:
+            self.rolar(direcao)
+            vizinho = self.tree.get_children()[0 if direcao < 0 else -1]
+            self.tree.focus(vizinho)
+            self.tree.selection_set(vizinho)
+            return 'break'
+
+    def rolar(self, linhas):
+        self.ir_para(self.inicio + linhas)
+
+    def ir_para(self, inicio):
+        self.inicio = max(0, min(inicio, self.paginador.total - self._visiveis))
+        self.renderizar()
+
+    def _linhas_visiveis(self):
+        fim = min(self.inicio + self._visiveis, self.paginador.total)
+        buffer_fim = self._buffer_inicio + len(self._linhas_buffer)
+        if not (self._buffer_inicio <= self.inicio and fim <= buffer_fim):
+            self._buffer_inicio = max(0, self.inicio - self.buffer)
+            self._linhas_buffer = self.paginador.linhas(
+                self._buffer_inicio, self._visiveis + 2 * self.buffer)
+        return self._linhas_buffer[self.inicio - self._buffer_inicio:fim - self._buffer_inicio]
+
+    def renderizar(self):
+        selecionado = self.tree.focus()
+        filhos = self.tree.get_children()
+        if filhos:
+            self.tree.delete(*filhos)
+
+        for item_id, tipo, titulo, autor in self._linhas_visiveis():
+            self.tree.insert('', tk.END, iid=item_id,
+                             values=(tipo, titulo, autor, item_id[:6]),
+                             tags=(tipo.lower(),))
+
+        if selecionado and self.tree.exists(selecionado):
+            self.tree.focus(selecionado)
+            self.tree.selection_set(selecionado)
+
+        total = self.paginador.total
+        if total:
+            self.scrollbar.set(self.inicio / total, min(1.0, (self.inicio + self._visiveis) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def trocar_paginador(self, paginador):
+        """Passa a exibir outra fonte de linhas (ex.: resultados de uma busca)."""
+        self.paginador = paginador
+        self.inicio = 0
+        self._linhas_buffer = []
+        self.renderizar()
+
+    def desligar(self):
+        """Devolve a Treeview e a barra de rolagem ao comportamento normal (ex.: ao trocar de estante)."""
+        self.scrollbar.configure(command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        for evento in ('<Configure>', '<MouseWheel>', '<Button-4>', '<Button-5>', '<Up>', '<Down>'):
+            self.tree.unbind(evento)
+
+    def invalidar(self, inseridos=(), removidos=()):
+        """Descarta o buffer e redesenha; sem argumentos, relê tudo do DB."""
+        if not inseridos and not removidos:
+            self.paginador.invalidar()
+        for item_id in inseridos:
+            self.paginador.registrar_insercao(item_id)
+        for item_id in removidos:
+            self.paginador.registrar_remocao(item_id)
+        self._linhas_buffer = []
+        self.ir_para(self.inicio)
+
+
 # --- 2. CLASSE DA APLICAÇÃO TKINTER ---
 class EstanteApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, modo_virtual=None, escrita_adiada=None, estantes=None, somente_leitura=None, imutavel=False):
         super().__init__()
+        self.tempos_inicializacao = {}
+        self._marcar_fase('janela_criada')
         
         # Configurações da Janela
-        self.title("Estante Virtual - Gerenciador GUI")
         self.geometry("800x600")
         self.resizable(True, True)
         
-        # Inicializa o estilo e o banco de dados
+        # Inicializa o estilo e o banco de dados. 'estantes' são os arquivos .db
+        # oferecidos no seletor (padrão: só DB_NAME); a primeira é aberta agora.
         configurar_estilo()
-        setup_database()
+        self.caminhos_estantes = [os.path.abspath(caminho) for caminho in (estantes or [DB_NAME])]
+        if escrita_adiada is None:
+            escrita_adiada = ativada_pelo_ambiente()
+        # Somente leitura (ESTANTE_SOMENTE_LEITURA=1, ou =imutavel para cópias
+        # arquivadas): conexões mode=ro com mmap, a tabela sempre no modo virtual
+        # (páginas lidas de cursores, nada carregado) e os botões de escrita desligados
+        if somente_leitura is None:
+            somente_leitura, imutavel = modo_somente_leitura_do_ambiente()
+        self.somente_leitura = somente_leitura or imutavel
+        self._imutavel = imutavel
+        if self.somente_leitura:
+            escrita_adiada = False
+            modo_virtual = True
+        self._escrita_adiada = escrita_adiada
+        self._modo_virtual_pedido = modo_virtual
+        self._abrir_estante(self.caminhos_estantes[0])
         
-        # Inicializa a lógica de dados
-        self.estante = Estante()
+        # Fecha a conexão de forma limpa ao encerrar a janela
+        self.protocol("WM_DELETE_WINDOW", self._ao_fechar)
+        # F12 abre o painel de desempenho (instrumentação)
+        self.bind('<F12>', lambda event: PainelDesempenho(self))
+        # Ctrl+Z / Ctrl+Y desfazem e refazem a última adição ou remoção
+        if not self.somente_leitura:
+            self.bind('<Control-z>', lambda event: self._desfazer())
+            self.bind('<Control-y>', lambda event: self._desfazer(refazer=True))
         
-        # Cria a interface do usuário
+        # Cria a interface do usuário e começa a recolher resultados do trabalhador
         self._criar_widgets()
-        self._carregar_dados_na_treeview()
+        self._marcar_fase('widgets_criados')
+        self._id_resultados = self.after(INTERVALO_RESULTADOS_MS, self._processar_resultados)
+        self._id_descarga = None
+        if escrita_adiada:
+            self._id_descarga = self.after(INTERVALO_DESCARGA_MS, self._descarregar_periodicamente)
+        self._id_alteracoes = self.after(INTERVALO_ALTERACOES_MS, self._verificar_alteracoes_externas)
+        self._exibir_primeira_tela()
+
+    def _abrir_estante(self, caminho):
+        """Abre o banco 'caminho' com as duas conexões da aplicação (veja abaixo)."""
+        if self.somente_leitura:
+            # Sem migrações: o banco precisa estar na versão atual (senão, ErroDeMigracao)
+            conexao = abrir_conexao(caminho, somente_leitura=True, imutavel=self._imutavel)
+        else:
+            conexao = abrir_conexao(caminho)
+            setup_database(conexao)
+        
+        # Inicializa a lógica de dados. Tudo o que grava ou carrega a estante roda
+        # no TrabalhadorDB, fora da thread do Tk; as leituras rápidas da própria
+        # interface (busca, páginas da lista virtual) usam uma conexão separada.
+        # Com escrita adiada (ESTANTE_ESCRITA_ADIADA=1), o trabalhador agrupa as
+        # alterações em poucos commits; a lista virtual passa a mostrá-las quando
+        # o grupo é gravado, porque o leitor só enxerga o que já foi confirmado
+        # (buscas, filtros e ordenação gravam o grupo antes: _executar_busca).
+        self.caminho_estante = caminho
+        self.leitor = Estante(conexao, carregar=False, somente_leitura=self.somente_leitura)
+        self.estante = Estante(abrir_conexao(caminho, check_same_thread=False, somente_leitura=self.somente_leitura,
+                                             imutavel=self._imutavel),
+                               carregar=False, escrita_adiada=self._escrita_adiada,
+                               somente_leitura=self.somente_leitura)
+        self.trabalhador = TrabalhadorDB(self.estante)
+        self._tarefas_ativas = []
+        self._marcar_fase('banco_aberto')
+
+        # Em estantes grandes (ou com modo_virtual=True) os itens não são carregados
+        # na memória: a tabela busca só as páginas visíveis no banco de dados.
+        # (A contagem para ao passar do limite, então custa pouco mesmo com 1M de itens.)
+        modo_virtual = self._modo_virtual_pedido
+        if modo_virtual is None:
+            modo_virtual = self.leitor.contar_itens(limite=LIMITE_MODO_VIRTUAL + 1) > LIMITE_MODO_VIRTUAL
+        self.modo_virtual = modo_virtual
+        self.title(f"Estante Virtual - {nome_da_estante(caminho)}"
+                   + (" (somente leitura)" if self.somente_leitura else ""))
+
+    def _fechar_estante(self):
+        # Interrompe o que puder ser cancelado e espera o trabalhador fechar a conexão
+        for tarefa, _ in self._tarefas_ativas:
+            tarefa.cancelar()
+        # O trabalhador grava o grupo pendente ao fechar a estante
+        self.trabalhador.encerrar(timeout=10)
+        self.leitor.fechar()
+
+    def _trocar_estante(self, caminho):
+        """Fecha a estante atual e abre outra, sem reiniciar o aplicativo."""
+        caminho = os.path.abspath(caminho)
+        if caminho == self.caminho_estante:
+            return
+        self._fechar_estante()
+        # Inclui as linhas desanexadas por uma busca (continuam existindo na Treeview)
+        antigas = set(self.tree.get_children()) | {item.id for item in self.estante.itens}
+        self.tree.delete(*[iid for iid in antigas if self.tree.exists(iid)])
+
+        if caminho not in self.caminhos_estantes:
+            self.caminhos_estantes.append(caminho)
+            self.combo_estante.configure(values=self.caminhos_estantes)
+        self.estante_var.set(caminho)
+        self._abrir_estante(caminho)
+        self._atualizar_indicador()
+        self._configurar_lista()
+        self._exibir_primeira_tela()
+        # A busca e os filtros digitados continuam valendo na estante nova
+        if self.busca_var.get().strip() or any(self._filtro_atual().values()):
+            self._executar_busca()
+
+    def _abrir_outra_estante(self):
+        tipos = [("Estante (SQLite)", "*.db"), ("Todos os arquivos", "*.*")]
+        if self.somente_leitura:
+            # Somente leitura não cria arquivos: só estantes que já existem
+            caminho = filedialog.askopenfilename(title="Abrir estante (somente leitura)", filetypes=tipos)
+        else:
+            # Um arquivo que ainda não existe vira uma estante nova (vazia)
+            caminho = filedialog.asksaveasfilename(
+                title="Abrir ou criar estante", defaultextension='.db', confirmoverwrite=False,
+                filetypes=tipos)
+        if caminho:
+            self._trocar_estante(caminho)
+
+    def _exibir_primeira_tela(self):
+        """Mostra a primeira tela imediatamente e carrega o restante em segundo plano.
+
+        A estante é carregada UMA única vez (pelo trabalhador); as linhas já
+        exibidas por aqui não são inseridas de novo quando os blocos chegam.
+        """
+        self.after_idle(self._marcar_fase, 'primeira_pintura')
+
+        if self.modo_virtual:
+            # A lista virtual só precisa da página visível: não há carga completa
+            self.lista_virtual.renderizar()
+            self.after_idle(self._concluir_inicializacao)
+            return
+
+        primeiras = self.leitor.primeiras_linhas(LINHAS_PRIMEIRA_TELA)
+        for item_id, tipo, titulo, autor in primeiras:
+            self.tree.insert('', tk.END, iid=item_id,
+                             values=(tipo, titulo, autor, item_id[:6]),
+                             tags=(tipo.lower(),))
+        ja_exibidos = {linha[0] for linha in primeiras}
+
+        def bloco_carregado(bloco):
+            self._aplicar_diferencas(novos=[item for item in bloco if item.id not in ja_exibidos])
+
+        self._em_segundo_plano(
+            "Carregando a estante...",
+            lambda estante, tarefa: estante._carregar_itens_db(
+                ao_carregar_bloco=tarefa.informar_progresso, tamanho_bloco=2000),
+            ao_progredir=bloco_carregado,
+            ao_concluir=lambda _: self._concluir_inicializacao())
+
+    def _marcar_fase(self, fase):
+        # Só a abertura do aplicativo é medida (não as trocas de estante)
+        if 'carga_completa' not in self.tempos_inicializacao:
+            self.tempos_inicializacao[fase] = round((time.perf_counter() - _INICIO) * 1000, 1)
+
+    def _concluir_inicializacao(self):
+        """Registra o fim da carga e relata os tempos de cada fase da abertura."""
+        if 'carga_completa' in self.tempos_inicializacao:
+            return  # Troca de estante
+        self._marcar_fase('carga_completa')
+        fases = ', '.join(f"{fase}={ms:.0f}ms" for fase, ms in self.tempos_inicializacao.items())
+        print(f"\n⏱️ Inicialização: {fases}")
+
+        caminho_log = os.environ.get(VARIAVEL_LOG_INICIALIZACAO)
+        if caminho_log:
+            registro = {'quando': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                        'modo_virtual': self.modo_virtual,
+                        'itens': self.leitor.contar_itens(),
+                        'fases_ms': self.tempos_inicializacao}
+            with open(caminho_log, 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps(registro) + '\n')
 
     def _criar_widgets(self):
         # Frame Principal (Content)
@@ -94,14 +422,61 @@ class EstanteApp(tk.Tk):
         # Título Personalizado com Icone
         ttk.Label(main_frame, text="📖 Minha Coleção de Leitura", style='Titulo.TLabel').pack(pady=(0, 20))
 
-        columns = ('tipo', 'titulo', 'autor', 'id_curto')
+        # Seletor de estante (um arquivo .db cada): trocar não reinicia o aplicativo
+        estante_frame = ttk.Frame(main_frame)
+        estante_frame.pack(fill='x', pady=(0, 5))
+        ttk.Label(estante_frame, text="📚 Estante:", background=COR_LAVANDA).pack(side='left', padx=(0, 5))
+        self.estante_var = tk.StringVar(value=self.caminho_estante)
+        self.combo_estante = ttk.Combobox(estante_frame, textvariable=self.estante_var, state='readonly',
+                                          values=self.caminhos_estantes)
+        self.combo_estante.pack(side='left', fill='x', expand=True)
+        self.combo_estante.bind('<<ComboboxSelected>>',
+                                lambda event: self._trocar_estante(self.estante_var.get()))
+        ttk.Button(estante_frame, text="📂 Abrir Estante...", 
+                   command=self._abrir_outra_estante, 
+                   style='Info.TButton').pack(side='left', padx=(5, 0))
+
+        # Caixa de busca (busca enquanto digita, no índice FTS5)
+        busca_frame = ttk.Frame(main_frame)
+        busca_frame.pack(fill='x')
+        ttk.Label(busca_frame, text="🔍 Buscar:", background=COR_LAVANDA).pack(side='left', padx=(0, 5))
+        self.busca_var = tk.StringVar()
+        entry_busca = ttk.Entry(busca_frame, textvariable=self.busca_var)
+        entry_busca.pack(side='left', fill='x', expand=True)
+        entry_busca.bind('<KeyRelease>', self._agendar_busca)
+        # Tolerante a erros de digitação ("Sandmn" encontra "Sandman"), pelo índice de trigramas
+        self.busca_aproximada_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(busca_frame, text="Aproximada", variable=self.busca_aproximada_var,
+                        command=self._agendar_busca).pack(side='left', padx=(5, 0))
+        self._busca_agendada = None
+
+        # Filtros combinados (tipo + início do autor + início do título), nos índices secundários
+        filtro_frame = ttk.Frame(main_frame)
+        filtro_frame.pack(fill='x', pady=(5, 0))
+        ttk.Label(filtro_frame, text="Tipo:", background=COR_LAVANDA).pack(side='left', padx=(0, 5))
+        self.filtro_tipo_var = tk.StringVar(value=TODOS_OS_TIPOS)
+        combo_tipo = ttk.Combobox(filtro_frame, textvariable=self.filtro_tipo_var, state='readonly', width=10,
+                                  values=(TODOS_OS_TIPOS, 'Livro', 'Revista', 'HQ'))
+        combo_tipo.pack(side='left')
+        combo_tipo.bind('<<ComboboxSelected>>', self._agendar_busca)
+
+        self.filtro_autor_var = tk.StringVar()
+        self.filtro_titulo_var = tk.StringVar()
+        for rotulo, variavel in (("Autor:", self.filtro_autor_var), ("Título:", self.filtro_titulo_var)):
+            ttk.Label(filtro_frame, text=rotulo, background=COR_LAVANDA).pack(side='left', padx=(10, 5))
+            entry_filtro = ttk.Entry(filtro_frame, textvariable=variavel, width=20)
+            entry_filtro.pack(side='left', fill='x', expand=True)
+            entry_filtro.bind('<KeyRelease>', self._agendar_busca)
+
+        columns = tuple(COLUNAS_DA_TABELA)
         self.tree = ttk.Treeview(main_frame, columns=columns, show='headings', style='Estante.Treeview')
         
-        # Configura as colunas
-        self.tree.heading('tipo', text='Tipo', anchor=tk.W)
-        self.tree.heading('titulo', text='Título', anchor=tk.W)
-        self.tree.heading('autor', text='Autor/Escritor', anchor=tk.W)
-        self.tree.heading('id_curto', text='ID (Curto)', anchor=tk.W)
+        # Configura as colunas (clicar no cabeçalho ordena; clicar de novo inverte)
+        self._coluna_ordenada = None
+        self._ordem_decrescente = False
+        for coluna, (texto, _) in COLUNAS_DA_TABELA.items():
+            self.tree.heading(coluna, text=texto, anchor=tk.W,
+                              command=lambda coluna=coluna: self._ordenar_por(coluna))
 
         # Configura a largura das colunas
         self.tree.column('tipo', width=80, stretch=tk.NO)
@@ -115,46 +490,356 @@ class EstanteApp(tk.Tk):
         vsb = ttk.Scrollbar(main_frame, orient="vertical", command=self.tree.yview)
         vsb.pack(side='right', fill='y')
         self.tree.configure(yscrollcommand=vsb.set)
+        self._barra_rolagem = vsb
+
+        self.lista_virtual = None
+        self._configurar_lista()
         
         # --- Botões de Ação ---
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill='x', pady=10)
         
         # Botão Adicionar
-        ttk.Button(button_frame, text="➕ Adicionar Novo Item", 
-                   command=self._abrir_janela_adicionar, 
-                   style='Acao.TButton').pack(side='left', padx=5)
+        botao_adicionar = ttk.Button(button_frame, text="➕ Adicionar Novo Item", 
+                                     command=self._abrir_janela_adicionar, 
+                                     style='Acao.TButton')
+        botao_adicionar.pack(side='left', padx=5)
         
         # Botão Remover
-        ttk.Button(button_frame, text="🗑️ Remover Item", 
-                   command=self._remover_item_selecionado, 
-                   style='Acao.TButton').pack(side='left', padx=5)
+        botao_remover = ttk.Button(button_frame, text="🗑️ Remover Item", 
+                                   command=self._remover_item_selecionado, 
+                                   style='Acao.TButton')
+        botao_remover.pack(side='left', padx=5)
                    
         # Botão Detalhes
         ttk.Button(button_frame, text="ℹ️ Ver Detalhes", 
                    command=self._exibir_detalhes, 
                    style='Info.TButton').pack(side='left', padx=5)
                    
+        # Botões Desfazer / Refazer (Ctrl+Z / Ctrl+Y)
+        botao_desfazer = ttk.Button(button_frame, text="↩️ Desfazer", 
+                                    command=self._desfazer, 
+                                    style='Info.TButton')
+        botao_desfazer.pack(side='left', padx=5)
+        botao_refazer = ttk.Button(button_frame, text="↪️ Refazer", 
+                                   command=lambda: self._desfazer(refazer=True), 
+                                   style='Info.TButton')
+        botao_refazer.pack(side='left', padx=5)
+                   
         # Botão Atualizar
         ttk.Button(button_frame, text="🔄 Atualizar Lista", 
                    command=self._carregar_dados_na_treeview, 
                    style='Info.TButton').pack(side='right', padx=5)
+
+        # Botão Importar (CSV/JSONL)
+        botao_importar = ttk.Button(button_frame, text="📥 Importar", 
+                                    command=self._importar_arquivo, 
+                                    style='Info.TButton')
+        botao_importar.pack(side='right', padx=5)
+
+        # Somente leitura: o que grava fica visível, mas desligado
+        self.botoes_de_escrita = (botao_adicionar, botao_remover, botao_desfazer, botao_refazer, botao_importar)
+        if self.somente_leitura:
+            for botao in self.botoes_de_escrita:
+                botao.configure(state='disabled')
+
+        # Botão Estatísticas
+        ttk.Button(button_frame, text="📊 Estatísticas", 
+                   command=lambda: JanelaEstatisticas(self), 
+                   style='Info.TButton').pack(side='right', padx=5)
+
+        # --- Barra de status (indicador de operação em andamento) ---
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(fill='x')
+        self.status_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.status_var, background=COR_LAVANDA).pack(side='left', padx=5)
+        self.barra_ocupado = ttk.Progressbar(status_frame, mode='indeterminate', length=120)
+        self.botao_cancelar = ttk.Button(status_frame, text="Cancelar", 
+                                         command=self._cancelar_tarefas, 
+                                         style='Info.TButton')
                    
 
+    def _configurar_lista(self):
+        """Liga a lista virtual (estantes grandes) ou a tabela completa, conforme modo_virtual."""
+        if self.lista_virtual:
+            self.lista_virtual.desligar()
+            self.lista_virtual = None
+        if self.modo_virtual:
+            self._paginador_principal = PaginadorKeyset(self.leitor._get_db_connection(),
+                                                        **self._ordenacao_atual())
+            self.lista_virtual = ListaVirtual(self.tree, self._barra_rolagem, self._paginador_principal)
+
+    def _ao_fechar(self):
+        self.after_cancel(self._id_resultados)
+        if self._id_descarga is not None:
+            self.after_cancel(self._id_descarga)
+        self.after_cancel(self._id_alteracoes)
+        self._fechar_estante()
+        self.destroy()
+
+    # --- Operações em segundo plano ---
+    def _em_segundo_plano(self, descricao, operacao, ao_concluir=None, ao_falhar=None,
+                          ao_progredir=None, cancelavel=False):
+        """Envia 'operacao(estante, tarefa)' ao TrabalhadorDB e mostra o indicador de ocupado."""
+        def concluir(resultado):
+            self._finalizar_tarefa(tarefa)
+            if ao_concluir:
+                ao_concluir(resultado)
+
+        def falhar(erro):
+            self._finalizar_tarefa(tarefa)
+            if isinstance(erro, OperacaoCancelada):
+                return
+            if ao_falhar:
+                ao_falhar(erro)
+            else:
+                messagebox.showerror("Erro", f"Ocorreu um erro inesperado: {erro}")
+
+        tarefa = self.trabalhador.submeter(operacao, concluir, falhar, ao_progredir, cancelavel)
+        self._tarefas_ativas.append((tarefa, descricao))
+        self._atualizar_indicador()
+        return tarefa
+
+    def _finalizar_tarefa(self, tarefa):
+        self._tarefas_ativas = [(t, d) for t, d in self._tarefas_ativas if t is not tarefa]
+        self._atualizar_indicador()
+
+    def _atualizar_indicador(self):
+        if not self._tarefas_ativas:
+            self.status_var.set("")
+            self.barra_ocupado.stop()
+            self.barra_ocupado.pack_forget()
+            self.botao_cancelar.pack_forget()
+            return
+
+        self.status_var.set(self._tarefas_ativas[0][1])
+        if not self.barra_ocupado.winfo_ismapped():
+            self.barra_ocupado.pack(side='left', padx=5)
+            self.barra_ocupado.start(10)
+        if any(tarefa.cancelavel for tarefa, _ in self._tarefas_ativas):
+            self.botao_cancelar.pack(side='left', padx=5)
+        else:
+            self.botao_cancelar.pack_forget()
+
+    def _cancelar_tarefas(self):
+        for tarefa, _ in self._tarefas_ativas:
+            tarefa.cancelar()
+        self.status_var.set("Cancelando...")
+
+    def _descarregar_periodicamente(self):
+        """Temporizador da escrita adiada: grava o grupo pendente quando o prazo vence.
+
+        O leitor percebe o COMMIT como uma escrita externa (veja abaixo).
+        """
+        self.trabalhador.submeter(lambda estante, tarefa: estante.descarregar_se_vencido())
+        self._id_descarga = self.after(INTERVALO_DESCARGA_MS, self._descarregar_periodicamente)
+
+    def _verificar_alteracoes_externas(self):
+        """Aplica sozinho o que outros programas (ou o trabalhador) gravaram no arquivo.
+
+        A verificação é só um PRAGMA data_version na conexão do leitor; quando
+        ele muda, a lista virtual relê a página visível, e a tabela completa
+        recebe do trabalhador apenas os itens citados no registro de alterações.
+        """
+        if self.leitor.houve_escrita_externa():
+            if self.lista_virtual:
+                self.lista_virtual.invalidar()
+            else:
+                self.trabalhador.submeter(lambda estante, tarefa: estante.sincronizar_alteracoes(),
+                                          lambda diferencas: self._aplicar_diferencas(*diferencas))
+        self._id_alteracoes = self.after(INTERVALO_ALTERACOES_MS, self._verificar_alteracoes_externas)
+
+    def _desfazer(self, refazer=False):
+        """Desfaz (ou refaz) a última adição/remoção, pelo histórico da estante do trabalhador."""
+        def concluir(efeito):
+            if efeito is None:
+                self.status_var.set("Nada para refazer." if refazer else "Nada para desfazer.")
+                return
+            operacao, item = efeito
+            if operacao == ADICIONAR:
+                self._aplicar_diferencas(novos=[item])
+            else:
+                self._aplicar_diferencas(removidos=[item.id])
+            self.status_var.set(f"{'Refeito' if refazer else 'Desfeito'}: {item.titulo}")
+
+        self._em_segundo_plano("Refazendo..." if refazer else "Desfazendo...",
+                               lambda estante, tarefa: estante.refazer() if refazer else estante.desfazer(),
+                               ao_concluir=concluir)
+
+    def _processar_resultados(self):
+        # Poucas mensagens por vez: blocos grandes da carga inicial não travam a janela
+        self.trabalhador.despachar_resultados(limite=10)
+        self._id_resultados = self.after(INTERVALO_RESULTADOS_MS, self._processar_resultados)
+
     def _carregar_dados_na_treeview(self):
-        # ... [Método idêntico ao anterior] ...
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        self.estante._carregar_itens_db() 
-        
-        for item in self.estante.itens:
+        """Sincroniza a Treeview com o DB aplicando só as linhas que mudaram."""
+        if self.lista_virtual:
+            self.lista_virtual.invalidar()
+            return
+        self._em_segundo_plano("Sincronizando com o banco de dados...",
+                               lambda estante, tarefa: estante.sincronizar_com_db(),
+                               ao_concluir=lambda diferencas: self._aplicar_diferencas(*diferencas))
+
+    @staticmethod
+    def _valores_da_linha(item):
+        return (item.__class__.__name__, item.titulo, item.autor, item.id[:6])
+
+    def _aplicar_diferencas(self, novos=(), removidos=(), alterados=()):
+        """Atualiza a Treeview no lugar, usando o item.id como iid de cada linha."""
+        if self.lista_virtual:
+            self.lista_virtual.invalidar(inseridos=[item.id for item in novos], removidos=removidos)
+            return
+
+        removidos = [iid for iid in removidos if self.tree.exists(iid)]
+        if removidos:
+            self.tree.delete(*removidos)
+
+        for item in alterados:
+            self.tree.item(item.id, values=self._valores_da_linha(item),
+                           tags=(item.__class__.__name__.lower(),))
+
+        for item in novos:
             self.tree.insert('', tk.END, iid=item.id,
-                             values=(item.__class__.__name__, item.titulo, item.autor, item.id[:6]),
+                             values=self._valores_da_linha(item),
                              tags=(item.__class__.__name__.lower(),)) 
+
+        # Mantém a busca/filtro ativos (as linhas novas podem não corresponder)
+        if (novos or alterados) and (self.busca_var.get().strip() or any(self._filtro_atual().values())
+                                     or self._coluna_ordenada):
+            self._executar_busca()
+
+    def _ordenar_por(self, coluna):
+        """Ordena a tabela pela coluna clicada, no banco (ORDER BY sobre um índice)."""
+        if self._coluna_ordenada == coluna:
+            self._ordem_decrescente = not self._ordem_decrescente
+        else:
+            self._coluna_ordenada, self._ordem_decrescente = coluna, False
+
+        for nome, (texto, _) in COLUNAS_DA_TABELA.items():
+            seta = (' ▼' if self._ordem_decrescente else ' ▲') if nome == coluna else ''
+            self.tree.heading(nome, text=texto + seta)
+
+        if self.lista_virtual:
+            self._paginador_principal = PaginadorKeyset(self.leitor._get_db_connection(),
+                                                        **self._ordenacao_atual())
+        self._executar_busca()
+
+    def _ordenacao_atual(self):
+        """Ordenação escolhida nos cabeçalhos, no formato de PaginadorKeyset (vazio = padrão)."""
+        if self._coluna_ordenada is None:
+            return {}
+        return {'ordem': COLUNAS_DA_TABELA[self._coluna_ordenada][1],
+                'decrescente': self._ordem_decrescente}
+
+    def _filtro_atual(self):
+        """Critérios dos controles de filtro, no formato de Estante.filtrar_ids()."""
+        tipo = self.filtro_tipo_var.get()
+        return {'tipo': None if tipo == TODOS_OS_TIPOS else tipo,
+                'autor': self.filtro_autor_var.get().strip() or None,
+                'titulo': self.filtro_titulo_var.get().strip() or None}
+
+    def _agendar_busca(self, event=None):
+        # Aguarda uma pequena pausa na digitação para não buscar a cada tecla
+        if self._busca_agendada is not None:
+            self.after_cancel(self._busca_agendada)
+        self._busca_agendada = self.after(ATRASO_BUSCA_MS, self._executar_busca)
+
+    def _executar_busca(self, grupo_gravado=False):
+        self._busca_agendada = None
+        termo = self.busca_var.get().strip()
+        filtro = self._filtro_atual()
+        filtrando = any(filtro.values())
+        # A busca aproximada mantém sempre a ordem por similaridade
+        ordenacao = self._ordenacao_atual()
+
+        # Com escrita adiada, o grupo aberto pelo trabalhador ainda não foi
+        # confirmado e o leitor (outra conexão) não enxerga esses itens: a busca
+        # esconderia o que acabou de ser adicionado. O trabalhador grava o grupo
+        # antes, e a consulta roda quando ele terminar.
+        consulta_o_leitor = self.lista_virtual or termo or filtrando or ordenacao
+        if consulta_o_leitor and not grupo_gravado and self.estante.diario.pendentes:
+            self.trabalhador.submeter(lambda estante, tarefa: estante.descarregar(),
+                                      lambda _: self._executar_busca(grupo_gravado=True))
+            return
+
+        if self.lista_virtual:
+            if termo and self.busca_aproximada_var.get():
+                paginador = PaginadorAproximado(self.leitor, termo, LIMITE_BUSCA_APROXIMADA, **filtro)
+            elif termo and ordenacao:
+                paginador = PaginadorKeyset(self.leitor._get_db_connection(), termo=termo,
+                                            **filtro, **ordenacao)
+            elif termo:
+                paginador = PaginadorBusca(self.leitor._get_db_connection(), termo, **filtro)
+            elif filtrando:
+                paginador = PaginadorKeyset(self.leitor._get_db_connection(), **filtro, **ordenacao)
+            else:
+                # Pode ter ficado desatualizado enquanto a busca estava ativa
+                paginador = self._paginador_principal
+                paginador.invalidar()
+            self.lista_virtual.trocar_paginador(paginador)
+            return
+
+        # Modo normal: todas as linhas já existem na Treeview; a busca apenas
+        # escolhe quais ficam anexadas (as demais são desanexadas, não apagadas)
+        if termo and self.busca_aproximada_var.get():
+            ids = [item_id for item_id, _ in
+                   self.leitor.buscar_aproximado_ids(termo, LIMITE_BUSCA_APROXIMADA, **filtro)]
+        elif termo:
+            ids = self.leitor.buscar_ids(termo, limite=None, **filtro, **ordenacao)
+        elif filtrando or ordenacao:
+            ids = self.leitor.filtrar_ids(**filtro, **ordenacao)
+        else:
+            ids = self.leitor.filtrar_ids()
+        self.tree.set_children('', *[item_id for item_id in ids if self.tree.exists(item_id)])
                              
+    def _importar_arquivo(self):
+        caminho = filedialog.askopenfilename(
+            title="Importar itens",
+            filetypes=[("CSV ou JSONL", "*.csv *.jsonl *.json"), ("Todos os arquivos", "*.*")])
+        if not caminho:
+            return
+
+        try:
+            registros = ler_arquivo(caminho)
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Não foi possível ler o arquivo: {e}")
+            return
+
+        # A lista virtual relê a página visível; a Treeview completa precisa dos itens novos
+        guardar_ids = not self.lista_virtual
+
+        def importar(estante, tarefa):
+            resultado = estante.importar_em_lote(
+                registros,
+                ao_progredir=lambda r: tarefa.informar_progresso(r.processados),
+                deve_parar=lambda: tarefa.cancelada,
+                guardar_ids=guardar_ids)
+            return resultado, [estante.obter_item(item_id) for item_id in resultado.ids_importados]
+
+        def concluir(retorno):
+            resultado, novos = retorno
+            if self.lista_virtual:
+                self.lista_virtual.invalidar()
+            else:
+                self._aplicar_diferencas(novos=novos)
+
+            resumo = (f"{resultado.importados} de {resultado.processados} registro(s) importado(s).\n"
+                      f"{resultado.duplicados} duplicado(s) ignorado(s), {resultado.total_erros} erro(s).")
+            if resultado.interrompido:
+                resumo = "Importação cancelada (os lotes já gravados foram mantidos).\n" + resumo
+            if resultado.erros:
+                resumo += "\n\n" + "\n".join(f"Registro {numero}: {mensagem}"
+                                               for numero, mensagem in resultado.erros[:10])
+            messagebox.showinfo("Importação concluída", resumo)
+
+        self._em_segundo_plano(
+            "Importando...", importar, ao_concluir=concluir,
+            ao_falhar=lambda e: messagebox.showerror("Erro", f"Não foi possível ler o arquivo: {e}"),
+            ao_progredir=lambda processados: self.status_var.set(
+                f"Importando... {processados} registro(s) lido(s)"),
+            cancelavel=True)
+
     def _remover_item_selecionado(self):
-        # ... [Método idêntico ao anterior] ...
         selected_item = self.tree.focus()
         if not selected_item:
             messagebox.showwarning("Aviso", "Selecione um item para remover.")
@@ -165,28 +850,40 @@ class EstanteApp(tk.Tk):
         resposta = messagebox.askyesno("Confirmar Remoção", f"Tem certeza que deseja remover '{item_titulo}' (ID: {item_id_completo[:6]}...)?")
 
         if resposta:
-            self.estante.remover_item(item_id_completo) 
-            self._carregar_dados_na_treeview() 
-            messagebox.showinfo("Sucesso", f"Item removido: {item_titulo}")
+            def concluir(removidos):
+                self._aplicar_diferencas(removidos=removidos) 
+                if removidos:
+                    messagebox.showinfo("Sucesso", f"Item removido: {item_titulo}")
+                else:
+                    messagebox.showwarning("Aviso", f"Não foi possível remover '{item_titulo}'.")
+
+            self._em_segundo_plano("Removendo item...",
+                                   lambda estante, tarefa: estante.remover_item(item_id_completo),
+                                   ao_concluir=concluir)
             
     def _exibir_detalhes(self):
-        # ... [Método idêntico ao anterior] ...
         selected_item = self.tree.focus()
         if not selected_item:
             messagebox.showwarning("Aviso", "Selecione um item para ver os detalhes.")
             return
 
         item_id = selected_item
-        item_obj = next((item for item in self.estante.itens if item.id == item_id), None)
 
-        if item_obj:
-            detalhes_texto = item_obj.detalhes()
-            messagebox.showinfo(f"Detalhes de {item_obj.__class__.__name__}", detalhes_texto)
-        else:
-            messagebox.showerror("Erro", "Item não encontrado na memória.")
+        # O item (e seus campos específicos) é lido pelo trabalhador, fora da thread do Tk
+        def carregar(estante, tarefa):
+            item_obj = estante.obter_item(item_id)
+            return (item_obj.__class__.__name__, item_obj.detalhes()) if item_obj else None
+
+        def mostrar(detalhes):
+            if detalhes:
+                nome_classe, detalhes_texto = detalhes
+                messagebox.showinfo(f"Detalhes de {nome_classe}", detalhes_texto)
+            else:
+                messagebox.showerror("Erro", "Item não encontrado.")
+
+        self._em_segundo_plano("Carregando detalhes...", carregar, ao_concluir=mostrar)
             
     def _abrir_janela_adicionar(self):
-        # ... [Método idêntico ao anterior] ...
         popup = tk.Toplevel(self)
         popup.title("➕ Adicionar Novo Item")
         popup.geometry("400x350")
@@ -228,7 +925,6 @@ class EstanteApp(tk.Tk):
                    style='Acao.TButton').grid(row=4, column=0, columnspan=4, pady=15)
                    
     def _atualizar_campos_adicionar(self, parent_frame, tipo):
-        # ... [Método idêntico ao anterior] ...
         for widget in self.specific_fields_frame.winfo_children():
             widget.destroy()
 
@@ -260,7 +956,6 @@ class EstanteApp(tk.Tk):
             self.specific_entries['desenhista'] = entry
             
     def _salvar_novo_item(self, popup):
-        # ... [Método idêntico ao anterior] ...
         titulo = self.entry_titulo.get().strip()
         autor = self.entry_autor.get().strip()
         tipo = self.tipo_item_var.get()
@@ -269,29 +964,12 @@ class EstanteApp(tk.Tk):
             messagebox.showerror("Erro de Validação", "Título e Autor são obrigatórios.")
             return
 
-        novo_item: Optional[ItemDeLeitura] = None
+        # Mesmas regras de validação usadas pela importação em lote
+        dados = {'tipo': tipo, 'titulo': titulo, 'autor': autor}
+        dados.update({campo: entry.get() for campo, entry in self.specific_entries.items()})
         
         try:
-            if tipo == 'Livro':
-                paginas_str = self.specific_entries['paginas'].get().strip()
-                paginas = int(paginas_str)
-                if paginas <= 0:
-                     raise ValueError("O número de páginas deve ser um valor inteiro positivo.")
-                novo_item = Livro(titulo, autor, paginas)
-            
-            elif tipo == 'Revista':
-                edicao = self.specific_entries['edicao'].get().strip()
-                mes_publicacao = self.specific_entries['mes_publicacao'].get().strip()
-                if not edicao or not mes_publicacao:
-                    raise ValueError("Edição e Mês são obrigatórios para Revistas.")
-                novo_item = Revista(titulo, autor, edicao, mes_publicacao)
-                
-            elif tipo == 'HQ':
-                desenhista = self.specific_entries['desenhista'].get().strip()
-                if not desenhista:
-                    raise ValueError("Desenhista é obrigatório para HQs.")
-                novo_item = HQ(titulo, autor, desenhista)
-
+            novo_item = criar_item(dados)
         except ValueError as e:
             messagebox.showerror("Erro de Dados", f"Erro na entrada de dados: {e}")
             return
@@ -300,13 +978,159 @@ class EstanteApp(tk.Tk):
             return
             
         if novo_item:
-            self.estante.adicionar_item(novo_item)
-            self._carregar_dados_na_treeview() 
-            messagebox.showinfo("Sucesso", f"'{titulo}' ({tipo}) foi adicionado com sucesso!")
-            popup.destroy() 
+            def concluir(salvo):
+                if not salvo:
+                    messagebox.showerror("Erro", f"Não foi possível salvar '{titulo}' no banco de dados.")
+                    return
+                self._aplicar_diferencas(novos=[novo_item]) 
+                messagebox.showinfo("Sucesso", f"'{titulo}' ({tipo}) foi adicionado com sucesso!")
+                if popup.winfo_exists():
+                    popup.destroy() 
+
+            def salvar(estante, tarefa):
+                # Um item igual a outro já salvo só entra se o usuário confirmar
+                existente = estante.encontrar_duplicata(novo_item)
+                return existente or estante.adicionar_item(novo_item, permitir_duplicata=False)
+
+            def conferir(retorno):
+                if not isinstance(retorno, str):
+                    concluir(retorno)
+                elif messagebox.askyesno("Item duplicado",
+                                         f"Já existe um item igual a '{titulo}' (ID {retorno[:6]}...).\n"
+                                         "Deseja adicioná-lo mesmo assim?", parent=popup):
+                    self._em_segundo_plano(
+                        "Salvando item...",
+                        lambda estante, tarefa: estante.adicionar_item(novo_item, permitir_duplicata=True),
+                        ao_concluir=concluir)
+
+            self._em_segundo_plano("Salvando item...", salvar, ao_concluir=conferir)
+
+
+# --- 2.1 JANELA DE ESTATÍSTICAS ---
+class JanelaEstatisticas(tk.Toplevel):
+    """Resumo da coleção: contagens por tipo, páginas dos livros e rankings.
+
+    Os números vêm de Estante.estatisticas() (tabela de contadores), então a
+    consulta é instantânea mesmo com milhões de itens e pode ser refeita
+    periodicamente na própria thread da interface.
+    """
+
+    INTERVALO_MS = 2000
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Estatísticas da Estante")
+        self.geometry("760x420")
+        self.configure(bg=COR_LAVANDA)
+
+        self.resumo_var = tk.StringVar()
+        ttk.Label(self, textvariable=self.resumo_var, background=COR_LAVANDA,
+                  font=('Arial', 10, 'bold'), padding=10).pack(fill='x')
+
+        tabelas = ttk.Frame(self, padding="5")
+        tabelas.pack(fill='both', expand=True)
+        self.tabelas = {}
+        for chave, titulo in (('autores', 'Autor'), ('desenhistas', 'Desenhista'), ('meses', 'Mês')):
+            tree = ttk.Treeview(tabelas, columns=('nome', 'quantidade'), show='headings', height=12)
+            tree.heading('nome', text=titulo)
+            tree.heading('quantidade', text='Itens')
+            tree.column('nome', width=160)
+            tree.column('quantidade', width=60, anchor='e')
+            tree.pack(side='left', fill='both', expand=True, padx=5)
+            self.tabelas[chave] = tree
+        self._atualizar()
+
+    def _atualizar(self):
+        if not self.winfo_exists():
+            return
+        numeros = self.app.leitor.estatisticas()
+        por_tipo = ', '.join(f"{tipo}: {quantidade}" for tipo, quantidade in sorted(numeros.por_tipo.items()))
+        self.resumo_var.set(f"Total: {numeros.total} item(ns) ({por_tipo or 'nenhum'})\n"
+                            f"Livros: {numeros.total_paginas_livros} páginas no total, "
+                            f"{numeros.media_paginas_livros:.1f} em média")
+        for chave, pares in (('autores', numeros.principais_autores),
+                             ('desenhistas', numeros.principais_desenhistas),
+                             ('meses', numeros.revistas_por_mes)):
+            tree = self.tabelas[chave]
+            tree.delete(*tree.get_children())
+            for nome, quantidade in pares:
+                tree.insert('', tk.END, values=(nome, quantidade))
+        self.after(self.INTERVALO_MS, self._atualizar)
+
+
+# --- 2.2 PAINEL DE DESEMPENHO (F12) ---
+class PainelDesempenho(tk.Toplevel):
+    """Mostra os números da instrumentação e permite ligá-la, zerá-la ou perfilar uma operação."""
+
+    INTERVALO_MS = 1000
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Desempenho")
+        self.geometry("900x450")
+
+        barra = ttk.Frame(self, padding="5")
+        barra.pack(fill='x')
+        self.ativa_var = tk.BooleanVar(value=instrumentacao.esta_ativa())
+        ttk.Checkbutton(barra, text="Instrumentação ativa", variable=self.ativa_var,
+                        command=self._alternar).pack(side='left')
+        ttk.Button(barra, text="Zerar", command=instrumentacao.zerar,
+                   style='Info.TButton').pack(side='left', padx=5)
+        ttk.Button(barra, text="🔬 Perfilar operação...", command=self._perfilar,
+                   style='Info.TButton').pack(side='left', padx=5)
+
+        self.texto = tk.Text(self, font=('Courier', 9), wrap='none')
+        self.texto.pack(fill='both', expand=True)
+        self._atualizar()
+
+    def _resumo_caches(self):
+        linhas = ["CACHE DE CONSULTAS"]
+        for nome, estante in (("leitura (interface)", self.app.leitor), ("trabalhador", self.app.estante)):
+            dados = estante.cache.estatisticas()
+            linhas.append(f"  {nome}: {dados['acertos']} acerto(s), {dados['falhas']} falha(s) "
+                          f"({dados['taxa_acerto']:.0%}), {dados['entradas']} entrada(s), "
+                          f"{dados['bytes'] // 1024} de {dados['orcamento_bytes'] // 1024} KB")
+        return '\n'.join(linhas)
+
+    def _alternar(self):
+        if self.ativa_var.get():
+            instrumentacao.ativar()
+        else:
+            instrumentacao.desativar()
+
+    def _perfilar(self):
+        operacao = simpledialog.askstring(
+            "Perfilar", "Operação (ex.: Estante.sincronizar_com_db ou EstanteApp._executar_busca):",
+            parent=self)
+        if operacao:
+            self.ativa_var.set(True)
+            instrumentacao.ativar()
+            arquivo = instrumentacao.perfilar_proxima(operacao.strip())
+            messagebox.showinfo("Perfilar", f"A próxima execução será salva em '{arquivo}'.", parent=self)
+
+    def _atualizar(self):
+        if not self.winfo_exists():
+            return
+        self.texto.delete('1.0', tk.END)
+        self.texto.insert('1.0', instrumentacao.resumo(maximo=20) + '\n\n' + self._resumo_caches())
+        self.after(self.INTERVALO_MS, self._atualizar)
+
+
+# Callbacks da interface medidos quando a instrumentação estiver ligada
+instrumentacao.registrar(EstanteApp, (
+    '_exibir_primeira_tela', '_carregar_dados_na_treeview', '_aplicar_diferencas', '_executar_busca',
+    '_importar_arquivo', '_remover_item_selecionado', '_exibir_detalhes', '_salvar_novo_item',
+))
+instrumentacao.registrar(ListaVirtual, ('renderizar', 'invalidar'))
 
 
 # --- 3. EXECUÇÃO PRINCIPAL ---
 if __name__ == "__main__":
-    app = EstanteApp()
+    # ESTANTE_INSTRUMENTACAO=1 liga as medições desde a abertura (veja instrumentacao.py)
+    instrumentacao.ativar_pelo_ambiente()
+    # Outras estantes no seletor: python gui_estante_virtual.py livros.db hqs.db
+    # Só consulta, sem gravar: ESTANTE_SOMENTE_LEITURA=1 (ou =imutavel, para backups)
+    app = EstanteApp(estantes=sys.argv[1:] or None)
     app.mainloop()
@@ -1,41 +1,362 @@
-import uuid
+import os
+import re
+import atexit
+import heapq
+import bisect
 import sqlite3
-from typing import List, Dict, Any, Optional
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, Callable
+
+import instrumentacao
+from constantes import TIPOS, ORDENS
+from migracoes import migrar, exigir_versao_atual, recalcular_contadores, Progresso
+from cache_consultas import CacheDeConsultas, ORCAMENTO_CACHE_PADRAO
+from duplicatas import impressao_digital
+import escrita_adiada
+from escrita_adiada import DiarioDeEscritas, Operacao, ADICIONAR, REMOVER
 
 # --- CONFIGURAÇÃO DO BANCO DE DADOS ---
 DB_NAME = 'estante_virtual.db'
 
-def setup_database():
-    """Cria a tabela 'itens' no SQLite se ela não existir."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # A coluna 'tipo' é crucial para sabermos qual classe instanciar ao carregar os dados
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS itens (
-            id TEXT PRIMARY KEY,
-            tipo TEXT NOT NULL,
-            titulo TEXT NOT NULL,
-            autor TEXT,
-            paginas INTEGER,
-            edicao TEXT,
-            mes_publicacao TEXT,
-            desenhista TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-    print(f"💾 Conexão com o banco de dados '{DB_NAME}' estabelecida.")
+# Pragmas aplicados uma única vez, quando a conexão persistente é aberta.
+# Em modo WAL, 'synchronous = NORMAL' continua seguro contra corrupção: no pior
+# caso (queda de energia) perde-se apenas a última transação confirmada.
+PRAGMAS_PADRAO: Dict[str, Any] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,   # Valores negativos são em KiB (~16 MB de cache)
+    'temp_store': 'MEMORY',
+}
+
+# --- MODO SOMENTE LEITURA (navegar sem gravar) ---
+# O arquivo é aberto com mode=ro (o SQLite recusa qualquer escrita) ou, para
+# cópias arquivadas que nunca mudam, com immutable=1 (sem bloqueios e sem
+# conferir o WAL: só serve para arquivos fechados, ex.: um backup). As
+# leituras passam pelo mmap: as páginas vêm do cache de arquivos do sistema
+# operacional, sem serem copiadas para o cache do SQLite. O valor é o limite
+# de bytes mapeados (espaço de endereços), não memória reservada.
+MMAP_SOMENTE_LEITURA = 1 << 30  # 1 GiB
+PRAGMAS_SOMENTE_LEITURA: Dict[str, Any] = {
+    'cache_size': -16000,
+    'temp_store': 'MEMORY',
+    'mmap_size': MMAP_SOMENTE_LEITURA,
+}
+
+# Se definida, os aplicativos abrem a estante somente para leitura
+# ('1' = mode=ro; 'imutavel' = immutable=1, para cópias arquivadas)
+VARIAVEL_SOMENTE_LEITURA = 'ESTANTE_SOMENTE_LEITURA'
+IMUTAVEL = 'imutavel'
+
+def abrir_conexao(db_path: str = DB_NAME, check_same_thread: bool = True,
+                  somente_leitura: bool = False, imutavel: bool = False,
+                  **pragmas: Any) -> sqlite3.Connection:
+    """Abre uma conexão de longa duração em modo WAL.
+
+    Os pragmas de PRAGMAS_PADRAO podem ser ajustados por parâmetro,
+    ex.: abrir_conexao(synchronous='FULL', cache_size=-64000).
+    check_same_thread=False permite abrir a conexão em uma thread e entregá-la
+    a outra (ex.: ao TrabalhadorDB), desde que só uma thread a use por vez.
+    somente_leitura=True abre o arquivo (que precisa existir) com mode=ro e
+    PRAGMAS_SOMENTE_LEITURA; imutavel=True, com immutable=1.
+    """
+    # isolation_level=None: o módulo sqlite3 não abre transações implícitas;
+    # elas são controladas explicitamente por Estante.transacao().
+    if somente_leitura or imutavel:
+        conn = sqlite3.connect(_uri_somente_leitura(db_path, imutavel), uri=True, isolation_level=None,
+                               check_same_thread=check_same_thread)
+        configuracao = {**PRAGMAS_SOMENTE_LEITURA, **pragmas}
+    else:
+        conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=check_same_thread)
+        configuracao = {**PRAGMAS_PADRAO, **pragmas}
+    for nome, valor in configuracao.items():
+        conn.execute(f"PRAGMA {nome} = {valor}")
+    return conn
+
+def _uri_somente_leitura(db_path: str, imutavel: bool) -> str:
+    from pathlib import Path
+    caminho = Path(db_path).resolve()
+    wal = Path(f"{caminho}-wal")
+    if imutavel and wal.exists() and wal.stat().st_size > 0:
+        # Com immutable=1 o SQLite não lê o WAL: o que só está nele fica de fora
+        print(f"\n⚠️ '{caminho.name}' tem alterações no WAL que não serão vistas no modo imutável "
+              "(use-o com cópias fechadas, ex.: 'exportacao.py backup').")
+    return caminho.as_uri() + ('?mode=ro&immutable=1' if imutavel else '?mode=ro')
+
+def modo_somente_leitura_do_ambiente() -> Tuple[bool, bool]:
+    """(somente_leitura, imutavel) pedidos por ESTANTE_SOMENTE_LEITURA."""
+    valor = os.environ.get(VARIAVEL_SOMENTE_LEITURA, '0').strip().lower()
+    if valor in ('', '0'):
+        return False, False
+    return True, valor == IMUTAVEL
+
+def caminho_do_banco(conn: sqlite3.Connection) -> str:
+    """Arquivo do banco principal da conexão ('' para bancos em memória)."""
+    for _, nome, arquivo in conn.execute("PRAGMA database_list"):
+        if nome == 'main':
+            return arquivo
+    return ''
+
+def setup_database(conn: Optional[sqlite3.Connection] = None,
+                   ao_progredir: Optional[Progresso] = None, db_path: str = DB_NAME):
+    """Cria ou atualiza o esquema do banco (veja migracoes.py).
+
+    Se uma conexão for informada ela é reaproveitada (e continua aberta);
+    caso contrário, uma conexão temporária é aberta (em 'db_path') e fechada aqui.
+    """
+    conexao_propria = conn is None
+    if conexao_propria:
+        conn = abrir_conexao(db_path)
+    else:
+        db_path = caminho_do_banco(conn) or ':memory:'
+    migrar(conn, ao_progredir)
+    if conexao_propria:
+        conn.close()
+    print(f"💾 Conexão com o banco de dados '{db_path}' estabelecida.")
+
+# Colunas da tabela 'itens', na mesma ordem de ItemDeLeitura.to_dict()
+COLUNAS_ITENS = ('id', 'tipo', 'titulo', 'autor', 'paginas', 'edicao', 'mes_publicacao', 'desenhista')
+SQL_INSERIR_ITEM = "INSERT INTO itens VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+SQL_INSERIR_IMPRESSAO = "INSERT INTO impressoes(item_id, impressao) VALUES (?, ?)"
+
+# --- FILTROS (sobre os índices secundários criados em migracoes.py) ---
+# Autor e título são comparados pela versão em minúsculas, como nos índices.
+# (O lower() do SQLite só converte letras ASCII: "É" e "é" continuam diferentes.)
+_MINUSCULAS_ASCII = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+# Expressões exatamente iguais às dos índices da migração 7 (o autor pode ser NULL)
+EXPRESSOES_TEXTO = {'autor': "ifnull(lower(itens.autor), '')", 'titulo': "lower(itens.titulo)"}
+
+def _limite_superior_prefixo(prefixo: str) -> str:
+    """Menor texto maior que todos os que começam com 'prefixo' ('ab' -> 'ac')."""
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+def condicoes_do_filtro(tipo: Optional[str] = None, autor: Optional[str] = None,
+                        titulo: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """Monta o trecho WHERE (sem a palavra WHERE) e os parâmetros de um filtro.
+
+    'tipo' é o nome da classe ('Livro', 'Revista', 'HQ'); 'autor' e 'titulo'
+    são prefixos, sem diferenciar maiúsculas. Critérios vazios são ignorados
+    e, sem nenhum critério, o trecho é '1' (todas as linhas). Cada condição
+    é uma faixa sobre um dos índices secundários.
+    """
+    tipo, autor, titulo = _normalizar_filtro(tipo, autor, titulo)
+    condicoes: List[str] = []
+    parametros: List[Any] = []
+    if tipo:
+        condicoes.append("itens.tipo = ?")
+        parametros.append(tipo)
+    for coluna, prefixo in (('autor', autor), ('titulo', titulo)):
+        if prefixo:
+            expressao = EXPRESSOES_TEXTO[coluna]
+            condicoes.append(f"{expressao} >= ? AND {expressao} < ?")
+            parametros += [prefixo, _limite_superior_prefixo(prefixo)]
+    return (' AND '.join(condicoes) or '1'), parametros
+
+def _normalizar_filtro(tipo: Optional[str], autor: Optional[str],
+                       titulo: Optional[str]) -> Tuple[Optional[str], str, str]:
+    return (tipo or None,
+            (autor or '').strip().translate(_MINUSCULAS_ASCII),
+            (titulo or '').strip().translate(_MINUSCULAS_ASCII))
+
+def item_atende_filtro(item: 'ItemDeLeitura', tipo: Optional[str] = None, autor: Optional[str] = None,
+                       titulo: Optional[str] = None) -> bool:
+    """O mesmo teste de condicoes_do_filtro(), feito em Python sobre um item."""
+    tipo, autor, titulo = _normalizar_filtro(tipo, autor, titulo)
+    if tipo and item.__class__.__name__ != tipo:
+        return False
+    return ((item.autor or '').translate(_MINUSCULAS_ASCII).startswith(autor)
+            and (item.titulo or '').translate(_MINUSCULAS_ASCII).startswith(titulo))
+
+# --- BUSCA TEXTUAL (FTS5) ---
+# Índice de texto completo sobre titulo/autor/desenhista. É uma tabela de
+# "conteúdo externo": o texto não é duplicado, o índice aponta para o rowid
+# de 'itens' e é mantido em sincronia por gatilhos (criados em migracoes.py).
+# (Após um VACUUM os rowids podem mudar: use Estante.reconstruir_indice_busca().)
+COLUNAS_BUSCA = ('titulo', 'autor', 'desenhista')
+
+# --- ORDENAÇÃO (cabeçalhos clicáveis da GUI) ---
+# Chave de cada ordenação (na ordem de ORDENS), sempre terminando no id: itens
+# com o mesmo tipo, título ou autor ficam numa ordem estável. Cada chave é a de
+# um índice (migração 2), então o ORDER BY percorre o índice em vez de ordenar
+# a tabela, e a chave serve de âncora no keyset.
+CHAVES_DE_ORDENACAO = dict(zip(ORDENS, (
+    ('itens.id',),
+    ('itens.tipo', 'itens.id'),
+    (EXPRESSOES_TEXTO['titulo'], 'itens.id'),
+    (EXPRESSOES_TEXTO['autor'], EXPRESSOES_TEXTO['titulo'], 'itens.id'),
+)))
+
+def ordenacao_sql(ordem: str = 'id', decrescente: bool = False) -> Tuple[Tuple[str, ...], str]:
+    """Colunas da chave de 'ordem' e o trecho ORDER BY correspondente (sem 'ORDER BY')."""
+    if ordem not in CHAVES_DE_ORDENACAO:
+        raise ValueError(f"Ordenação desconhecida: '{ordem}'. Use uma de: {', '.join(CHAVES_DE_ORDENACAO)}.")
+    chave = CHAVES_DE_ORDENACAO[ordem]
+    direcao = ' DESC' if decrescente else ''
+    return chave, ', '.join(coluna + direcao for coluna in chave)
+
+def condicao_apos_chave(chave: Tuple[str, ...], valores: Iterable[Any],
+                        decrescente: bool = False) -> Tuple[str, List[Any]]:
+    """Trecho WHERE (sem a palavra WHERE) das linhas que vêm DEPOIS de 'valores'
+    na ordem de 'chave' (colunas de ordenacao_sql): a continuação de uma página.
+    """
+    valores = list(valores)
+    if len(valores) != len(chave):
+        raise ValueError(f"A chave de continuação deve ter {len(chave)} valor(es).")
+    depois_de = '<' if decrescente else '>'
+    trecho = f"({', '.join(chave)}) {depois_de} ({', '.join('?' * len(chave))})"
+    # Como no PaginadorKeyset: o row value não usa índices de expressões, então
+    # a primeira expressão (título, autor) também é limitada sozinha
+    if chave[0] in EXPRESSOES_TEXTO.values():
+        return f"{chave[0]} {depois_de}= ? AND {trecho}", [valores[0], *valores]
+    return trecho, valores
+
+def _consulta_fts(termo: str, colunas: Tuple[str, ...] = COLUNAS_BUSCA) -> str:
+    """Converte o texto digitado em uma consulta FTS5 segura.
+
+    Cada palavra vira um prefixo entre aspas ("sand"* encontra "Sandman") e
+    todas precisam aparecer. Retorna '' se não houver nada para buscar.
+    """
+    palavras = ['"' + palavra.replace('"', '""') + '"*' for palavra in termo.split()]
+    if not palavras:
+        return ''
+    consulta = ' '.join(palavras)
+    if tuple(colunas) != COLUNAS_BUSCA:
+        consulta = '{' + ' '.join(colunas) + '} : (' + consulta + ')'
+    return consulta
+
+# Letras que o FTS5 (remove_diacritics) simplifica mas a decomposição Unicode não
+_LETRAS_SEM_DECOMPOSICAO = str.maketrans('øđłħŧı', 'odlhti')
+
+def _dobrar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos, aproximando o tokenizador do FTS5."""
+    if texto.isascii():
+        return texto.lower()
+    decomposto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).translate(_LETRAS_SEM_DECOMPOSICAO)
+
+def item_pode_atender_busca(item: 'ItemDeLeitura', termo: str,
+                            colunas: Tuple[str, ...] = COLUNAS_BUSCA) -> bool:
+    """Teste conservador: False só quando o item CERTAMENTE não aparece na busca.
+
+    Usado para decidir quais resultados guardados em cache uma inserção afeta.
+    Cada pedaço de cada palavra precisa aparecer no texto (a busca exige
+    início de palavra, o que só restringe mais).
+    """
+    dados = item.to_dict()
+    texto = _dobrar_texto(' '.join(str(dados.get(coluna) or '') for coluna in colunas))
+    return all(pedaco in texto
+               for palavra in termo.split()
+               for pedaco in re.findall(r'[^\W_]+', _dobrar_texto(palavra)))
+
+# --- BUSCA APROXIMADA (TRIGRAMAS) ---
+# Encontra "Sandman" digitando "Sandmn". O índice itens_trigramas (migração 5)
+# devolve candidatos que compartilham trigramas RAROS com a consulta; só os
+# LIMITE_CANDIDATOS que compartilham mais trigramas recebem a nota de similaridade.
+SIMILARIDADE_MINIMA = 0.3
+LIMITE_CANDIDATOS = 500
+LIMITE_LEITURAS_TRIGRAMAS = 50000  # linhas lidas das listas de trigramas, por busca
+
+@lru_cache(maxsize=65536)
+def _trigramas(palavra: str) -> frozenset:
+    """Trigramas de uma palavra já dobrada, com as bordas marcadas (como no pg_trgm)."""
+    marcada = f"  {palavra} "
+    return frozenset(marcada[i:i + 3] for i in range(len(marcada) - 2))
+
+def _palavras(texto: str) -> List[str]:
+    return re.findall(r'[^\W_]+', _dobrar_texto(texto))
+
+def _nota(procurados: List[frozenset], texto: str) -> float:
+    trigramas_texto = [_trigramas(palavra) for palavra in set(_palavras(texto))]
+    if not procurados or not trigramas_texto:
+        return 0.0
+    soma = 0.0
+    for trigramas in procurados:
+        soma += max(len(trigramas & outros) / len(trigramas | outros) for outros in trigramas_texto)
+    return soma / len(procurados)
+
+def similaridade(termo: str, texto: str) -> float:
+    """Nota de 0 a 1: para cada palavra do termo, a palavra mais parecida do
+    texto (Jaccard dos trigramas); a nota é a média entre as palavras do termo."""
+    return _nota([_trigramas(palavra) for palavra in _palavras(termo)], texto)
+
+def _trigramas_da_consulta(conn: sqlite3.Connection, termo: str) -> List[Tuple[str, int]]:
+    """Trigramas de 'termo' usados para achar candidatos, com o número de linhas
+    em que cada um aparece, do mais raro para o mais comum.
+
+    Com até E erros de digitação, no máximo 3*E trigramas de uma palavra se
+    perdem; escolhendo os 3*E + 1 mais raros, pelo menos um deles está na
+    palavra certa, e os raros trazem poucos candidatos.
+    """
+    escolhidos: Dict[str, int] = {}
+    for palavra in re.findall(r'[^\W_]+', termo.lower()):
+        trigramas = {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+        if not trigramas:
+            continue  # Palavras com menos de 3 letras não estão no índice
+        marcadores = ', '.join('?' * len(trigramas))
+        frequencia = dict(conn.execute(
+            f"SELECT term, doc FROM itens_trigramas_termos WHERE term IN ({marcadores})", tuple(trigramas)))
+        erros = 1 if len(palavra) <= 6 else 2
+        for trigrama in sorted(trigramas, key=lambda t: frequencia.get(t, 0))[:3 * erros + 1]:
+            # Trigramas que não aparecem em nenhuma linha não trazem candidatos
+            if frequencia.get(trigrama):
+                escolhidos[trigrama] = frequencia[trigrama]
+    return sorted(escolhidos.items(), key=lambda par: par[1])
 
 # 1. CLASSE MÃE/BASE
 class ItemDeLeitura:
-    """Classe base para todos os itens de leitura (Livro, Revista, HQ)."""
+    """Classe base para todos os itens de leitura (Livro, Revista, HQ).
+
+    Usa __slots__ (sem __dict__ por objeto) para que coleções muito grandes
+    ocupem pouca memória. Itens carregados pela Estante podem chegar só com
+    id/título/autor: os campos específicos do tipo são buscados no DB na
+    primeira vez em que forem acessados (ex.: em detalhes()).
+    """
+
+    __slots__ = ('id', 'titulo', 'autor', '_fonte')
+
+    # Atributos particulares de cada subclasse (também são colunas de 'itens')
+    CAMPOS_ESPECIFICOS: Tuple[str, ...] = ()
     
     def __init__(self, titulo: str, autor: str, item_id: Optional[str] = None):
         # Se um ID for fornecido (carregamento do DB), usa-o. Senão, gera um novo.
-        self.id = item_id if item_id else uuid.uuid4().hex
+        if not item_id:
+            # uuid só é importado aqui: ele carrega o módulo platform, e abrir a
+            # estante (ex.: linha_de_comando.py) não precisa pagar por isso
+            import uuid
+            item_id = uuid.uuid4().hex
+        self.id = item_id
         self.titulo = titulo
         self.autor = autor
+        self._fonte = None
+
+    @classmethod
+    def _parcial(cls, item_id: str, titulo: str, autor: str,
+                 fonte: Callable[[str, Tuple[str, ...]], tuple]) -> 'ItemDeLeitura':
+        """Cria o item sem os campos específicos; 'fonte(id, campos)' os busca depois."""
+        item = cls.__new__(cls)
+        item.id = item_id
+        item.titulo = titulo
+        item.autor = autor
+        item._fonte = fonte
+        return item
+
+    @property
+    def hidratado(self) -> bool:
+        """Indica se os campos específicos já estão na memória."""
+        return self._fonte is None
+
+    def __getattr__(self, nome: str) -> Any:
+        # Só é chamado quando o atributo não existe, ou seja, quando um campo
+        # específico ainda não foi carregado do DB.
+        if nome in type(self).CAMPOS_ESPECIFICOS and self._fonte is not None:
+            valores = self._fonte(self.id, self.CAMPOS_ESPECIFICOS)
+            for campo, valor in zip(self.CAMPOS_ESPECIFICOS, valores):
+                setattr(self, campo, valor)
+            self._fonte = None
+            return getattr(self, nome)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{nome}'")
     
     def __str__(self) -> str:
         return f"ID: {self.id[:6]}... - Título: {self.titulo} - Autor: {self.autor}"
@@ -60,6 +381,9 @@ class ItemDeLeitura:
 # 2. CLASSES FILHAS (HERANÇA)
 class Livro(ItemDeLeitura):
     """Classe para Livros, com atributo particular 'paginas'."""
+
+    __slots__ = ('paginas',)
+    CAMPOS_ESPECIFICOS = ('paginas',)
     
     def __init__(self, titulo: str, autor: str, paginas: int, item_id: Optional[str] = None):
         super().__init__(titulo, autor, item_id)
@@ -76,6 +400,9 @@ class Livro(ItemDeLeitura):
         
 class Revista(ItemDeLeitura):
     """Classe para Revistas, com atributos particulares 'edicao' e 'mes_publicacao'."""
+
+    __slots__ = ('edicao', 'mes_publicacao')
+    CAMPOS_ESPECIFICOS = ('edicao', 'mes_publicacao')
     
     def __init__(self, titulo: str, autor: str, edicao: str, mes_publicacao: str, item_id: Optional[str] = None):
         super().__init__(titulo, autor, item_id)
@@ -94,6 +421,9 @@ class Revista(ItemDeLeitura):
 
 class HQ(ItemDeLeitura):
     """Classe para Histórias em Quadrinhos, com atributo particular 'desenhista'."""
+
+    __slots__ = ('desenhista',)
+    CAMPOS_ESPECIFICOS = ('desenhista',)
     
     def __init__(self, titulo: str, autor: str, desenhista: str, item_id: Optional[str] = None):
         super().__init__(titulo, autor, item_id)
@@ -108,135 +438,1212 @@ class HQ(ItemDeLeitura):
         data['desenhista'] = self.desenhista
         return data
 
+# 2.1 CRIAÇÃO E VALIDAÇÃO DE ITENS (usada pela GUI e pela importação em lote)
+TIPOS_DE_ITEM = dict(zip(TIPOS, (Livro, Revista, HQ)))
+
+def criar_item(dados: Dict[str, Any]) -> ItemDeLeitura:
+    """Valida um dicionário com os campos de to_dict() e cria o item do tipo certo.
+
+    O campo 'id' é opcional (um novo é gerado se faltar). Lança ValueError
+    com uma mensagem legível quando algum campo obrigatório é inválido.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError("Registro inválido (esperado um objeto com os campos do item).")
+
+    def texto(campo: str) -> str:
+        valor = dados.get(campo)
+        return '' if valor is None else str(valor).strip()
+
+    tipo = texto('tipo')
+    titulo = texto('titulo')
+    autor = texto('autor')
+    item_id = texto('id') or None
+
+    if tipo not in TIPOS_DE_ITEM:
+        raise ValueError(f"Tipo de item desconhecido: '{tipo}' (use Livro, Revista ou HQ).")
+    if not titulo or not autor:
+        raise ValueError("Título e Autor são obrigatórios.")
+
+    if tipo == 'Livro':
+        try:
+            paginas = int(texto('paginas'))
+        except ValueError:
+            paginas = 0
+        if paginas <= 0:
+            raise ValueError("O número de páginas deve ser um valor inteiro positivo.")
+        return Livro(titulo, autor, paginas, item_id)
+
+    elif tipo == 'Revista':
+        edicao = texto('edicao')
+        mes_publicacao = texto('mes_publicacao')
+        if not edicao or not mes_publicacao:
+            raise ValueError("Edição e Mês são obrigatórios para Revistas.")
+        return Revista(titulo, autor, edicao, mes_publicacao, item_id)
+
+    desenhista = texto('desenhista')
+    if not desenhista:
+        raise ValueError("Desenhista é obrigatório para HQs.")
+    return HQ(titulo, autor, desenhista, item_id)
+
+class ResultadoImportacao:
+    """Resumo de uma importação em lote (também enviado a cada lote como progresso)."""
+
+    # Guarda só os primeiros erros para a memória não crescer em arquivos muito ruins
+    LIMITE_ERROS_REGISTRADOS = 1000
+
+    def __init__(self):
+        self.processados = 0
+        self.importados = 0
+        self.total_erros = 0
+        self.erros: List[Tuple[int, str]] = []
+        # Registros ignorados por já existirem na estante (ou repetidos no arquivo)
+        self.duplicados = 0
+        # True se a importação foi interrompida antes do fim (ex.: cancelada)
+        self.interrompido = False
+        # IDs gravados, na ordem do arquivo (só com importar_em_lote(guardar_ids=True))
+        self.ids_importados: List[str] = []
+
+    def registrar_erro(self, numero: int, mensagem: str) -> None:
+        self.total_erros += 1
+        if len(self.erros) < self.LIMITE_ERROS_REGISTRADOS:
+            self.erros.append((numero, mensagem))
+
+
+# Ordem de calendário para as revistas por mês (meses fora da lista vêm depois, em ordem alfabética)
+MESES = ('janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho', 'julho',
+         'agosto', 'setembro', 'outubro', 'novembro', 'dezembro')
+
+def _ordem_do_mes(mes: str) -> Tuple[int, str]:
+    chave = mes.strip().lower()
+    if chave in MESES:
+        return MESES.index(chave), chave
+    if chave.isdigit() and 1 <= int(chave) <= 12:
+        return int(chave) - 1, chave
+    return len(MESES), chave
+
+
+class EstatisticasEstante:
+    """Números da coleção, lidos da tabela 'contadores' (ver migracoes.py)."""
+
+    def __init__(self):
+        self.por_tipo: Dict[str, int] = {}
+        self.principais_autores: List[Tuple[str, int]] = []
+        self.principais_desenhistas: List[Tuple[str, int]] = []
+        self.total_paginas_livros = 0
+        self.revistas_por_mes: List[Tuple[str, int]] = []
+
+    @property
+    def total(self) -> int:
+        return sum(self.por_tipo.values())
+
+    @property
+    def media_paginas_livros(self) -> float:
+        livros = self.por_tipo.get('Livro', 0)
+        return self.total_paginas_livros / livros if livros else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'por_tipo': dict(self.por_tipo),
+            'principais_autores': [list(par) for par in self.principais_autores],
+            'principais_desenhistas': [list(par) for par in self.principais_desenhistas],
+            'total_paginas_livros': self.total_paginas_livros,
+            'media_paginas_livros': round(self.media_paginas_livros, 1),
+            'revistas_por_mes': [list(par) for par in self.revistas_por_mes],
+        }
+
+# --- REGISTRO DE ALTERAÇÕES (tabela 'alteracoes', migração 8) ---
+# Acima deste número de alterações não vistas, reler a tabela inteira sai
+# mais barato que aplicá-las uma a uma (ex.: outro programa importou um arquivo)
+LIMITE_ALTERACOES_INCREMENTAIS = 5000
+# O registro guarda só as alterações mais recentes; quem ficou para trás
+# além disso (sequência já podada) faz uma sincronização completa
+MAXIMO_ALTERACOES = 50000
+
 # 3. CLASSE DE GERENCIAMENTO (ESTANTE) COM PERSISTÊNCIA DE DADOS
 class Estante:
     """Gerencia a coleção de itens de leitura, com persistência em SQLite."""
     
-    def __init__(self):
-        self.itens: List[ItemDeLeitura] = []
-        self._carregar_itens_db()
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, carregar: bool = True,
+                 orcamento_cache: int = ORCAMENTO_CACHE_PADRAO, escrita_adiada: bool = False,
+                 db_path: Optional[str] = None, somente_leitura: bool = False, imutavel: bool = False):
+        # A Estante mantém UMA conexão aberta durante toda a sua vida útil
+        # (e passa a ser dona da conexão recebida: fechar() a encerra).
+        # Sem conexão, abre (e atualiza o esquema de) 'db_path', ou DB_NAME.
+        # somente_leitura=True (imutavel=True para cópias arquivadas): a conexão
+        # é aberta com mode=ro e mmap (a recebida deve ter sido aberta assim);
+        # nada é gravado nem carregado na memória: listas e buscas vêm de cursores.
+        self.somente_leitura = somente_leitura or imutavel
+        if self.somente_leitura:
+            carregar = escrita_adiada = False
+        if conn is None:
+            conn = abrir_conexao(db_path or DB_NAME, somente_leitura=self.somente_leitura, imutavel=imutavel)
+            if not self.somente_leitura:
+                migrar(conn)
+        if self.somente_leitura:
+            exigir_versao_atual(conn)
+        self._conn = conn
+        self.db_path = caminho_do_banco(conn)
+        # Resultados recentes de buscas e filtros (veja cache_consultas.py)
+        self.cache = CacheDeConsultas(lambda: self._get_db_connection(), orcamento_cache)
+        self._profundidade_transacao = 0
+        # Alterações pendentes (escrita adiada) e histórico de desfazer/refazer
+        # (veja escrita_adiada.py); o grupo é a transação que acumula as pendentes
+        self.diario = DiarioDeEscritas(adiado=escrita_adiada)
+        self._grupo_aberto = False
+        if escrita_adiada:
+            atexit.register(self.fechar)
+        # Última sequência do registro de alterações já aplicada à memória e o
+        # último PRAGMA data_version visto (muda quando OUTRA conexão grava)
+        self._ultima_alteracao = self._sequencia_atual()
+        self._versao_dados = self._get_db_connection().execute("PRAGMA data_version").fetchone()[0]
+        # Indica que a memória mudou dentro de uma transação ainda não confirmada
+        self._memoria_pendente = False
+        # Índices em memória: hash por ID completo (também guarda a ordem de
+        # carregamento) e lista ordenada de IDs para buscas por prefixo
+        self._itens_por_id: Dict[str, ItemDeLeitura] = {}
+        self._ids_ordenados: Optional[List[str]] = None
+        # Um "balde" por tipo (nome da classe -> {id: item}), na mesma ordem
+        self._itens_por_tipo: Dict[str, Dict[str, ItemDeLeitura]] = {tipo: {} for tipo in TIPOS_DE_ITEM}
+        # carregar=False: nada é trazido para a memória (ex.: lista virtual da GUI)
+        self._itens_em_memoria = carregar
+        if carregar:
+            self._carregar_itens_db()
         
-    def _get_db_connection(self):
-        """Método utilitário para conectar ao DB."""
-        return sqlite3.connect(DB_NAME)
+    @property
+    def itens(self) -> List[ItemDeLeitura]:
+        """Itens em memória, na ordem em que foram carregados/adicionados."""
+        return list(self._itens_por_id.values())
+
+    def _indexar(self, item: ItemDeLeitura) -> None:
+        self._itens_por_id[item.id] = item
+        self._itens_por_tipo[item.__class__.__name__][item.id] = item
+        if self._ids_ordenados is not None:
+            bisect.insort(self._ids_ordenados, item.id)
+
+    def _desindexar(self, item_id: str) -> None:
+        item = self._itens_por_id.pop(item_id, None)
+        if item is None:
+            return
+        self._itens_por_tipo[item.__class__.__name__].pop(item_id, None)
+        if self._ids_ordenados is not None:
+            posicao = bisect.bisect_left(self._ids_ordenados, item_id)
+            if posicao < len(self._ids_ordenados) and self._ids_ordenados[posicao] == item_id:
+                del self._ids_ordenados[posicao]
+
+    def _substituir_no_indice(self, item: ItemDeLeitura) -> None:
+        """Troca um item já indexado pela versão nova, mantendo a posição original."""
+        anterior = self._itens_por_id[item.id]
+        self._itens_por_id[item.id] = item
+        tipo_anterior, tipo = anterior.__class__.__name__, item.__class__.__name__
+        if tipo != tipo_anterior:
+            self._itens_por_tipo[tipo_anterior].pop(item.id, None)
+        self._itens_por_tipo[tipo][item.id] = item
 
-    def _carregar_itens_db(self) -> None:
-        """Carrega todos os itens do banco de dados para a memória."""
+    def _get_db_connection(self) -> sqlite3.Connection:
+        """Método utilitário que devolve a conexão persistente da estante."""
+        return self._conn
+
+    def _recusar_escrita(self) -> bool:
+        if self.somente_leitura:
+            print("\n⚠️ A estante foi aberta somente para leitura: nada foi alterado.")
+        return self.somente_leitura
+
+    @contextmanager
+    def transacao(self) -> Iterator[sqlite3.Connection]:
+        """Agrupa várias operações em uma única transação (um único commit).
+
+        Pode ser aninhada: blocos internos viram SAVEPOINTs da transação
+        mais externa, e só ela faz o commit de fato.
+
+            with estante.transacao():
+                estante.adicionar_item(livro)
+                estante.adicionar_item(revista)
+        """
         conn = self._get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM itens")
-        registros = cursor.fetchall()
-        conn.close()
+        nivel = self._profundidade_transacao
+        if nivel == 0:
+            conn.execute("BEGIN")
+        else:
+            conn.execute(f"SAVEPOINT sp_{nivel}")
+        self._profundidade_transacao += 1
+        try:
+            yield conn
+        except BaseException:
+            self._profundidade_transacao -= 1
+            if nivel == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO sp_{nivel}")
+                conn.execute(f"RELEASE sp_{nivel}")
+            # A memória (e o cache) pode ter recebido alterações desfeitas no DB
+            self.cache.limpar()
+            if self._memoria_pendente and self._itens_em_memoria:
+                self._carregar_itens_db()
+            elif self._memoria_pendente:
+                # Sem carga completa (carregar=False), a memória só guarda o que
+                # foi gravado por esta estante: basta esquecê-lo (o DB é a referência)
+                self._itens_por_id.clear()
+                for balde in self._itens_por_tipo.values():
+                    balde.clear()
+                self._ids_ordenados = None
+            if nivel == 0:
+                self._memoria_pendente = False
+            raise
+        else:
+            self._profundidade_transacao -= 1
+            if nivel == 0:
+                conn.execute("COMMIT")
+                self._memoria_pendente = False
+                self.diario.marcar_confirmado()
+            else:
+                conn.execute(f"RELEASE sp_{nivel}")
+
+    def fechar(self) -> None:
+        """Grava as alterações pendentes e fecha a conexão (o SQLite faz o checkpoint do WAL)."""
+        if self._conn is not None:
+            self.descarregar()
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.fechar)
+
+    # --- Escrita adiada (veja escrita_adiada.py) ---
+    def _abrir_grupo(self) -> None:
+        """Com escrita adiada, abre a transação que acumula as próximas alterações."""
+        if self.diario.adiado and self._profundidade_transacao == 0:
+            self._get_db_connection().execute("BEGIN IMMEDIATE")
+            self._profundidade_transacao = 1
+            self._grupo_aberto = True
+
+    def _depois_da_escrita(self) -> None:
+        # Um grupo sem nada pendente não segura o bloqueio de escrita à toa
+        if self._grupo_aberto and (not self.diario.pendentes or self.diario.precisa_descarregar()):
+            self.descarregar()
+
+    def descarregar(self) -> int:
+        """Confirma (um único COMMIT) as alterações pendentes. Retorna quantas eram.
+
+        Dentro de um bloco transacao() o grupo só pode ser confirmado depois
+        que o bloco terminar: nesse caso nada é feito aqui.
+        """
+        if not self._grupo_aberto or self._profundidade_transacao != 1:
+            return 0
+        conn = self._get_db_connection()
+        self._profundidade_transacao = 0
+        self._grupo_aberto = False
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            perdidas = self.diario.descartar_pendentes()
+            self.cache.limpar()
+            if self._itens_em_memoria:
+                self._carregar_itens_db()
+            self._memoria_pendente = False
+            print(f"\n❌ ERRO ao gravar {len(perdidas)} alteração(ões) pendente(s): {e}")
+            return 0
+        self._memoria_pendente = False
+        return len(self.diario.marcar_confirmado())
 
-        self.itens = []
+    def descarregar_se_vencido(self) -> int:
+        """Confirma as pendentes se o prazo (ou o limite) do grupo foi atingido.
+
+        Para ser chamado periodicamente pela aplicação (temporizador da GUI,
+        laço do menu), já que a Estante não tem thread própria.
+        """
+        if self._grupo_aberto and self.diario.precisa_descarregar():
+            return self.descarregar()
+        return 0
+
+    # --- Desfazer / refazer (também sem escrita adiada) ---
+    def desfazer(self) -> Optional[Tuple[str, ItemDeLeitura]]:
+        """Desfaz a última adição ou remoção. Retorna (operação aplicada, item), ou None."""
+        operacao = self.diario.proxima_a_desfazer()
+        if operacao is None:
+            print("\n⚠️ Nada para desfazer.")
+            return None
+        efeito = self._aplicar_operacao(operacao.inversa())
+        if efeito is not None:
+            self.diario.guardar_desfeita(operacao)
+        return efeito
+
+    def refazer(self) -> Optional[Tuple[str, ItemDeLeitura]]:
+        """Refaz a última operação desfeita. Retorna (operação aplicada, item), ou None."""
+        operacao = self.diario.proxima_a_refazer()
+        if operacao is None:
+            print("\n⚠️ Nada para refazer.")
+            return None
+        efeito = self._aplicar_operacao(operacao)
+        if efeito is not None:
+            self.diario.guardar_refeita(operacao)
+        return efeito
+
+    def _aplicar_operacao(self, operacao: Operacao) -> Optional[Tuple[str, ItemDeLeitura]]:
+        # O item volta com o mesmo ID (criar_item respeita o campo 'id')
+        item = criar_item(operacao.dados)
+        with self.diario.sem_historico():
+            if operacao.tipo == ADICIONAR:
+                aplicada = self.adicionar_item(item, permitir_duplicata=True)
+            else:
+                aplicada = bool(self.remover_item(item.id))
+        return (operacao.tipo, item) if aplicada else None
+
+    def __enter__(self) -> 'Estante':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.fechar()
+
+    @staticmethod
+    def _item_de_registro(registro: tuple) -> Optional[ItemDeLeitura]:
+        """Recria o objeto correspondente a uma linha completa da tabela 'itens'."""
+        item_id, tipo, titulo, autor, paginas, edicao, mes_publicacao, desenhista = registro
         
+        # Recria a instância da classe correta (Polimorfismo e Herança)
+        if tipo == 'Livro':
+            return Livro(titulo, autor, paginas, item_id)
+        elif tipo == 'Revista':
+            return Revista(titulo, autor, edicao, mes_publicacao, item_id)
+        elif tipo == 'HQ':
+            return HQ(titulo, autor, desenhista, item_id)
+        return None # Ignora tipo desconhecido
+
+    def _carregar_campos_especificos(self, item_id: str, campos: Tuple[str, ...]) -> tuple:
+        """Busca no DB os campos específicos de um item carregado parcialmente."""
+        registro = self._get_db_connection().execute(
+            f"SELECT {', '.join(campos)} FROM itens WHERE id = ?", (item_id,)).fetchone()
+        return registro if registro else (None,) * len(campos)
+
+    def _carregar_itens_db(self, ao_carregar_bloco: Optional[Callable[[List[ItemDeLeitura]], None]] = None,
+                           tamanho_bloco: int = 5000) -> None:
+        """Carrega todos os itens do banco de dados para a memória.
+
+        Só id/tipo/título/autor são lidos agora, direto das tuplas do cursor;
+        os campos específicos de cada tipo são buscados sob demanda. Se
+        'ao_carregar_bloco' for informado, ele recebe cada bloco assim que
+        é lido (ex.: para a GUI ir preenchendo a tabela aos poucos).
+        """
+        self._itens_em_memoria = True
+        # Alterações anotadas depois deste ponto serão conferidas de novo (sem efeito se já lidas)
+        self._ultima_alteracao = self._sequencia_atual()
+        cursor = self._get_db_connection().execute(
+            "SELECT id, tipo, titulo, autor FROM itens ORDER BY rowid")
+        fonte = self._carregar_campos_especificos  # um único objeto compartilhado por todos os itens
+        # Autores se repetem muito: cada nome fica uma única vez na memória
+        autores: Dict[str, str] = {}
+        carregados: Dict[str, ItemDeLeitura] = {}
+        por_tipo: Dict[str, Dict[str, ItemDeLeitura]] = {tipo: {} for tipo in TIPOS_DE_ITEM}
+
+        while True:
+            registros = cursor.fetchmany(tamanho_bloco)
+            if not registros:
+                break
+            bloco = [
+                TIPOS_DE_ITEM[tipo]._parcial(item_id, titulo, autores.setdefault(autor, autor), fonte)
+                for item_id, tipo, titulo, autor in registros
+                if tipo in TIPOS_DE_ITEM  # Ignora tipo desconhecido
+            ]
+            carregados.update((item.id, item) for item in bloco)
+            for item in bloco:
+                por_tipo[item.__class__.__name__][item.id] = item
+            if ao_carregar_bloco:
+                ao_carregar_bloco(bloco)
+
+        # Recria os índices (a lista ordenada de IDs só é montada quando for usada)
+        self._itens_por_id = carregados
+        self._itens_por_tipo = por_tipo
+        self._ids_ordenados = None
+
+        print(f"\n📦 {len(self._itens_por_id)} itens carregados do banco de dados.")
+
+    def primeiras_linhas(self, quantidade: int) -> List[tuple]:
+        """(id, tipo, titulo, autor) das primeiras linhas, na ordem de _carregar_itens_db.
+
+        Consulta barata (lê só o começo da tabela), usada para a GUI mostrar a
+        primeira tela antes de a carga completa terminar.
+        """
+        return self._get_db_connection().execute(
+            "SELECT id, tipo, titulo, autor FROM itens ORDER BY rowid LIMIT ?", (quantidade,)).fetchall()
+
+    def iterar_itens_db(self, tamanho_bloco: int = 1000) -> Iterator[ItemDeLeitura]:
+        """Percorre todos os itens direto do DB, sem guardá-los em self.itens.
+
+        As linhas são lidas em blocos do cursor, então a memória usada é
+        constante mesmo em bancos de vários GB.
+        """
+        cursor = self._get_db_connection().execute("SELECT * FROM itens")
+        try:
+            while True:
+                registros = cursor.fetchmany(tamanho_bloco)
+                if not registros:
+                    break
+                for registro in registros:
+                    try:
+                        item = self._item_de_registro(registro)
+                    except Exception as e:
+                        print(f"Erro ao carregar item ID {registro[0]}: {e}")
+                        continue
+                    if item is not None:
+                        yield item
+        finally:
+            cursor.close()
+
+    def contar_itens(self, limite: Optional[int] = None) -> int:
+        """Conta os itens direto no DB, sem carregá-los.
+
+        Com 'limite', para de contar ao atingi-lo (custo limitado, útil para
+        decisões como "a estante tem mais de N itens?").
+        """
+        if limite is None:
+            return self._get_db_connection().execute("SELECT COUNT(*) FROM itens").fetchone()[0]
+        return self._get_db_connection().execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM itens LIMIT ?)", (limite,)).fetchone()[0]
+
+    def obter_item(self, item_id: str) -> Optional[ItemDeLeitura]:
+        """Busca um item pelo ID completo: O(1) na memória, ou pela chave primária."""
+        item = self._itens_por_id.get(item_id)
+        if item is None and not self._itens_em_memoria:
+            item = self.carregar_item_db(item_id)
+        return item
+
+    def resolver_prefixo(self, prefixo: str, limite: int = 2) -> List[str]:
+        """Retorna até 'limite' IDs completos que começam com 'prefixo' (ID curto).
+
+        Com os itens em memória usa a lista ordenada de IDs (busca binária);
+        caso contrário, uma consulta por faixa no índice da chave primária.
+        Mais de um resultado significa que o prefixo é ambíguo. Um prefixo
+        vazio não corresponde a nenhum item.
+        """
+        if not prefixo:
+            return []
+        if not self._itens_em_memoria:
+            return self._resolver_prefixo_db(prefixo, limite)
+
+        if self._ids_ordenados is None:
+            self._ids_ordenados = sorted(self._itens_por_id)
+        encontrados = []
+        posicao = bisect.bisect_left(self._ids_ordenados, prefixo)
+        while (posicao < len(self._ids_ordenados) and len(encontrados) < limite
+               and self._ids_ordenados[posicao].startswith(prefixo)):
+            encontrados.append(self._ids_ordenados[posicao])
+            posicao += 1
+        return encontrados
+
+    def _resolver_prefixo_db(self, prefixo: str, limite: int) -> List[str]:
+        # "id >= 'ab' AND id < 'ac'" usa o índice; "LIKE 'ab%'" percorreria a tabela
+        cursor = self._get_db_connection().execute(
+            "SELECT id FROM itens WHERE id >= ? AND id < ? ORDER BY id LIMIT ?",
+            (prefixo, _limite_superior_prefixo(prefixo), limite))
+        return [item_id for (item_id,) in cursor]
+
+    def carregar_item_db(self, item_id: str) -> Optional[ItemDeLeitura]:
+        """Busca um único item no DB pelo ID completo (usa a chave primária)."""
+        registro = self._get_db_connection().execute(
+            "SELECT * FROM itens WHERE id = ?", (item_id,)).fetchone()
+        return self._item_de_registro(registro) if registro else None
+
+    @staticmethod
+    def _mesmo_registro(item: ItemDeLeitura, registro: tuple) -> bool:
+        """Compara o item com a linha do DB sem forçar o carregamento preguiçoso."""
+        if item.hidratado:
+            return tuple(item.to_dict().values()) == registro
+        # Campos específicos ainda não carregados virão atualizados do DB quando pedidos
+        return (item.__class__.__name__, item.titulo, item.autor) == registro[1:4]
+
+    def sincronizar_com_db(self) -> Tuple[List[ItemDeLeitura], List[str], List[ItemDeLeitura]]:
+        """Compara a memória com o DB e aplica apenas as diferenças.
+
+        Só as linhas novas ou alteradas viram objetos novos; as demais são
+        mantidas. Retorna (novos, ids_removidos, alterados).
+        """
+        ultima = self._sequencia_atual()
+        vistos = set()
+
+        def registros() -> Iterator[tuple]:
+            for registro in self._get_db_connection().execute("SELECT * FROM itens"):
+                vistos.add(registro[0])
+                yield registro
+
+        novos, alterados = self._diferencas(registros())
+        removidos = [item_id for item_id in self._itens_por_id if item_id not in vistos]
+        self._aplicar_na_memoria(novos, removidos, alterados)
+        self._ultima_alteracao = ultima
+
+        print(f"\n🔄 Sincronizado: {len(novos)} novo(s), {len(removidos)} removido(s), "
+              f"{len(alterados)} alterado(s).")
+        return novos, removidos, alterados
+
+    def _diferencas(self, registros: Iterable[tuple]) -> Tuple[List[ItemDeLeitura], List[ItemDeLeitura]]:
+        """Separa, entre linhas completas do DB, as novas e as alteradas em relação à memória."""
+        em_memoria = self._itens_por_id
+        novos: List[ItemDeLeitura] = []
+        alterados: List[ItemDeLeitura] = []
         for registro in registros:
-            item_data = {
-                'id': registro[0],
-                'tipo': registro[1],
-                'titulo': registro[2],
-                'autor': registro[3],
-                'paginas': registro[4],
-                'edicao': registro[5],
-                'mes_publicacao': registro[6],
-                'desenhista': registro[7]
-            }
-            
-            # Recria a instância da classe correta (Polimorfismo e Herança)
+            atual = em_memoria.get(registro[0])
+            if atual is not None and self._mesmo_registro(atual, registro):
+                continue
             try:
-                if item_data['tipo'] == 'Livro':
-                    item = Livro(item_data['titulo'], item_data['autor'], item_data['paginas'], item_data['id'])
-                elif item_data['tipo'] == 'Revista':
-                    item = Revista(item_data['titulo'], item_data['autor'], item_data['edicao'], item_data['mes_publicacao'], item_data['id'])
-                elif item_data['tipo'] == 'HQ':
-                    item = HQ(item_data['titulo'], item_data['autor'], item_data['desenhista'], item_data['id'])
-                else:
-                    continue # Ignora tipo desconhecido
-                    
-                self.itens.append(item)
+                item = self._item_de_registro(registro)
             except Exception as e:
-                print(f"Erro ao carregar item ID {item_data['id']}: {e}")
+                print(f"Erro ao carregar item ID {registro[0]}: {e}")
+                continue
+            if item is None:
+                continue
+            if atual is None:
+                novos.append(item)
+            else:
+                alterados.append(item)
+        return novos, alterados
 
-        print(f"\n📦 {len(self.itens)} itens carregados do banco de dados.")
+    def _aplicar_na_memoria(self, novos: List[ItemDeLeitura], removidos: List[str],
+                            alterados: List[ItemDeLeitura]) -> None:
+        for item_id in removidos:
+            self._desindexar(item_id)
+        for item in alterados:
+            self._substituir_no_indice(item)
+        for item in novos:
+            self._indexar(item)
 
-    def adicionar_item(self, item: ItemDeLeitura) -> None:
-        """Adiciona item à memória e ao DB."""
-        data = item.to_dict()
-        
+    # --- Alterações feitas por outros programas (registro de alterações) ---
+    def _sequencia_atual(self) -> int:
+        try:
+            registro = self._get_db_connection().execute("SELECT MAX(seq) FROM alteracoes").fetchone()
+        except sqlite3.OperationalError:
+            return 0  # Banco anterior à migração 8, aberto sem setup_database (ex.: só para exportar)
+        return registro[0] or 0
+
+    def houve_escrita_externa(self) -> bool:
+        """True se outra conexão gravou algo desde a última chamada.
+
+        Só consulta PRAGMA data_version (nenhuma tabela é lida), então pode
+        ser chamada com frequência, ex.: a cada segundo pela GUI.
+        """
+        versao = self._get_db_connection().execute("PRAGMA data_version").fetchone()[0]
+        mudou = versao != self._versao_dados
+        self._versao_dados = versao
+        return mudou
+
+    def sincronizar_alteracoes(self, limite: int = LIMITE_ALTERACOES_INCREMENTAIS
+                               ) -> Tuple[List[ItemDeLeitura], List[str], List[ItemDeLeitura]]:
+        """Aplica à memória só os itens alterados desde a última sequência vista.
+
+        Lê as entradas novas da tabela 'alteracoes' e, para cada item
+        citado, a sua linha atual; o resultado é o de sincronizar_com_db()
+        (novos, ids_removidos, alterados). As próprias escritas desta estante
+        também aparecem no registro, mas já estão na memória e são ignoradas.
+        Com mais de 'limite' alterações, ou se as mais antigas já foram
+        podadas, faz a sincronização completa.
+        """
+        conn = self._get_db_connection()
+        ultima = self._ultima_alteracao
+        entradas = conn.execute("SELECT seq, item_id FROM alteracoes WHERE seq > ? ORDER BY seq LIMIT ?",
+                                (ultima, limite + 1)).fetchall()
+        if not entradas:
+            return [], [], []
+        if len(entradas) > limite or entradas[0][0] != ultima + 1:
+            return self.sincronizar_com_db()
+
+        ids = list(dict.fromkeys(item_id for _, item_id in entradas))
+        registros: List[tuple] = []
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            marcadores = ', '.join('?' * len(lote))
+            registros += conn.execute(f"SELECT * FROM itens WHERE id IN ({marcadores})", lote).fetchall()
+
+        existentes = {registro[0] for registro in registros}
+        novos, alterados = self._diferencas(registros)
+        removidos = [item_id for item_id in ids if item_id not in existentes and item_id in self._itens_por_id]
+        self._aplicar_na_memoria(novos, removidos, alterados)
+        self._ultima_alteracao = entradas[-1][0]
+
+        if novos or removidos or alterados:
+            print(f"\n🔄 Alterações de outros programas: {len(novos)} novo(s), "
+                  f"{len(removidos)} removido(s), {len(alterados)} alterado(s).")
+        return novos, removidos, alterados
+
+    def podar_alteracoes(self, manter: int = MAXIMO_ALTERACOES) -> int:
+        """Apaga as entradas mais antigas do registro de alterações, mantendo as 'manter' últimas."""
+        conn = self._get_db_connection()
+        menor, maior = conn.execute("SELECT MIN(seq), MAX(seq) FROM alteracoes").fetchone()
+        if maior is None or maior - menor < manter:
+            return 0  # Só leitura: quem só consulta a estante não pega o bloqueio de escrita
+        with self.transacao() as conn:
+            return conn.execute("DELETE FROM alteracoes WHERE seq <= ?", (maior - manter,)).rowcount
+
+    def encontrar_duplicata(self, item: ItemDeLeitura) -> Optional[str]:
+        """ID de um item já gravado com a mesma impressão digital (ver duplicatas.py), ou None."""
+        registro = self._get_db_connection().execute(
+            "SELECT item_id FROM impressoes WHERE impressao = ? AND item_id != ? LIMIT 1",
+            (impressao_digital(item.to_dict()), item.id)).fetchone()
+        return registro[0] if registro else None
+
+    def _impressoes_existentes(self, impressoes: List[str]) -> set:
         conn = self._get_db_connection()
-        cursor = conn.cursor()
+        existentes = set()
+        for inicio in range(0, len(impressoes), 500):
+            lote = impressoes[inicio:inicio + 500]
+            marcadores = ', '.join('?' * len(lote))
+            existentes.update(impressao for (impressao,) in conn.execute(
+                f"SELECT impressao FROM impressoes WHERE impressao IN ({marcadores})", lote))
+        return existentes
+
+    def adicionar_item(self, item: ItemDeLeitura, permitir_duplicata: bool = True) -> bool:
+        """Adiciona item à memória e ao DB. Retorna True se foi salvo.
+
+        Com permitir_duplicata=False, um item igual a outro já gravado (mesma
+        impressão digital) é recusado: nada é gravado e o retorno é False
+        (encontrar_duplicata() diz qual é o item existente).
+        """
+        if self._recusar_escrita():
+            return False
+        data = item.to_dict()
+        impressao = impressao_digital(data)
         
         try:
-            cursor.execute("""
-                INSERT INTO itens VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                data['id'], data['tipo'], data['titulo'], data['autor'], 
-                data['paginas'], data['edicao'], data['mes_publicacao'], data['desenhista']
-            ))
-            conn.commit()
-            self.itens.append(item)
-            print(f"\n✅ '{item.titulo}' adicionado(a) e SALVO no banco de dados!")
+            self._abrir_grupo()
+            with self.transacao() as conn:
+                if not permitir_duplicata:
+                    existente = conn.execute("SELECT item_id FROM impressoes WHERE impressao = ? LIMIT 1",
+                                             (impressao,)).fetchone()
+                    if existente:
+                        print(f"\n⚠️ '{item.titulo}' já está na estante (ID {existente[0][:6]}...). "
+                              "Nada foi adicionado.")
+                        return False
+                conn.execute(SQL_INSERIR_ITEM, (
+                    data['id'], data['tipo'], data['titulo'], data['autor'], 
+                    data['paginas'], data['edicao'], data['mes_publicacao'], data['desenhista']
+                ))
+                conn.execute(SQL_INSERIR_IMPRESSAO, (data['id'], impressao))
+            self._indexar(item)
+            self._memoria_pendente = self._profundidade_transacao > 0 or self._memoria_pendente
+            self.cache.registrar_insercao(item)
+            self.diario.registrar(Operacao(ADICIONAR, data))
+            if self._grupo_aberto:
+                print(f"\n✅ '{item.titulo}' adicionado(a)! (gravação agrupada no banco de dados)")
+            elif self._profundidade_transacao > 0:
+                # Dentro de transacao() (ex.: o 'lote' da linha de comando): um
+                # erro mais adiante ainda desfaz este item
+                print(f"\n✅ '{item.titulo}' adicionado(a)! (gravado quando a transação terminar)")
+            else:
+                print(f"\n✅ '{item.titulo}' adicionado(a) e SALVO no banco de dados!")
+            return True
         except sqlite3.Error as e:
             print(f"\n❌ ERRO ao salvar no banco de dados: {e}")
+            return False
         finally:
-            conn.close()
+            self._depois_da_escrita()
 
-    def remover_item(self, item_id: str) -> None:
-        """Remove item da memória e do DB pelo ID."""
-        
-        # 1. Tenta remover do banco de dados
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
+    def remover_item(self, item_id: str) -> List[str]:
+        """Remove item da memória e do DB pelo ID completo ou parcial.
+
+        Um ID parcial que corresponda a mais de um item é recusado (nada é
+        removido). Retorna os IDs removidos.
+        """
+        item_id = item_id.strip()
+        if not item_id:
+            print("\n⚠️ Informe o ID (ou o início do ID) do item a remover. Nada foi removido.")
+            return []
+        if self._recusar_escrita():
+            return []
         
         try:
-            cursor.execute("DELETE FROM itens WHERE id LIKE ?", (item_id + '%',))
-            removidos_db = cursor.rowcount
-            conn.commit()
-            
-            if removidos_db > 0:
-                # 2. Se removeu do DB, remove da memória (operação mais eficiente)
-                self.itens = [item for item in self.itens if not item.id.startswith(item_id)]
-                print(f"\n🗑️ Item com ID '{item_id}' removido com sucesso!")
-            else:
+            # 1. Resolve o ID (parcial) direto no DB, por faixa no índice da chave primária
+            candidatos = self._resolver_prefixo_db(item_id, limite=6)
+            if not candidatos:
                 print(f"\n⚠️ Nenhum item encontrado com o ID '{item_id}'.")
+                return []
+            if len(candidatos) > 1:
+                exemplos = ', '.join(candidato[:8] + '...' for candidato in candidatos[:5])
+                mais = " (e outros)" if len(candidatos) > 5 else ""
+                print(f"\n⚠️ O ID '{item_id}' é ambíguo: corresponde a {exemplos}{mais}. "
+                      f"Digite mais caracteres. Nada foi removido.")
+                return []
+
+            # 2. Remove do banco de dados e da memória (O(1) no índice por ID),
+            # guardando os dados completos para que a remoção possa ser desfeita
+            id_completo = candidatos[0]
+            removido = self.carregar_item_db(id_completo)
+            self._abrir_grupo()
+            with self.transacao() as conn:
+                conn.execute("DELETE FROM itens WHERE id = ?", (id_completo,))
+            self._desindexar(id_completo)
+            self._memoria_pendente = self._profundidade_transacao > 0 or self._memoria_pendente
+            self.cache.registrar_remocao(id_completo)
+            if removido is not None:
+                self.diario.registrar(Operacao(REMOVER, removido.to_dict()))
+            if self._profundidade_transacao > 0 and not self._grupo_aberto:
+                print(f"\n🗑️ Item com ID '{item_id}' removido! (gravado quando a transação terminar)")
+            else:
+                print(f"\n🗑️ Item com ID '{item_id}' removido com sucesso!")
+            return [id_completo]
                 
         except sqlite3.Error as e:
             print(f"\n❌ ERRO ao remover do banco de dados: {e}")
         finally:
-            conn.close()
+            self._depois_da_escrita()
+        return []
+
+    def importar_em_lote(self, registros: Iterable[Dict[str, Any]], tamanho_lote: int = 5000,
+                         ao_progredir: Optional[Callable[[ResultadoImportacao], None]] = None,
+                         deve_parar: Optional[Callable[[], bool]] = None,
+                         permitir_duplicatas: bool = False, guardar_ids: bool = False) -> ResultadoImportacao:
+        """Importa muitos itens de uma vez, lendo os registros sob demanda.
+
+        Cada registro é validado por criar_item(); registros inválidos são
+        anotados no resultado sem interromper a importação. Os itens válidos
+        são gravados com executemany, um commit a cada 'tamanho_lote' itens.
+        'ao_progredir' é chamado após cada lote gravado. Se 'deve_parar'
+        retornar True entre um lote e outro, a importação termina ali (os
+        lotes já gravados são mantidos) e o resultado fica 'interrompido'.
+        Registros iguais a itens já gravados (ou a outros do próprio arquivo)
+        são contados em 'duplicados' e ignorados, salvo com 'permitir_duplicatas'.
+        Com 'guardar_ids', os IDs gravados ficam em 'ids_importados' (desligado
+        por padrão para a memória não crescer em arquivos enormes).
+        """
+        # Os lotes são confirmados um a um (e podem ser cancelados): nada de grupo aberto
+        self.descarregar()
+        resultado = ResultadoImportacao()
+        if self._recusar_escrita():
+            return resultado
+        lote: List[Tuple[int, ItemDeLeitura]] = []
+
+        for numero, dados in enumerate(registros, start=1):
+            resultado.processados += 1
+            try:
+                lote.append((numero, criar_item(dados)))
+            except ValueError as e:
+                resultado.registrar_erro(numero, str(e))
+
+            if len(lote) >= tamanho_lote:
+                self._gravar_lote(lote, resultado, permitir_duplicatas, guardar_ids)
+                lote = []
+                if ao_progredir:
+                    ao_progredir(resultado)
+                if deve_parar and deve_parar():
+                    resultado.interrompido = True
+                    break
+
+        if lote:
+            self._gravar_lote(lote, resultado, permitir_duplicatas, guardar_ids)
+        if resultado.importados > tamanho_lote:
+            self._compactar_indices_texto(resultado.importados)
+            self.podar_alteracoes()
+        if ao_progredir:
+            ao_progredir(resultado)
+
+        situacao = "interrompida" if resultado.interrompido else "concluída"
+        print(f"\n📥 Importação {situacao}: {resultado.importados} de {resultado.processados} "
+              f"registro(s) importado(s), {resultado.duplicados} duplicado(s) ignorado(s), "
+              f"{resultado.total_erros} erro(s).")
+        return resultado
+
+    def _compactar_indices_texto(self, linhas_novas: int) -> None:
+        """Funde os segmentos pequenos que uma importação deixa nos índices FTS5.
+
+        Sem isso, as próximas inserções avulsas pagam essa fusão aos poucos. O
+        trabalho é limitado (proporcional às linhas importadas), não ao índice todo.
+        """
+        paginas = -max(100, linhas_novas // 50)  # negativo: funde mesmo com poucos segmentos
+        with self.transacao() as conn:
+            for tabela in ('itens_busca', 'itens_trigramas'):
+                conn.execute(f"INSERT INTO {tabela}({tabela}, rank) VALUES ('merge', ?)", (paginas,))
+
+    def _gravar_lote(self, lote: List[Tuple[int, ItemDeLeitura]], resultado: ResultadoImportacao,
+                     permitir_duplicatas: bool = False, guardar_ids: bool = False) -> None:
+        """Grava um lote em uma transação; se algo falhar, isola o registro com problema."""
+        dados = [item.to_dict() for _, item in lote]
+        impressoes = [impressao_digital(registro) for registro in dados]
+        if not permitir_duplicatas:
+            # Uma consulta ao índice de impressões por 500 itens; os lotes anteriores
+            # já estão gravados, então repetições entre lotes também são encontradas
+            vistas = self._impressoes_existentes(impressoes)
+            selecionados = []
+            for posicao, impressao in enumerate(impressoes):
+                if impressao in vistas:
+                    resultado.duplicados += 1
+                else:
+                    vistas.add(impressao)
+                    selecionados.append(posicao)
+            lote = [lote[posicao] for posicao in selecionados]
+            dados = [dados[posicao] for posicao in selecionados]
+            impressoes = [impressoes[posicao] for posicao in selecionados]
+            if not lote:
+                return
+        linhas = [tuple(registro.values()) for registro in dados]
+        pares_impressao = [(registro['id'], impressao) for registro, impressao in zip(dados, impressoes)]
+        try:
+            with self.transacao() as conn:
+                # O lote passa por uma tabela temporária e entra em 'itens' num único
+                # INSERT ... SELECT: os gatilhos dos índices FTS5 rodam todos dentro do
+                # mesmo comando (linha a linha, cada execução descarregaria o índice).
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS itens_lote AS SELECT * FROM itens WHERE 0")
+                conn.executemany("INSERT INTO temp.itens_lote VALUES (?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+                conn.execute("INSERT INTO itens SELECT * FROM temp.itens_lote")
+                conn.execute("DELETE FROM temp.itens_lote")
+                conn.executemany(SQL_INSERIR_IMPRESSAO, pares_impressao)
+            gravados = [item for _, item in lote]
+        except sqlite3.Error:
+            # Algum registro do lote foi recusado (ex.: ID repetido): grava um a um
+            gravados = []
+            with self.transacao() as conn:
+                for (numero, item), linha, par in zip(lote, linhas, pares_impressao):
+                    try:
+                        conn.execute(SQL_INSERIR_ITEM, linha)
+                        conn.execute(SQL_INSERIR_IMPRESSAO, par)
+                        gravados.append(item)
+                    except sqlite3.Error as e:
+                        resultado.registrar_erro(numero, f"Erro no banco de dados: {e}")
+
+        resultado.importados += len(gravados)
+        if guardar_ids:
+            resultado.ids_importados.extend(item.id for item in gravados)
+        if gravados:
+            # Muitos itens de uma vez: mais barato esvaziar o cache que testar entrada por entrada
+            self.cache.limpar()
+        if self._itens_em_memoria:
+            if len(gravados) > 64:
+                # Em lotes grandes é mais barato reordenar uma vez, quando necessário
+                self._itens_por_id.update((item.id, item) for item in gravados)
+                for item in gravados:
+                    self._itens_por_tipo[item.__class__.__name__][item.id] = item
+                self._ids_ordenados = None
+            else:
+                for item in gravados:
+                    self._indexar(item)
+            self._memoria_pendente = self._profundidade_transacao > 0 or self._memoria_pendente
 
     def listar_todos(self) -> None:
-        """Lista todos os itens presentes na estante (da memória)."""
-        if not self.itens:
+        """Lista todos os itens presentes na estante (da memória, ou direto do cursor do DB)."""
+        itens = self._itens_por_id.values() if self._itens_em_memoria else self.iterar_itens_db()
+        vazia = True
+        for item in itens:
+            if vazia:
+                print("\n📚 ITENS NA ESTANTE 📚")
+                print("-" * 30)
+                vazia = False
+            print(f"- [{item.__class__.__name__}] {item}")
+        if vazia:
             print("\n⚠️ A estante está vazia.")
             return
-            
-        print("\n📚 ITENS NA ESTANTE 📚")
         print("-" * 30)
-        for item in self.itens:
-            print(f"- [{item.__class__.__name__}] {item}")
-        print("-" * 30)
-# 4. MÉTODOS ADICIONAIS DE BUSCA E FILTRAGEM 
-# PAREI AQUI
-    def buscar_por_titulo(self, termo: str) -> None:
-        """Busca itens por um termo no título (case-insensitive)."""
-        termo = termo.lower()
-        resultados = [item for item in self.itens if termo in item.titulo.lower()]
+
+    def buscar_ids(self, termo: str, limite: Optional[int] = 50, pagina: int = 0,
+                   colunas: Tuple[str, ...] = COLUNAS_BUSCA, ordem: Optional[str] = None,
+                   decrescente: bool = False, **filtro: Optional[str]) -> List[str]:
+        """Busca no índice FTS5 e retorna os IDs ordenados por relevância.
+
+        limite=None retorna todos os resultados; 'pagina' começa em 0.
+        'filtro' aceita tipo/autor/titulo, como em filtrar_ids(). Com 'ordem'
+        (uma chave de CHAVES_DE_ORDENACAO), ordena pela coluna em vez da relevância.
+        """
+        consulta = _consulta_fts(termo, colunas)
+        if not consulta:
+            return []
+        condicoes, parametros = condicoes_do_filtro(**filtro)
+        ordenacao = 'itens_busca.rank' if ordem is None else ordenacao_sql(ordem, decrescente)[1]
+        limite_sql = -1 if limite is None else limite
+        deslocamento = pagina * max(limite_sql, 0)
+
+        # O FTS5 ignora maiúsculas: "Sandman" e "SANDMAN" dividem a mesma entrada
+        chave = ('busca', consulta.lower(), condicoes, tuple(parametros), ordenacao, limite_sql, deslocamento)
+        ids = self.cache.obter(chave)
+        if ids is not None:
+            return ids
+
+        cursor = self._get_db_connection().execute(f"""
+            SELECT itens.id FROM itens_busca
+            JOIN itens ON itens.rowid = itens_busca.rowid
+            WHERE itens_busca MATCH ? AND {condicoes}
+            ORDER BY {ordenacao}
+            LIMIT ? OFFSET ?
+        """, (consulta, *parametros, limite_sql, deslocamento))
+        ids = [item_id for (item_id,) in cursor]
+        self.cache.guardar(chave, ids,
+                           lambda item: (item_atende_filtro(item, **filtro)
+                                         and item_pode_atender_busca(item, termo, colunas)),
+                           paginada=deslocamento > 0)
+        return ids
+
+    def iterar_busca(self, termo: str, tamanho_bloco: int = 500, limite: Optional[int] = None,
+                     colunas: Tuple[str, ...] = COLUNAS_BUSCA,
+                     **filtro: Optional[str]) -> Iterator[Tuple[float, tuple]]:
+        """Resultados da busca, por relevância, como (rank, (id, tipo, titulo, autor)).
+
+        Lê do cursor em blocos de 'tamanho_bloco' linhas, sem montar a lista
+        inteira (ex.: para intercalar com outras estantes, multiplas_estantes.py).
+        O rank é o bm25 do FTS5: quanto MENOR, mais relevante.
+        """
+        consulta = _consulta_fts(termo, colunas)
+        if not consulta:
+            return
+        condicoes, parametros = condicoes_do_filtro(**filtro)
+        cursor = self._get_db_connection().execute(f"""
+            SELECT itens_busca.rank, itens.id, itens.tipo, itens.titulo, itens.autor FROM itens_busca
+            JOIN itens ON itens.rowid = itens_busca.rowid
+            WHERE itens_busca MATCH ? AND {condicoes}
+            ORDER BY itens_busca.rank LIMIT ?
+        """, (consulta, *parametros, -1 if limite is None else limite))
+        try:
+            while True:
+                bloco = cursor.fetchmany(tamanho_bloco)
+                if not bloco:
+                    return
+                for registro in bloco:
+                    yield registro[0], registro[1:]
+        finally:
+            cursor.close()
+
+    def iterar_filtro(self, tipo: Optional[str] = None, autor: Optional[str] = None,
+                      titulo: Optional[str] = None, ordem: str = 'id', decrescente: bool = False,
+                      tamanho_bloco: int = 500, limite: Optional[int] = None,
+                      depois: Optional[Iterable[Any]] = None) -> Iterator[Tuple[tuple, tuple]]:
+        """Linhas do filtro, na ordem pedida, como (chave, (id, tipo, titulo, autor)).
+
+        A chave é a da ordenação (veja CHAVES_DE_ORDENACAO) e permite intercalar
+        a ordem de várias estantes. Uma única consulta, lida em blocos: quando o
+        filtro e a ordem usam índices diferentes o SQLite ordena uma vez só (e,
+        com 'limite', guarda só as primeiras linhas durante a ordenação).
+        Com 'depois' (a chave da última linha já vista), continua dali: páginas
+        por keyset sem guardar estado entre uma chamada e outra.
+        """
+        condicoes, parametros = condicoes_do_filtro(tipo, autor, titulo)
+        chave, ordenacao = ordenacao_sql(ordem, decrescente)
+        if depois is not None:
+            apos, parametros_apos = condicao_apos_chave(chave, depois, decrescente)
+            condicoes, parametros = f"{apos} AND {condicoes}", [*parametros_apos, *parametros]
+        n = len(chave)
+        cursor = self._get_db_connection().execute(f"""
+            SELECT {', '.join(chave)}, itens.id, itens.tipo, itens.titulo, itens.autor FROM itens
+            WHERE {condicoes} ORDER BY {ordenacao} LIMIT ?
+        """, (*parametros, -1 if limite is None else limite))
+        try:
+            while True:
+                bloco = cursor.fetchmany(tamanho_bloco)
+                if not bloco:
+                    return
+                for registro in bloco:
+                    yield registro[:n], registro[n:]
+        finally:
+            cursor.close()
+
+    def filtrar_ids(self, tipo: Optional[str] = None, autor: Optional[str] = None,
+                    titulo: Optional[str] = None, limite: Optional[int] = None,
+                    ordem: str = 'id', decrescente: bool = False) -> List[str]:
+        """IDs (ordenados) que atendem a TODOS os critérios, em uma única consulta.
+
+        'tipo' é o nome da classe; 'autor' e 'titulo' são prefixos que ignoram
+        maiúsculas/minúsculas. Ex.: filtrar_ids(tipo='HQ', autor='gaiman').
+        'ordem' escolhe a coluna da ordenação (padrão: id), como na GUI.
+        """
+        condicoes, parametros = condicoes_do_filtro(tipo, autor, titulo)
+        ordenacao = ordenacao_sql(ordem, decrescente)[1]
+        limite_sql = -1 if limite is None else limite
+        chave = ('filtro', condicoes, tuple(parametros), ordenacao, limite_sql)
+        ids = self.cache.obter(chave)
+        if ids is not None:
+            return ids
+
+        cursor = self._get_db_connection().execute(
+            f"SELECT itens.id FROM itens WHERE {condicoes} ORDER BY {ordenacao} LIMIT ?",
+            (*parametros, limite_sql))
+        ids = [item_id for (item_id,) in cursor]
+        self.cache.guardar(chave, ids, lambda item: item_atende_filtro(item, tipo, autor, titulo))
+        return ids
+
+    def buscar_aproximado_ids(self, termo: str, limite: int = 20, limiar: float = SIMILARIDADE_MINIMA,
+                              colunas: Tuple[str, ...] = COLUNAS_BUSCA, tipo: Optional[str] = None,
+                              autor: Optional[str] = None, titulo: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Busca tolerante a erros de digitação: (id, similaridade) dos 'limite'
+        itens mais parecidos com 'termo', do mais para o menos parecido.
+
+        Só entram itens com similaridade >= 'limiar' (ver similaridade()).
+        O filtro (tipo/autor/título) é aplicado na mesma consulta.
+        """
+        conn = self._get_db_connection()
+        escolhidos = _trigramas_da_consulta(conn, termo)
+        if not escolhidos or limite <= 0:
+            return []
+
+        # 1. Candidatos: quantos trigramas escolhidos cada linha contém. Os mais
+        #    raros vêm primeiro; paramos de ler listas quando elas ficam grandes
+        #    demais (um trigrama presente em metade da estante pouco discrimina).
+        acertos: Counter = Counter()
+        lidos = 0
+        for trigrama, frequencia in escolhidos:
+            if lidos and lidos + frequencia > LIMITE_LEITURAS_TRIGRAMAS:
+                break
+            lidos += frequencia
+            linhas = conn.execute("SELECT rowid FROM itens_trigramas WHERE itens_trigramas MATCH ?",
+                                  ('"' + trigrama.replace('"', '""') + '"',))
+            acertos.update(rowid for (rowid,) in linhas)
+        melhores = [rowid for rowid, _ in acertos.most_common(LIMITE_CANDIDATOS)]
+
+        # 2. Nota de similaridade só para os candidatos (o filtro entra aqui)
+        condicoes, parametros = condicoes_do_filtro(tipo, autor, titulo)
+        posicoes = [1 + COLUNAS_BUSCA.index(coluna) for coluna in colunas]
+        procurados = [_trigramas(palavra) for palavra in _palavras(termo)]
+        notas = []
+        for inicio in range(0, len(melhores), 500):
+            lote = melhores[inicio:inicio + 500]
+            marcadores = ', '.join('?' * len(lote))
+            for registro in conn.execute(f"""
+                SELECT itens.id, itens.titulo, itens.autor, itens.desenhista FROM itens
+                WHERE itens.rowid IN ({marcadores}) AND {condicoes}
+            """, (*lote, *parametros)):
+                nota = _nota(procurados, ' '.join(registro[i] or '' for i in posicoes))
+                if nota >= limiar:
+                    notas.append((nota, registro[0]))
+        return [(item_id, round(nota, 3)) for nota, item_id in heapq.nlargest(limite, notas)]
+
+    def filtrar(self, tipo: Optional[str] = None, autor: Optional[str] = None,
+                titulo: Optional[str] = None, limite: Optional[int] = None) -> List[ItemDeLeitura]:
+        """Como filtrar_ids(), mas devolve os itens (os da memória, quando carregados)."""
+        ids = self.filtrar_ids(tipo, autor, titulo, limite)
+        if self._itens_em_memoria:
+            return [self._itens_por_id[item_id] for item_id in ids if item_id in self._itens_por_id]
+        return self.carregar_itens_por_ids(ids)
+
+    def itens_do_tipo(self, tipo_classe: type) -> List[ItemDeLeitura]:
+        """Itens de um tipo: o balde em memória, ou o índice por tipo no DB."""
+        if self._itens_em_memoria:
+            return list(self._itens_por_tipo.get(tipo_classe.__name__, {}).values())
+        return self.filtrar(tipo=tipo_classe.__name__)
+
+    def carregar_itens_por_ids(self, ids: List[str]) -> List[ItemDeLeitura]:
+        """Carrega vários itens do DB pelo ID completo, preservando a ordem recebida."""
+        encontrados: Dict[str, ItemDeLeitura] = {}
+        conn = self._get_db_connection()
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            marcadores = ', '.join('?' * len(lote))
+            for registro in conn.execute(f"SELECT * FROM itens WHERE id IN ({marcadores})", lote):
+                item = self._item_de_registro(registro)
+                if item is not None:
+                    encontrados[item.id] = item
+        return [encontrados[item_id] for item_id in ids if item_id in encontrados]
+
+    def reconstruir_indice_busca(self) -> None:
+        """Reconstrói os índices FTS5 (palavras e trigramas) a partir da tabela 'itens'."""
+        with self.transacao() as conn:
+            conn.execute("INSERT INTO itens_busca(itens_busca) VALUES ('rebuild')")
+            conn.execute("INSERT INTO itens_trigramas(itens_trigramas) VALUES ('rebuild')")
+        self.cache.limpar()
+
+    def buscar_por_titulo(self, termo: str) -> List[ItemDeLeitura]:
+        """Busca itens por palavras (ou início de palavras) no título.
+
+        Usa o índice FTS5: ignora maiúsculas/minúsculas e acentos, e os
+        resultados vêm ordenados por relevância.
+        """
+        ids = self.buscar_ids(termo, limite=None, colunas=('titulo',))
+        resultados = self.carregar_itens_por_ids(ids)
         
         if not resultados:
             print(f"\n⚠️ Nenhum item encontrado com o termo '{termo}'.")
-            return
+            # Talvez um erro de digitação: sugere os títulos mais parecidos
+            return self.buscar_aproximado(termo, limite=5, colunas=('titulo',))
 
         print(f"\n🔍 RESULTADOS DA BUSCA POR '{termo.upper()}' 🔍")
         print("-" * 30)
         for item in resultados:
             print(item.detalhes())
             print("-" * 30)
+        return resultados
+
+    def buscar_aproximado(self, termo: str, limite: int = 20,
+                          colunas: Tuple[str, ...] = COLUNAS_BUSCA) -> List[ItemDeLeitura]:
+        """Mostra os itens mais parecidos com 'termo' (tolerando erros de digitação)."""
+        encontrados = self.buscar_aproximado_ids(termo, limite=limite, colunas=colunas)
+        itens = self.carregar_itens_por_ids([item_id for item_id, _ in encontrados])
+        if not itens:
+            print(f"\n⚠️ Nada parecido com '{termo}'.")
+            return itens
+
+        notas = dict(encontrados)
+        print(f"\n🤔 ITENS PARECIDOS COM '{termo.upper()}' 🤔")
+        print("-" * 30)
+        for item in itens:
+            print(f"({notas[item.id]:.0%} parecido) {item.detalhes()}")
+            print("-" * 30)
+        return itens
     
+    def estatisticas(self, limite_ranking: int = 10) -> EstatisticasEstante:
+        """Contagens por tipo, autores/desenhistas com mais itens, páginas dos
+        Livros e Revistas por mês.
+
+        Tudo vem da tabela 'contadores', que os gatilhos mantêm a cada escrita:
+        o custo não depende do tamanho da estante (nenhuma varredura de 'itens').
+        """
+        conn = self._get_db_connection()
+        resultado = EstatisticasEstante()
+        for tipo, quantidade, soma in conn.execute(
+                "SELECT chave, quantidade, soma FROM contadores WHERE grupo = 'tipo'"):
+            resultado.por_tipo[tipo] = quantidade
+            if tipo == 'Livro':
+                resultado.total_paginas_livros = soma
+
+        def ranking(grupo: str) -> List[Tuple[str, int]]:
+            # Percorre idx_contadores_ranking de trás para frente: só lê 'limite_ranking' linhas
+            return conn.execute("""
+                SELECT chave, quantidade FROM contadores WHERE grupo = ?
+                ORDER BY quantidade DESC LIMIT ?
+            """, (grupo, limite_ranking)).fetchall()
+
+        resultado.principais_autores = ranking('autor')
+        resultado.principais_desenhistas = ranking('desenhista')
+        meses = conn.execute(
+            "SELECT chave, quantidade FROM contadores WHERE grupo = 'mes_publicacao'").fetchall()
+        resultado.revistas_por_mes = sorted(meses, key=lambda par: _ordem_do_mes(par[0]))
+        return resultado
+
+    def quantidades_nos_contadores(self, grupo: str, chaves: Iterable[str]) -> Dict[str, int]:
+        """Quantidade de cada chave de um grupo de 'contadores' (ausentes ficam de fora).
+
+        Usada para somar rankings de várias estantes (veja multiplas_estantes.py).
+        """
+        conn = self._get_db_connection()
+        chaves = list(chaves)
+        quantidades: Dict[str, int] = {}
+        for inicio in range(0, len(chaves), 500):
+            lote = chaves[inicio:inicio + 500]
+            marcadores = ', '.join('?' * len(lote))
+            quantidades.update(conn.execute(
+                f"SELECT chave, quantidade FROM contadores WHERE grupo = ? AND chave IN ({marcadores})",
+                (grupo, *lote)))
+        return quantidades
+
+    def recalcular_estatisticas(self) -> None:
+        """Refaz os contadores a partir de 'itens' (ex.: após editar o arquivo .db por fora)."""
+        with self.transacao() as conn:
+            recalcular_contadores(conn)
+
+    def exibir_estatisticas(self, limite_ranking: int = 10) -> EstatisticasEstante:
+        """Mostra as estatísticas da coleção no terminal."""
+        numeros = self.estatisticas(limite_ranking)
+        print("\n📊 ESTATÍSTICAS DA ESTANTE 📊")
+        print("=" * 30)
+        print(f"Total de itens: {numeros.total}")
+        for tipo in TIPOS_DE_ITEM:
+            print(f"  {tipo}: {numeros.por_tipo.get(tipo, 0)}")
+        print(f"Páginas (Livros): {numeros.total_paginas_livros} no total, "
+              f"{numeros.media_paginas_livros:.1f} em média")
+        secoes = (("Autores com mais itens", numeros.principais_autores),
+                  ("Desenhistas com mais HQs", numeros.principais_desenhistas),
+                  ("Revistas por mês de publicação", numeros.revistas_por_mes))
+        for titulo, pares in secoes:
+            print("-" * 30)
+            print(f"{titulo}:")
+            if not pares:
+                print("  (nenhum)")
+            for nome, quantidade in pares:
+                print(f"  {nome}: {quantidade}")
+        print("=" * 30)
+        return numeros
+
     def exibir_detalhes_por_tipo(self, tipo_classe: type) -> None:
         """Lista e exibe detalhes de itens de um tipo específico."""
         
-        itens_do_tipo = [item for item in self.itens if isinstance(item, tipo_classe)]
+        itens_do_tipo = self.itens_do_tipo(tipo_classe)
         
         if not itens_do_tipo:
             print(f"\n⚠️ Nenhum(a) {tipo_classe.__name__} encontrado(a) na estante.")
@@ -248,11 +1655,234 @@ class Estante:
             print(item.detalhes())
             print("=" * 30)
 
+# 3.1 PAGINAÇÃO POR CHAVE (KEYSET) PARA LISTAS MUITO GRANDES
+class PaginadorKeyset:
+    """Lê a tabela 'itens' em páginas ordenadas, sem usar OFFSET.
+
+    Guarda apenas a chave inicial ("âncora") de cada página, descoberta sob
+    demanda percorrendo o índice da ordenação. Com páginas de 500 linhas, um
+    milhão de itens custa só ~2000 âncoras em memória. Com tipo/autor/titulo,
+    pagina apenas as linhas do filtro (veja condicoes_do_filtro); com 'termo',
+    apenas os resultados da busca FTS5. 'ordem' é uma chave de
+    CHAVES_DE_ORDENACAO (padrão: id), crescente ou decrescente.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, tamanho_pagina: int = 500,
+                 tipo: Optional[str] = None, autor: Optional[str] = None, titulo: Optional[str] = None,
+                 ordem: str = 'id', decrescente: bool = False, termo: Optional[str] = None):
+        self._conn = conn
+        self.tamanho_pagina = tamanho_pagina
+        self.ordem = ordem
+        self.decrescente = decrescente
+        self._condicoes, self._parametros = condicoes_do_filtro(tipo, autor, titulo)
+        if termo is not None:
+            consulta = _consulta_fts(termo)
+            if not consulta:
+                self._condicoes = '0'
+            else:
+                self._condicoes += (" AND itens.rowid IN "
+                                    "(SELECT rowid FROM itens_busca WHERE itens_busca MATCH ?)")
+                self._parametros.append(consulta)
+        self.filtrado = bool(self._parametros)
+
+        chave, self._ordenacao = ordenacao_sql(ordem, decrescente)
+        self._chave = ', '.join(chave)
+        self._tamanho_chave = len(chave)
+        # "Depois da âncora" na ordem escolhida. A comparação de row values não
+        # usa índices de expressões (título, autor): nesse caso a primeira
+        # expressão da chave também é limitada sozinha, para posicionar a busca
+        # no índice (com uma coluna simples, o row value já faz isso).
+        depois_de = '<' if decrescente else '>'
+        marcadores = ', '.join('?' * len(chave))
+        self._limitar_primeira = chave[0] in EXPRESSOES_TEXTO.values()
+        limite_inicial = f"{chave[0]} {depois_de}= ? AND " if self._limitar_primeira else ""
+        self._apos_ancora = f"{limite_inicial}({self._chave}) {depois_de} ({marcadores})"
+        self._desde_ancora = f"{limite_inicial}({self._chave}) {depois_de}= ({marcadores})"
+        self._ancoras: List[tuple] = []
+        self._chaves_exibidas: Dict[str, tuple] = {}
+        self.total = 0
+        self.invalidar()
+
+    def invalidar(self) -> None:
+        """Descarta todas as âncoras e reconta os itens (ex.: após 'Atualizar')."""
+        self._ancoras = []
+        self.total = self._conn.execute(
+            f"SELECT COUNT(*) FROM itens WHERE {self._condicoes}", self._parametros).fetchone()[0]
+
+    def registrar_insercao(self, item_id: str) -> None:
+        if self.filtrado:
+            # Não se sabe se o item novo atende ao filtro: reconta
+            self.invalidar()
+            return
+        self.total += 1
+        self._descartar_ancoras_apos(item_id)
+
+    def registrar_remocao(self, item_id: str) -> None:
+        if self.filtrado:
+            self.invalidar()
+            return
+        self.total = max(0, self.total - 1)
+        self._descartar_ancoras_apos(item_id)
+
+    def _chave_do_item(self, item_id: str) -> Optional[tuple]:
+        if self.ordem == 'id':
+            return (item_id,)
+        # Um item removido já não está no banco, mas quase sempre estava na tela
+        chave = self._chaves_exibidas.get(item_id)
+        if chave is None:
+            chave = self._conn.execute(
+                f"SELECT {self._chave} FROM itens WHERE id = ?", (item_id,)).fetchone()
+        return chave
+
+    def _descartar_ancoras_apos(self, item_id: str) -> None:
+        # Só as páginas que começam depois do item alterado mudam de posição
+        chave = self._chave_do_item(item_id)
+        if chave is None:
+            self._ancoras = []
+        elif self.decrescente:
+            self._ancoras = self._ancoras[:len(self._ancoras) - bisect.bisect_right(self._ancoras[::-1], chave)]
+        else:
+            self._ancoras = self._ancoras[:bisect.bisect_left(self._ancoras, chave)]
+
+    def _parametros_da_ancora(self, ancora: tuple) -> tuple:
+        return (ancora[0], *ancora) if self._limitar_primeira else ancora
+
+    def _ancora(self, pagina: int) -> Optional[tuple]:
+        """Devolve a chave inicial da página, estendendo as âncoras se preciso."""
+        if not self._ancoras:
+            primeira = self._conn.execute(
+                f"SELECT {self._chave} FROM itens WHERE {self._condicoes} ORDER BY {self._ordenacao} LIMIT 1",
+                self._parametros).fetchone()
+            if primeira is None:
+                return None
+            self._ancoras.append(primeira)
+
+        if len(self._ancoras) <= pagina:
+            # Percorre apenas as chaves (no índice) a partir da última âncora conhecida
+            cursor = self._conn.execute(f"""
+                SELECT {self._chave} FROM itens
+                WHERE {self._apos_ancora} AND {self._condicoes}
+                ORDER BY {self._ordenacao}
+            """, (*self._parametros_da_ancora(self._ancoras[-1]), *self._parametros))
+            for posicao, chave in enumerate(cursor, start=1):
+                if posicao % self.tamanho_pagina == 0:
+                    self._ancoras.append(chave)
+                    if len(self._ancoras) > pagina:
+                        break
+            cursor.close()
+
+        return self._ancoras[pagina] if pagina < len(self._ancoras) else None
+
+    def linhas(self, inicio: int, quantidade: int) -> List[tuple]:
+        """Retorna (id, tipo, titulo, autor) das linhas [inicio, inicio + quantidade)."""
+        pagina, pulo = divmod(max(0, inicio), self.tamanho_pagina)
+        ancora = self._ancora(pagina)
+        if ancora is None:
+            return []
+        registros = self._conn.execute(f"""
+            SELECT {self._chave}, itens.id, itens.tipo, itens.titulo, itens.autor FROM itens
+            WHERE {self._desde_ancora} AND {self._condicoes}
+            ORDER BY {self._ordenacao} LIMIT ?
+        """, (*self._parametros_da_ancora(ancora), *self._parametros, pulo + quantidade)).fetchall()[pulo:]
+        n = self._tamanho_chave
+        self._chaves_exibidas = {registro[n]: registro[:n] for registro in registros}
+        return [registro[n:] for registro in registros]
+
+class PaginadorBusca:
+    """Mesma interface do PaginadorKeyset, mas sobre os resultados de uma busca FTS5.
+
+    Os resultados seguem a ordem de relevância (rank), então a paginação é feita
+    dentro do conjunto de resultados e não da tabela inteira.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, termo: str,
+                 tipo: Optional[str] = None, autor: Optional[str] = None, titulo: Optional[str] = None):
+        self._conn = conn
+        self.consulta = _consulta_fts(termo)
+        self._condicoes, self._parametros = condicoes_do_filtro(tipo, autor, titulo)
+        self.total = 0
+        self.invalidar()
+
+    def invalidar(self) -> None:
+        if not self.consulta:
+            self.total = 0
+            return
+        if not self._parametros:
+            self.total = self._conn.execute(
+                "SELECT COUNT(*) FROM itens_busca WHERE itens_busca MATCH ?",
+                (self.consulta,)).fetchone()[0]
+            return
+        self.total = self._conn.execute(f"""
+            SELECT COUNT(*) FROM itens_busca
+            JOIN itens ON itens.rowid = itens_busca.rowid
+            WHERE itens_busca MATCH ? AND {self._condicoes}
+        """, (self.consulta, *self._parametros)).fetchone()[0]
+
+    def registrar_insercao(self, item_id: str) -> None:
+        self.invalidar()
+
+    def registrar_remocao(self, item_id: str) -> None:
+        self.invalidar()
+
+    def linhas(self, inicio: int, quantidade: int) -> List[tuple]:
+        """Retorna (id, tipo, titulo, autor) dos resultados [inicio, inicio + quantidade)."""
+        if not self.consulta:
+            return []
+        return self._conn.execute(f"""
+            SELECT itens.id, itens.tipo, itens.titulo, itens.autor FROM itens_busca
+            JOIN itens ON itens.rowid = itens_busca.rowid
+            WHERE itens_busca MATCH ? AND {self._condicoes}
+            ORDER BY itens_busca.rank
+            LIMIT ? OFFSET ?
+        """, (self.consulta, *self._parametros, quantidade, max(0, inicio))).fetchall()
+
+class PaginadorAproximado:
+    """Mesma interface do PaginadorKeyset, sobre os resultados (poucos, já
+    ordenados por similaridade) de Estante.buscar_aproximado_ids."""
+
+    def __init__(self, estante: Estante, termo: str, limite: int = 200, **filtro):
+        self._estante = estante
+        self._termo = termo
+        self._limite = limite
+        self._filtro = filtro
+        self._ids: List[str] = []
+        self.total = 0
+        self.invalidar()
+
+    def invalidar(self) -> None:
+        self._ids = [item_id for item_id, _ in
+                     self._estante.buscar_aproximado_ids(self._termo, self._limite, **self._filtro)]
+        self.total = len(self._ids)
+
+    def registrar_insercao(self, item_id: str) -> None:
+        self.invalidar()
+
+    def registrar_remocao(self, item_id: str) -> None:
+        self.invalidar()
+
+    def linhas(self, inicio: int, quantidade: int) -> List[tuple]:
+        """Retorna (id, tipo, titulo, autor) dos resultados [inicio, inicio + quantidade)."""
+        pedacos = self._ids[max(0, inicio):max(0, inicio) + quantidade]
+        return [(item.id, item.__class__.__name__, item.titulo, item.autor)
+                for item in self._estante.carregar_itens_por_ids(pedacos)]
+
+# Pontos medidos pela instrumentação opcional (nada muda enquanto ela estiver desligada)
+instrumentacao.registrar(Estante, instrumentacao.METODOS_ESTANTE)
+instrumentacao.registrar_conexao(Estante)
+instrumentacao.registrar(PaginadorKeyset, instrumentacao.METODOS_PAGINADOR)
+instrumentacao.registrar(PaginadorBusca, instrumentacao.METODOS_PAGINADOR)
+instrumentacao.registrar(PaginadorAproximado, instrumentacao.METODOS_PAGINADOR)
+
 # 4. FUNÇÕES DO MENU (Interface com o usuário)
 def exibir_menu(estante: Estante) -> None:
     """Exibe o menu principal e gerencia as interações do usuário."""
     
     while True:
+        # Com escrita adiada, o menu faz o papel do temporizador do grupo
+        estante.descarregar_se_vencido()
+        # Outro programa (a janela, outro terminal) gravou no mesmo arquivo?
+        if estante.houve_escrita_externa():
+            estante.sincronizar_alteracoes()
         print("\n╔═══════════════════════════════════╗")
         print("║      ESTANTE VIRTUAL (SQLite)     ║")
         print("╠═══════════════════════════════════╣")
@@ -263,6 +1893,13 @@ def exibir_menu(estante: Estante) -> None:
         print("║ 5. Detalhes de Livros             ║")
         print("║ 6. Detalhes de Revistas           ║")
         print("║ 7. Detalhes de HQs                ║")
+        print("║ 8. Importar Arquivo (CSV/JSONL)   ║")
+        print("║ 9. Filtrar por Tipo/Autor/Título  ║")
+        print("║ A. Busca Aproximada (com erros)   ║")
+        print("║ D. Relatório de Duplicatas        ║")
+        print("║ E. Estatísticas da Coleção        ║")
+        print("║ U. Desfazer Última Alteração      ║")
+        print("║ R. Refazer Alteração Desfeita     ║")
         print("║ 0. Sair e Fechar DB               ║")
         print("╚═══════════════════════════════════╝")
         
@@ -284,8 +1921,26 @@ def exibir_menu(estante: Estante) -> None:
             estante.exibir_detalhes_por_tipo(Revista)
         elif escolha == '7':
             estante.exibir_detalhes_por_tipo(HQ)
+        elif escolha == '8':
+            menu_importar(estante)
+        elif escolha == '9':
+            menu_filtrar(estante)
+        elif escolha.lower() == 'a':
+            termo = input("Digite o que lembrar do título, autor ou desenhista: ")
+            estante.buscar_aproximado(termo)
+        elif escolha.lower() == 'd':
+            menu_duplicatas(estante)
+        elif escolha.lower() == 'e':
+            estante.exibir_estatisticas()
+        elif escolha.lower() == 'u':
+            if estante.desfazer():
+                print("↩️ Alteração desfeita (R refaz).")
+        elif escolha.lower() == 'r':
+            if estante.refazer():
+                print("↪️ Alteração refeita.")
         elif escolha == '0':
-            print("\n👋 Saindo do sistema. Todos os dados estão salvos em estante_virtual.db!")
+            estante.fechar()
+            print(f"\n👋 Saindo do sistema. Todos os dados estão salvos em {estante.db_path}!")
             break
         else:
             print("\n❌ Opção inválida. Tente novamente.")
@@ -310,7 +1965,7 @@ def menu_adicionar(estante: Estante) -> None:
         try:
             paginas = int(input("Número de Páginas: "))
             novo_item = Livro(titulo, autor, paginas)
-            estante.adicionar_item(novo_item)
+            _adicionar_conferindo_duplicata(estante, novo_item)
         except ValueError:
             print("\n❌ O número de páginas deve ser um valor inteiro.")
             
@@ -318,21 +1973,103 @@ def menu_adicionar(estante: Estante) -> None:
         edicao = input("Edição: ")
         mes = input("Mês de Publicação: ")
         novo_item = Revista(titulo, autor, edicao, mes)
-        estante.adicionar_item(novo_item)
+        _adicionar_conferindo_duplicata(estante, novo_item)
         
     elif tipo == 'c':
         desenhista = input("Desenhista/Ilustrador: ")
         novo_item = HQ(titulo, autor, desenhista)
-        estante.adicionar_item(novo_item)
-        
+        _adicionar_conferindo_duplicata(estante, novo_item)
+
+def _adicionar_conferindo_duplicata(estante: Estante, novo_item: ItemDeLeitura) -> None:
+    """Avisa se já existe um item igual e só o adiciona de novo se o usuário confirmar."""
+    existente = estante.encontrar_duplicata(novo_item)
+    if existente:
+        resposta = input(f"⚠️ Já existe um item igual (ID {existente[:6]}...). Adicionar mesmo assim? (s/n): ")
+        if resposta.strip().lower() != 's':
+            print("\n↩️ Nada foi adicionado.")
+            return
+    estante.adicionar_item(novo_item, permitir_duplicata=bool(existente))
+
+
+def menu_importar(estante: Estante) -> None:
+    """Importa itens de um arquivo CSV ou JSONL."""
+    from importacao import ler_arquivo, mostrar_progresso
+
+    caminho = input("Caminho do arquivo (.csv ou .jsonl): ").strip()
+    try:
+        resultado = estante.importar_em_lote(ler_arquivo(caminho), ao_progredir=mostrar_progresso)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Não foi possível ler o arquivo: {e}")
+        return
+
+    for numero, mensagem in resultado.erros[:20]:
+        print(f"  ⚠️ Registro {numero}: {mensagem}")
+    if resultado.total_erros > 20:
+        print(f"  ... e mais {resultado.total_erros - 20} erro(s).")
+
+def menu_duplicatas(estante: Estante) -> None:
+    """Mostra os grupos de itens duplicados (iguais, ou também com títulos parecidos)."""
+    from duplicatas import agrupar_duplicatas
+
+    aproximado = input("Incluir títulos parecidos (erros de digitação)? (s/n): ").strip().lower() == 's'
+    grupos = agrupar_duplicatas(estante._get_db_connection(), aproximado=aproximado)
+    if not grupos:
+        print("\n✅ Nenhum item duplicado encontrado.")
+        return
+
+    print(f"\n🧬 {len(grupos)} GRUPO(S) DE DUPLICATAS 🧬")
+    for numero, grupo in enumerate(grupos[:20], start=1):
+        print(f"Grupo {numero}:")
+        for item in estante.carregar_itens_por_ids(grupo):
+            print(f"  - [{item.__class__.__name__}] {item}")
+    if len(grupos) > 20:
+        print(f"... e mais {len(grupos) - 20} grupo(s) (veja todos com: python duplicatas.py --saida arquivo.jsonl)")
+
+def menu_filtrar(estante: Estante) -> None:
+    """Filtra os itens combinando tipo, autor e título (deixe em branco para ignorar)."""
+    tipo = input("Tipo (Livro/Revista/HQ): ").strip()
+    autor = input("Autor começa com: ")
+    titulo = input("Título começa com: ")
+
+    nomes_dos_tipos = {nome.lower(): nome for nome in TIPOS_DE_ITEM}
+    if tipo and tipo.lower() not in nomes_dos_tipos:
+        print(f"\n❌ Tipo inválido: '{tipo}'.")
+        return
+
+    resultados = estante.filtrar(nomes_dos_tipos.get(tipo.lower()), autor, titulo)
+    if not resultados:
+        print("\n⚠️ Nenhum item atende ao filtro.")
+        return
+
+    print(f"\n🔎 {len(resultados)} ITEM(NS) ENCONTRADO(S) 🔎")
+    print("-" * 30)
+    for item in resultados:
+        print(f"- [{item.__class__.__name__}] {item}")
+    print("-" * 30)
 
 # 5. EXECUÇÃO PRINCIPAL
 if __name__ == "__main__":
-    # Garante que o banco de dados e a tabela existam
-    setup_database()
-    
-    # Cria e carrega os itens da estante do DB
-    minha_estante = Estante()
+    # ESTANTE_INSTRUMENTACAO=1 mede as operações e mostra um resumo ao sair
+    instrumentacao.ativar_pelo_ambiente()
+
+    # Abre a conexão persistente e garante que a tabela exista.
+    # Outra estante: python banco_de_dados.py colecao_hq.db
+    # ESTANTE_SOMENTE_LEITURA=1 (ou =imutavel) só consulta: nada é carregado nem gravado
+    import sys
+    caminho = sys.argv[1] if len(sys.argv) > 1 else DB_NAME
+    somente_leitura, imutavel = modo_somente_leitura_do_ambiente()
+    if somente_leitura:
+        conexao = abrir_conexao(caminho, somente_leitura=True, imutavel=imutavel)
+    else:
+        conexao = abrir_conexao(caminho)
+        setup_database(conexao)
     
-    # Inicia o menu
-    exibir_menu(minha_estante)
+    # Cria e carrega os itens da estante do DB (a estante assume a conexão).
+    # ESTANTE_ESCRITA_ADIADA=1 agrupa as alterações em poucos commits (veja escrita_adiada.py)
+    with Estante(conexao, escrita_adiada=escrita_adiada.ativada_pelo_ambiente(),
+                 somente_leitura=somente_leitura) as minha_estante:
+        # Inicia o menu
+        exibir_menu(minha_estante)
+
+    if instrumentacao.esta_ativa():
+        print("\n" + instrumentacao.resumo())
@@ -0,0 +1,126 @@
+import sys
+import sqlite3
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# --- CACHE DE RESULTADOS DE CONSULTAS (LRU) ---
+# Guarda as listas de IDs devolvidas por buscas e filtros, indexadas pelos
+# parâmetros JÁ normalizados (a consulta FTS montada, o trecho WHERE e seus
+# parâmetros), então "Sandman", " sandman " e "SANDMAN" ocupam uma só entrada.
+#
+# Invalidação:
+#   - escritas desta estante: só as entradas que a mudança pode afetar são
+#     descartadas (a Estante avisa com registrar_insercao/registrar_remocao);
+#   - escritas de OUTRA conexão (outro processo, ou o TrabalhadorDB visto pela
+#     conexão de leitura da GUI): PRAGMA data_version muda e o cache é esvaziado.
+
+ORCAMENTO_CACHE_PADRAO = 8 * 1024 * 1024  # bytes (estimados) de todas as entradas juntas
+
+# Diz se um item novo poderia entrar no resultado de uma entrada
+Criterio = Callable[[Any], bool]
+
+
+class _Entrada:
+    __slots__ = ('ids', 'criterio', 'paginada', 'tamanho')
+
+    def __init__(self, ids: Tuple[str, ...], criterio: Criterio, paginada: bool, tamanho: int):
+        self.ids = ids
+        self.criterio = criterio
+        self.paginada = paginada
+        self.tamanho = tamanho
+
+
+class CacheDeConsultas:
+    """Cache LRU limitado por um orçamento de memória (em bytes).
+
+    orcamento_bytes=0 desliga o cache (toda consulta vai ao banco).
+    """
+
+    def __init__(self, obter_conexao: Callable[[], sqlite3.Connection],
+                 orcamento_bytes: int = ORCAMENTO_CACHE_PADRAO):
+        self._obter_conexao = obter_conexao
+        self.orcamento_bytes = orcamento_bytes
+        self._entradas: 'OrderedDict[Hashable, _Entrada]' = OrderedDict()
+        self._bytes = 0
+        self._versao_dados: Optional[int] = None
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def _conferir_versao_dados(self) -> None:
+        # data_version só muda quando OUTRA conexão confirma uma escrita
+        versao = self._obter_conexao().execute("PRAGMA data_version").fetchone()[0]
+        if versao != self._versao_dados:
+            if self._versao_dados is not None:
+                self.limpar()
+            self._versao_dados = versao
+
+    def obter(self, chave: Hashable) -> Optional[List[str]]:
+        """Devolve uma cópia dos IDs guardados, ou None (e conta um acerto/falha)."""
+        if self.orcamento_bytes <= 0:
+            self.falhas += 1
+            return None
+        self._conferir_versao_dados()
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            self.falhas += 1
+            return None
+        self._entradas.move_to_end(chave)
+        self.acertos += 1
+        return list(entrada.ids)
+
+    def guardar(self, chave: Hashable, ids: List[str], criterio: Criterio, paginada: bool = False) -> None:
+        """Guarda o resultado de uma consulta.
+
+        'criterio(item)' deve ser True para todo item novo que PODERIA
+        aparecer neste resultado (na dúvida, True). 'paginada' indica um
+        resultado com OFFSET, que muda com qualquer remoção anterior a ele.
+        """
+        if self.orcamento_bytes <= 0:
+            return
+        ids = tuple(ids)
+        tamanho = sys.getsizeof(ids) + sum(sys.getsizeof(item_id) for item_id in ids)
+        if tamanho > self.orcamento_bytes // 4:
+            return  # Um único resultado enorme expulsaria todos os outros
+        self._descartar(chave)
+        self._entradas[chave] = _Entrada(ids, criterio, paginada, tamanho)
+        self._bytes += tamanho
+        while self._bytes > self.orcamento_bytes:
+            self._descartar(next(iter(self._entradas)))
+
+    def _descartar(self, chave: Hashable) -> None:
+        entrada = self._entradas.pop(chave, None)
+        if entrada is not None:
+            self._bytes -= entrada.tamanho
+
+    def registrar_insercao(self, item: Any) -> None:
+        """Descarta os resultados em que o item novo poderia aparecer."""
+        afetadas = [chave for chave, entrada in self._entradas.items() if entrada.criterio(item)]
+        for chave in afetadas:
+            self._descartar(chave)
+        self.invalidacoes += len(afetadas)
+
+    def registrar_remocao(self, item_id: str) -> None:
+        """Descarta os resultados que continham o item (e as páginas com OFFSET)."""
+        afetadas = [chave for chave, entrada in self._entradas.items()
+                    if entrada.paginada or item_id in entrada.ids]
+        for chave in afetadas:
+            self._descartar(chave)
+        self.invalidacoes += len(afetadas)
+
+    def limpar(self) -> None:
+        self.invalidacoes += len(self._entradas)
+        self._entradas.clear()
+        self._bytes = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.acertos / consultas, 3) if consultas else 0.0,
+            'invalidacoes': self.invalidacoes,
+            'entradas': len(self._entradas),
+            'bytes': self._bytes,
+            'orcamento_bytes': self.orcamento_bytes,
+        }
@@ -0,0 +1,201 @@
+import sys
+import math
+import time
+import random
+import asyncio
+import subprocess
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from servidor_http import PORTA_PADRAO, LEITORES_PADRAO, ClienteHTTP
+
+# --- TESTE DE CARGA DO SERVIDOR HTTP ---
+# Abre N conexões (keep-alive) com um servidor_http.py em execução (ou inicia
+# um, com --iniciar) e dispara requisições durante D segundos. Cada conexão
+# espera a resposta antes de mandar a próxima, então N é o número de
+# requisições em andamento. A mistura padrão é só de leitura: listar, obter
+# pelo início do ID, buscar e filtrar, com IDs e palavras sorteados de uma
+# amostra da própria estante. --escritas 0.1 troca 10% delas por um par
+# adicionar + remover, o que deixa o tamanho da estante igual ao do começo.
+# Relata as requisições por segundo e as latências (p50, p90, p99 e máxima),
+# no total e por rota. O cliente e o servidor disputam a mesma CPU quando
+# rodam na mesma máquina: os números servem para comparar, não como limite.
+
+CONEXOES_PADRAO = 16
+DURACAO_PADRAO_S = 10.0
+AMOSTRA = 500
+ORDENS = ('id', 'titulo', 'autor')
+
+
+def percentil(ordenados: List[float], fracao: float) -> float:
+    """Percentil pelo posto mais próximo (ordenados em ordem crescente)."""
+    if not ordenados:
+        return 0.0
+    return ordenados[max(0, math.ceil(fracao * len(ordenados)) - 1)]
+
+
+class Carga:
+    """Gera as requisições e guarda as latências de cada rota."""
+
+    def __init__(self, host: str, porta: int, escritas: float, rng: random.Random):
+        self.host = host
+        self.porta = porta
+        self.escritas = escritas
+        self.rng = rng
+        self.ids: List[str] = []
+        self.palavras: List[str] = []
+        self.autores: List[str] = []
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.erros: Counter = Counter()
+
+    async def preparar(self) -> None:
+        """Sorteia a amostra de IDs, palavras de títulos e autores que as requisições usam."""
+        cliente = ClienteHTTP(self.host, self.porta)
+        try:
+            status, pagina = await cliente.requisitar('GET', f"/itens?ordem=titulo&limite={AMOSTRA}")
+        finally:
+            await cliente.fechar()
+        if status != 200 or not pagina['itens']:
+            raise SystemExit("❌ A estante do servidor está vazia (ou não respondeu): nada para testar.")
+        for linha in pagina['itens']:
+            self.ids.append(linha['id'])
+            self.palavras += [palavra for palavra in linha['titulo'].split() if len(palavra) > 3]
+            self.autores.append(linha['autor'])
+        self.palavras = self.palavras or [linha['titulo'] for linha in pagina['itens']]
+
+    def _requisicao_de_leitura(self) -> Tuple[str, str]:
+        rota = self.rng.choice(('listar', 'obter', 'buscar', 'filtrar'))
+        if rota == 'listar':
+            return rota, f"/itens?ordem={self.rng.choice(ORDENS)}&limite=50"
+        if rota == 'obter':
+            return rota, f"/itens/{self.rng.choice(self.ids)[:12]}"
+        if rota == 'buscar':
+            return rota, f"/busca?q={quote(self.rng.choice(self.palavras))}&limite=20"
+        autor = self.rng.choice(self.autores).split()[0]
+        return rota, '/itens?' + urlencode({'autor': autor, 'ordem': 'titulo', 'limite': 50})
+
+    async def _medir(self, cliente: ClienteHTTP, rota: str, metodo: str, caminho: str,
+                     dados: Any = None, esperado: int = 200) -> Optional[Any]:
+        inicio = time.perf_counter()
+        status, resposta = await cliente.requisitar(metodo, caminho, dados)
+        self.latencias[rota].append(time.perf_counter() - inicio)
+        if status != esperado:
+            self.erros[f"{rota} {status}"] += 1
+            return None
+        return resposta
+
+    async def conexao(self, fim: float, numero: int) -> None:
+        """Uma conexão: requisição após requisição até o prazo acabar."""
+        cliente = ClienteHTTP(self.host, self.porta)
+        sequencia = 0
+        try:
+            while time.perf_counter() < fim:
+                if self.rng.random() < self.escritas:
+                    sequencia += 1
+                    dados = {'tipo': 'Livro', 'titulo': f"Carga {numero}-{sequencia}",
+                             'autor': "Teste de Carga", 'paginas': sequencia}
+                    item = await self._medir(cliente, 'adicionar', 'POST', '/itens', dados, esperado=201)
+                    if item is not None:
+                        await self._medir(cliente, 'remover', 'DELETE', f"/itens/{item['id']}")
+                else:
+                    rota, caminho = self._requisicao_de_leitura()
+                    await self._medir(cliente, rota, 'GET', caminho)
+        finally:
+            await cliente.fechar()
+
+    async def executar(self, conexoes: int, duracao_s: float) -> float:
+        """Roda a carga; devolve o tempo decorrido em segundos."""
+        inicio = time.perf_counter()
+        await asyncio.gather(*(self.conexao(inicio + duracao_s, numero) for numero in range(conexoes)))
+        return time.perf_counter() - inicio
+
+    def relatorio(self, decorrido: float, conexoes: int) -> Dict[str, Dict[str, float]]:
+        """Imprime a tabela por rota e devolve os números (latências em ms)."""
+        linhas = {rota: sorted(tempos) for rota, tempos in sorted(self.latencias.items())}
+        linhas['total'] = sorted(tempo for tempos in self.latencias.values() for tempo in tempos)
+        resultado = {}
+        print(f"\n📈 {len(linhas['total'])} requisições em {decorrido:.1f} s com {conexoes} conexão(ões):")
+        print(f"   {'rota':<10}{'n':>8}{'req/s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'máx ms':>9}")
+        for rota, tempos in linhas.items():
+            resultado[rota] = {
+                'requisicoes': len(tempos),
+                'req_por_s': len(tempos) / decorrido,
+                'p50_ms': percentil(tempos, 0.50) * 1000,
+                'p90_ms': percentil(tempos, 0.90) * 1000,
+                'p99_ms': percentil(tempos, 0.99) * 1000,
+                'max_ms': (tempos[-1] if tempos else 0.0) * 1000,
+            }
+            numeros = resultado[rota]
+            print(f"   {rota:<10}{numeros['requisicoes']:>8}{numeros['req_por_s']:>10.1f}{numeros['p50_ms']:>9.2f}"
+                  f"{numeros['p90_ms']:>9.2f}{numeros['p99_ms']:>9.2f}{numeros['max_ms']:>9.2f}")
+        if self.erros:
+            print("⚠️ Respostas inesperadas: " + ', '.join(f"{chave}: {n}" for chave, n in self.erros.most_common()))
+        return resultado
+
+
+def iniciar_servidor(db: str, porta: int, leitores: int) -> subprocess.Popen:
+    """Sobe servidor_http.py num subprocesso e espera a porta aceitar conexões."""
+    import os
+    import socket
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servidor_http.py')
+    processo = subprocess.Popen([sys.executable, script, 'servir', '--db', db, '--porta', str(porta),
+                                 '--leitores', str(leitores)], stdout=subprocess.DEVNULL)
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise SystemExit(f"❌ O servidor terminou ao iniciar (código {processo.returncode}).")
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=0.5).close()
+            return processo
+        except OSError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise SystemExit("❌ O servidor não começou a aceitar conexões em 30 s.")
+
+
+# --- EXECUÇÃO PELA LINHA DE COMANDO ---
+# Exemplos:
+#   python servidor_http.py servir --db estante_virtual.db &    # num terminal...
+#   python carga_http.py --conexoes 16 --duracao 10             # ...e a carga em outro
+#   python carga_http.py --iniciar --db estante_virtual.db --leitores 4 --escritas 0.05
+if __name__ == "__main__":
+    import json
+    import argparse
+    from banco_de_dados import DB_NAME
+
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor HTTP da Estante Virtual.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--conexoes', type=int, default=CONEXOES_PADRAO, help="requisições em andamento")
+    parser.add_argument('--duracao', type=float, default=DURACAO_PADRAO_S, help="segundos de carga")
+    parser.add_argument('--escritas', type=float, default=0.0,
+                        help="fração das requisições trocada por adicionar + remover (0 a 1)")
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--iniciar', action='store_true', help="sobe um servidor local para o teste")
+    parser.add_argument('--db', default=DB_NAME, help="banco do servidor iniciado com --iniciar")
+    parser.add_argument('--leitores', type=int, default=LEITORES_PADRAO,
+                        help="conexões de leitura do servidor iniciado com --iniciar")
+    parser.add_argument('--saida', help="grava os números também num arquivo JSON")
+    args = parser.parse_args()
+
+    processo = iniciar_servidor(args.db, args.porta, args.leitores) if args.iniciar else None
+    try:
+        carga = Carga(args.host, args.porta, args.escritas, random.Random(args.semente))
+        try:
+            asyncio.run(carga.preparar())
+        except OSError as erro:
+            raise SystemExit(f"❌ Não foi possível conectar a {args.host}:{args.porta}: {erro}")
+        print(f"\n⏱️ {args.conexoes} conexão(ões) por {args.duracao:.0f} s contra http://{args.host}:{args.porta}"
+              f" ({args.escritas:.0%} de escritas)...")
+        decorrido = asyncio.run(carga.executar(args.conexoes, args.duracao))
+        resultado = carga.relatorio(decorrido, args.conexoes)
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as arquivo:
+                json.dump({'conexoes': args.conexoes, 'escritas': args.escritas, 'rotas': resultado},
+                          arquivo, ensure_ascii=False, indent=2)
+            print(f"💾 Resultado salvo em '{args.saida}'.")
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
@@ -0,0 +1,10 @@
+# --- NOMES COMPARTILHADOS ---
+# Sem dependências (nem sqlite3): a linha de comando monta os argumentos com
+# eles sem importar banco_de_dados, que os usa como chaves de TIPOS_DE_ITEM e
+# CHAVES_DE_ORDENACAO.
+
+# Tipos de item, na ordem em que aparecem nas listas e menus
+TIPOS = ('Livro', 'Revista', 'HQ')
+
+# Ordenações da lista (cabeçalhos clicáveis, --ordem da linha de comando)
+ORDENS = ('id', 'tipo', 'titulo', 'autor')
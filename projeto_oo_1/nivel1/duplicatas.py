@@ -0,0 +1,263 @@
+import os
+import re
+import sqlite3
+import argparse
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# --- DETECÇÃO DE ITENS DUPLICADOS ---
+# Cada item tem uma "impressão digital": tipo + autor + título normalizados
+# (sem maiúsculas, acentos nem pontuação) + o campo próprio do tipo. Dois itens
+# com a mesma impressão são o mesmo item cadastrado duas vezes. As impressões
+# ficam na tabela 'impressoes' (migração 6), com índice, então conferir uma
+# inserção é uma única busca no índice.
+#
+# A ordem dos campos (tipo|autor|extra|título) é proposital: percorrendo o
+# índice em ordem, os itens de mesmo tipo, autor e campo extra chegam juntos,
+# e é só entre eles que o relatório procura títulos PARECIDOS (erros de digitação).
+
+SEPARADOR = '|'
+
+# Campo que diferencia dois itens de mesmo título e autor, por tipo
+CAMPO_EXTRA = {'Livro': 'paginas', 'Revista': 'edicao', 'HQ': 'desenhista'}
+
+# Similaridade mínima entre títulos (de 0 a 1) para o relatório aproximado.
+# Um erro de digitação num título de 12 letras já leva a similaridade a ~0.7.
+LIMIAR_PADRAO = 0.6
+
+# Itens enviados a cada tarefa do pool de processos (grupos inteiros)
+ITENS_POR_TAREFA = 20000
+
+# Grupos maiores que isto são subdivididos pela primeira palavra do título
+# (a comparação dentro do grupo é par a par)
+MAXIMO_GRUPO = 2000
+
+
+_PALAVRA = re.compile(r'[^\W_]+')
+
+@lru_cache(maxsize=65536)  # autores, tipos e campos extras se repetem muito
+def _normalizar_texto(texto: str) -> str:
+    if texto.isascii():
+        return ' '.join(_PALAVRA.findall(texto.lower()))
+    dobrado = unicodedata.normalize('NFKD', texto.casefold())
+    return ' '.join(_PALAVRA.findall(''.join(c for c in dobrado if not unicodedata.combining(c))))
+
+def normalizar(texto: Any) -> str:
+    """Minúsculas, sem acentos e só com letras/números separados por um espaço."""
+    return _normalizar_texto(str(texto or ''))
+
+def impressao_digital(dados: Dict[str, Any]) -> str:
+    """Chave normalizada de um item (dicionário no formato de ItemDeLeitura.to_dict)."""
+    tipo = dados.get('tipo') or ''
+    extra = dados.get(CAMPO_EXTRA.get(tipo, ''))
+    return SEPARADOR.join((normalizar(tipo), normalizar(dados.get('autor')), normalizar(extra),
+                           normalizar(dados.get('titulo'))))
+
+def completar_impressoes(conn: sqlite3.Connection, tamanho_lote: int = 5000,
+                         ao_progredir: Optional[Callable[[int], None]] = None) -> int:
+    """Calcula as impressões que faltam (itens gravados por fora da Estante, ou
+    alterados: o gatilho de UPDATE apaga a impressão antiga). Retorna quantas.
+
+    'ao_progredir' recebe quantos itens já foram conferidos.
+    """
+    # Cada item tem no máximo uma impressão (e os gatilhos apagam as órfãs):
+    # com as contagens iguais, não falta nenhuma
+    if conn.execute("SELECT (SELECT COUNT(*) FROM itens) = (SELECT COUNT(*) FROM impressoes)").fetchone()[0]:
+        return 0
+    feitos = lidos = ultimo_rowid = 0
+    while True:
+        # Segue o rowid (cada linha é lida uma vez só), pulando as que já têm impressão
+        linhas = conn.execute("""
+            SELECT rowid, id, tipo, titulo, autor, paginas, edicao, desenhista,
+                   EXISTS (SELECT 1 FROM impressoes WHERE impressoes.item_id = itens.id)
+            FROM itens WHERE rowid > ? ORDER BY rowid LIMIT ?
+        """, (ultimo_rowid, tamanho_lote)).fetchall()
+        if not linhas:
+            return feitos
+        ultimo_rowid = linhas[-1][0]
+        lidos += len(linhas)
+        faltando = [(item_id, impressao_digital({'tipo': tipo, 'titulo': titulo, 'autor': autor,
+                                                 'paginas': paginas, 'edicao': edicao, 'desenhista': desenhista}))
+                    for _, item_id, tipo, titulo, autor, paginas, edicao, desenhista, existe in linhas
+                    if not existe]
+        conn.executemany("INSERT INTO impressoes(item_id, impressao) VALUES (?, ?)", faltando)
+        feitos += len(faltando)
+        if ao_progredir:
+            ao_progredir(lidos)
+
+
+# --- RELATÓRIO DE GRUPOS DE DUPLICATAS ---
+def _ler_grupos(conn: sqlite3.Connection) -> Iterator[List[Tuple[str, str]]]:
+    """Percorre o índice de impressões em ordem, entregando (impressao, item_id)
+    de um mesmo tipo+autor+extra por vez (memória limitada ao maior grupo)."""
+    grupo: List[Tuple[str, str]] = []
+    chave_atual = None
+    for impressao, item_id in conn.execute("SELECT impressao, item_id FROM impressoes ORDER BY impressao"):
+        chave = impressao.rsplit(SEPARADOR, 1)[0]
+        if chave != chave_atual and grupo:
+            yield grupo
+            grupo = []
+        chave_atual = chave
+        grupo.append((impressao, item_id))
+    if grupo:
+        yield grupo
+
+def _subdividir(grupo: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    if len(grupo) <= MAXIMO_GRUPO:
+        return [grupo]
+    partes: Dict[str, List[Tuple[str, str]]] = {}
+    for impressao, item_id in grupo:
+        titulo = impressao.rsplit(SEPARADOR, 1)[1]
+        partes.setdefault(titulo.split(' ', 1)[0], []).append((impressao, item_id))
+    return list(partes.values())
+
+def _trigramas_do_titulo(titulo: str) -> frozenset:
+    marcado = f"  {titulo} "
+    return frozenset(marcado[i:i + 3] for i in range(len(marcado) - 2))
+
+def _agrupar_parecidos(grupos: List[List[Tuple[str, str]]], limiar: float) -> List[List[str]]:
+    """Executado nos processos do pool: dentro de cada grupo (mesmo tipo, autor e
+    campo extra), une os itens cujos títulos têm similaridade >= limiar
+    (Jaccard dos trigramas do título inteiro) e os mesmos números ("Volume 1"
+    e "Volume 2" são itens diferentes, por mais parecidos que sejam)."""
+    encontrados = []
+    for grupo in grupos:
+        # Itens de impressão idêntica entram juntos; a comparação é entre impressões distintas
+        por_numeros: Dict[Tuple[str, ...], Dict[str, List[str]]] = {}
+        for impressao, item_id in grupo:
+            numeros = tuple(re.findall(r'\d+', impressao.rsplit(SEPARADOR, 1)[1]))
+            por_numeros.setdefault(numeros, {}).setdefault(impressao, []).append(item_id)
+        for por_impressao in por_numeros.values():
+            encontrados.extend(_unir_parecidos(por_impressao, limiar))
+    return encontrados
+
+def _unir_parecidos(por_impressao: Dict[str, List[str]], limiar: float) -> List[List[str]]:
+    if len(por_impressao) < 2:
+        return [ids for ids in por_impressao.values() if len(ids) > 1]
+    # Em ordem de tamanho: |A ∩ B| / |A ∪ B| <= |A| / |B|, então para cada
+    # título só os seguintes com até |A| / limiar trigramas podem ser parecidos
+    trigramas = sorted(((_trigramas_do_titulo(impressao.rsplit(SEPARADOR, 1)[1]), impressao)
+                        for impressao in por_impressao), key=lambda par: len(par[0]))
+    pai = list(range(len(trigramas)))
+
+    def raiz(i: int) -> int:
+        while pai[i] != i:
+            pai[i] = pai[pai[i]]
+            i = pai[i]
+        return i
+
+    for i, (conjunto, _) in enumerate(trigramas):
+        maximo = len(conjunto) / limiar
+        for j in range(i + 1, len(trigramas)):
+            outro = trigramas[j][0]
+            if len(outro) > maximo:
+                break
+            comuns = len(conjunto & outro)
+            if comuns / (len(conjunto) + len(outro) - comuns) >= limiar:
+                pai[raiz(j)] = raiz(i)
+
+    conjuntos: Dict[int, List[str]] = {}
+    for i, (_, impressao) in enumerate(trigramas):
+        conjuntos.setdefault(raiz(i), []).extend(por_impressao[impressao])
+    return [ids for ids in conjuntos.values() if len(ids) > 1]
+
+def agrupar_duplicatas(conn: sqlite3.Connection, aproximado: bool = False, limiar: float = LIMIAR_PADRAO,
+                       processos: Optional[int] = None,
+                       ao_progredir: Optional[Callable[[int], None]] = None) -> List[List[str]]:
+    """Devolve os grupos de IDs de itens duplicados (cada grupo com 2 ou mais).
+
+    Sem 'aproximado', um grupo é formado por impressões idênticas (um GROUP BY
+    sobre o índice). Com 'aproximado', também se juntam itens de mesmo
+    tipo, autor e campo extra com títulos parecidos; essa comparação
+    par a par é dividida entre 'processos' processos (padrão: um por CPU).
+    """
+    completar_impressoes(conn)
+    if not aproximado:
+        # GROUP BY direto no índice idx_impressoes (já ordenado pela impressão).
+        # Os IDs voltam um por linha e são agrupados aqui: group_concat os
+        # juntaria com vírgulas, e um ID importado pode conter vírgula
+        linhas = conn.execute("""
+            SELECT impressao, item_id FROM impressoes
+            WHERE impressao IN (SELECT impressao FROM impressoes GROUP BY impressao HAVING COUNT(*) > 1)
+            ORDER BY impressao
+        """)
+        return [[item_id for _, item_id in grupo] for _, grupo in groupby(linhas, key=itemgetter(0))]
+
+    # Importado só aqui: o multiprocessing pesa na abertura de quem importa este módulo
+    from concurrent.futures import ProcessPoolExecutor
+    grupos = []
+    processos = processos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        pendentes: deque = deque()
+        tarefa: List[List[Tuple[str, str]]] = []
+        itens_na_tarefa = lidos = 0
+
+        def recolher(limite: int) -> None:
+            # Mantém poucas tarefas em andamento: a memória não cresce com o banco
+            while len(pendentes) > limite:
+                grupos.extend(pendentes.popleft().result())
+
+        for grupo in _ler_grupos(conn):
+            lidos += len(grupo)
+            if len(grupo) < 2:
+                continue
+            tarefa.extend(_subdividir(grupo))
+            itens_na_tarefa += len(grupo)
+            if itens_na_tarefa >= ITENS_POR_TAREFA:
+                pendentes.append(pool.submit(_agrupar_parecidos, tarefa, limiar))
+                tarefa, itens_na_tarefa = [], 0
+                recolher(2 * processos)
+                if ao_progredir:
+                    ao_progredir(lidos)
+        if tarefa:
+            pendentes.append(pool.submit(_agrupar_parecidos, tarefa, limiar))
+        recolher(0)
+    return grupos
+
+
+# --- EXECUÇÃO PELO TERMINAL ---
+# Exemplos:
+#   python duplicatas.py                          # itens com impressão idêntica
+#   python duplicatas.py --aproximado --limiar 0.8 --processos 8
+#   python duplicatas.py --aproximado --saida duplicatas.jsonl
+if __name__ == "__main__":
+    import json
+    import time
+
+    from banco_de_dados import DB_NAME, abrir_conexao, Estante
+
+    parser = argparse.ArgumentParser(description="Relatório de itens duplicados da Estante Virtual.")
+    parser.add_argument('--db', default=DB_NAME, help="banco de dados a analisar")
+    parser.add_argument('--aproximado', action='store_true', help="inclui títulos parecidos (erros de digitação)")
+    parser.add_argument('--limiar', type=float, default=LIMIAR_PADRAO, help="similaridade mínima dos títulos")
+    parser.add_argument('--processos', type=int, default=None, help="processos do pool (padrão: CPUs)")
+    parser.add_argument('--saida', help="grava os grupos em JSONL (um grupo de itens por linha)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    with Estante(abrir_conexao(args.db), carregar=False) as estante:
+        grupos = agrupar_duplicatas(
+            estante._get_db_connection(), args.aproximado, args.limiar, args.processos,
+            ao_progredir=lambda n: print(f"\r🔎 {n} item(ns) analisado(s)", end='', flush=True))
+        repetidos = sum(len(grupo) - 1 for grupo in grupos)
+        print(f"\n🧬 {len(grupos)} grupo(s) de duplicatas ({repetidos} item(ns) sobrando) "
+              f"em {time.perf_counter() - inicio:.1f} s.")
+
+        saida = open(args.saida, 'w', encoding='utf-8') if args.saida else None
+        for numero, grupo in enumerate(grupos, start=1):
+            itens = estante.carregar_itens_por_ids(grupo)
+            if saida:
+                saida.write(json.dumps([item.to_dict() for item in itens], ensure_ascii=False) + '\n')
+            elif numero <= 50:
+                print(f"\nGrupo {numero}:")
+                for item in itens:
+                    print(f"  - [{item.__class__.__name__}] {item}")
+        if saida:
+            saida.close()
+            print(f"📄 Grupos gravados em '{args.saida}'.")
+        elif len(grupos) > 50:
+            print(f"\n... e mais {len(grupos) - 50} grupo(s) (use --saida para ver todos).")
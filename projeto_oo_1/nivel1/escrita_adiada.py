@@ -0,0 +1,151 @@
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# --- ESCRITA ADIADA (GROUP COMMIT) E HISTÓRICO PARA DESFAZER/REFAZER ---
+# Sem escrita adiada, cada adicionar_item/remover_item faz o seu próprio
+# COMMIT (e paga o seu próprio fsync). Com ela, a Estante mantém UMA transação
+# aberta na sua conexão: cada alteração vira um SAVEPOINT dentro dela e o
+# diário abaixo anota o que ainda não foi confirmado. O COMMIT acontece:
+#   - quando há LIMITE_PADRAO alterações pendentes;
+#   - quando a mais antiga tem mais de INTERVALO_PADRAO_S segundos (conferido
+#     a cada alteração e pelo temporizador da aplicação: after() na GUI, o
+#     laço do menu no terminal);
+#   - antes de uma importação em lote;
+#   - sempre em Estante.fechar() (também no 'with' e ao sair do interpretador).
+#
+# Garantias em caso de queda (o processo morre sem chegar a fechar a estante):
+#   - o que já passou por um COMMIT está no WAL e sobrevive;
+#   - o que estava pendente é perdido POR INTEIRO: na próxima abertura o
+#     SQLite descarta do WAL a transação não confirmada, então o banco nunca
+#     fica com só uma parte de um grupo (nem com um item sem seus índices);
+#   - a perda máxima é o que coube em um grupo (LIMITE_PADRAO alterações ou
+#     INTERVALO_PADRAO_S segundos de trabalho).
+# Enquanto o grupo está aberto, a própria Estante já enxerga as alterações
+# (mesma conexão); outras conexões só as veem depois do COMMIT.
+#
+# O histórico de desfazer/refazer vale com ou sem escrita adiada: desfazer
+# aplica a operação inversa (remover o que foi adicionado, devolver com o
+# mesmo ID o que foi removido), que é gravada como qualquer outra alteração.
+
+INTERVALO_PADRAO_S = 2.0
+LIMITE_PADRAO = 500
+LIMITE_HISTORICO = 100  # operações que podem ser desfeitas
+
+# Se definida (e diferente de '0'), liga a escrita adiada nos aplicativos
+VARIAVEL_AMBIENTE = 'ESTANTE_ESCRITA_ADIADA'
+
+ADICIONAR = 'adicionar'
+REMOVER = 'remover'
+
+
+class Operacao:
+    """Uma alteração da estante, com os dados completos do item (para desfazê-la)."""
+
+    __slots__ = ('tipo', 'dados')
+
+    def __init__(self, tipo: str, dados: Dict[str, Any]):
+        self.tipo = tipo
+        self.dados = dados
+
+    def inversa(self) -> 'Operacao':
+        return Operacao(REMOVER if self.tipo == ADICIONAR else ADICIONAR, self.dados)
+
+    def __repr__(self) -> str:
+        return f"Operacao({self.tipo!r}, {self.dados.get('titulo')!r})"
+
+
+class DiarioDeEscritas:
+    """Alterações ainda não confirmadas no banco e pilhas de desfazer/refazer."""
+
+    def __init__(self, adiado: bool = False, intervalo_s: float = INTERVALO_PADRAO_S,
+                 limite_operacoes: int = LIMITE_PADRAO, limite_historico: int = LIMITE_HISTORICO):
+        self.adiado = adiado
+        self.intervalo_s = intervalo_s
+        self.limite_operacoes = limite_operacoes
+        self.pendentes: List[Operacao] = []
+        self._inicio_pendentes: Optional[float] = None
+        self._desfazer: Deque[Operacao] = deque(maxlen=limite_historico)
+        self._refazer: List[Operacao] = []
+        self._gravando_historico = True
+        self.grupos_confirmados = 0
+
+    def registrar(self, operacao: Operacao) -> None:
+        """Anota uma alteração já aplicada (na transação aberta, se adiado)."""
+        if self.adiado:
+            if not self.pendentes:
+                self._inicio_pendentes = time.monotonic()
+            self.pendentes.append(operacao)
+        if self._gravando_historico:
+            self._desfazer.append(operacao)
+            self._refazer.clear()
+
+    def precisa_descarregar(self) -> bool:
+        if not self.pendentes:
+            return False
+        return (len(self.pendentes) >= self.limite_operacoes
+                or time.monotonic() - self._inicio_pendentes >= self.intervalo_s)
+
+    def marcar_confirmado(self) -> List[Operacao]:
+        """Chamado após o COMMIT: esvazia e devolve as alterações confirmadas."""
+        confirmadas, self.pendentes = self.pendentes, []
+        self._inicio_pendentes = None
+        if confirmadas:
+            self.grupos_confirmados += 1
+        return confirmadas
+
+    def descartar_pendentes(self) -> List[Operacao]:
+        """Chamado após um ROLLBACK do grupo: as alterações pendentes se perderam."""
+        perdidas = self.marcar_confirmado()
+        if perdidas:
+            self.grupos_confirmados -= 1
+            # O histórico não pode desfazer o que já não existe no banco
+            self._desfazer.clear()
+            self._refazer.clear()
+        return perdidas
+
+    # Desfazer/refazer: quem aplica a operação é a Estante
+    def proxima_a_desfazer(self) -> Optional[Operacao]:
+        return self._desfazer.pop() if self._desfazer else None
+
+    def proxima_a_refazer(self) -> Optional[Operacao]:
+        return self._refazer.pop() if self._refazer else None
+
+    def guardar_desfeita(self, operacao: Operacao) -> None:
+        self._refazer.append(operacao)
+
+    def guardar_refeita(self, operacao: Operacao) -> None:
+        self._desfazer.append(operacao)
+
+    @property
+    def pode_desfazer(self) -> bool:
+        return bool(self._desfazer)
+
+    @property
+    def pode_refazer(self) -> bool:
+        return bool(self._refazer)
+
+    @contextmanager
+    def sem_historico(self) -> Iterator[None]:
+        """As alterações feitas dentro do bloco não entram nas pilhas (ex.: a inversa de um desfazer)."""
+        anterior, self._gravando_historico = self._gravando_historico, False
+        try:
+            yield
+        finally:
+            self._gravando_historico = anterior
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            'adiado': self.adiado,
+            'pendentes': len(self.pendentes),
+            'grupos_confirmados': self.grupos_confirmados,
+            'desfazer': len(self._desfazer),
+            'refazer': len(self._refazer),
+        }
+
+
+def ativada_pelo_ambiente() -> bool:
+    """True se ESTANTE_ESCRITA_ADIADA estiver definida (e não for '0')."""
+    return os.environ.get(VARIAVEL_AMBIENTE, '0') not in ('', '0')
@@ -0,0 +1,114 @@
+import os
+import csv
+import json
+import sqlite3
+import argparse
+from typing import Optional, Callable
+
+from banco_de_dados import DB_NAME, COLUNAS_ITENS, abrir_conexao, Estante
+
+# --- EXPORTAÇÃO EM STREAMING ---
+# Os itens são lidos do cursor e escritos um a um (via ItemDeLeitura.to_dict),
+# sem passar por Estante.itens: a memória usada não depende do tamanho do banco.
+
+def exportar_jsonl(estante: Estante, caminho: str,
+                   ao_progredir: Optional[Callable[[int], None]] = None) -> int:
+    """Escreve um objeto JSON por linha. Retorna quantos itens foram exportados."""
+    total = 0
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        for item in estante.iterar_itens_db():
+            arquivo.write(json.dumps(item.to_dict(), ensure_ascii=False))
+            arquivo.write('\n')
+            total += 1
+            if ao_progredir and total % 10000 == 0:
+                ao_progredir(total)
+    return total
+
+def exportar_csv(estante: Estante, caminho: str,
+                 ao_progredir: Optional[Callable[[int], None]] = None) -> int:
+    """Escreve um CSV com cabeçalho (o mesmo formato aceito pela importação)."""
+    total = 0
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS_ITENS)
+        escritor.writeheader()
+        for item in estante.iterar_itens_db():
+            escritor.writerow(item.to_dict())
+            total += 1
+            if ao_progredir and total % 10000 == 0:
+                ao_progredir(total)
+    return total
+
+def exportar(estante: Estante, caminho: str,
+             ao_progredir: Optional[Callable[[int], None]] = None) -> int:
+    """Escolhe o formato pela extensão do arquivo (.csv ou .jsonl/.json)."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.csv':
+        return exportar_csv(estante, caminho, ao_progredir)
+    if extensao in ('.jsonl', '.json'):
+        return exportar_jsonl(estante, caminho, ao_progredir)
+    raise ValueError(f"Formato não suportado: '{extensao}' (use .csv ou .jsonl).")
+
+def exigir_banco_existente(db_path: str) -> None:
+    """Recusa um banco de origem que não existe (o sqlite3 criaria um vazio no lugar)."""
+    if not os.path.isfile(db_path):
+        raise FileNotFoundError(f"O banco de dados '{db_path}' não existe.")
+
+# --- BACKUP ONLINE ---
+def fazer_backup(destino: str, db_path: str = DB_NAME, paginas_por_passo: int = 1024,
+                 ao_progredir: Optional[Callable[[int, int], None]] = None) -> None:
+    """Copia o banco em uso para 'destino' com a API de backup do SQLite.
+
+    A cópia é feita em passos de 'paginas_por_passo' páginas por uma conexão
+    própria; entre um passo e outro os bloqueios são liberados, então uma
+    EstanteApp aberta continua lendo e gravando normalmente. Se o banco for
+    alterado por outra conexão no meio do backup, o SQLite recomeça a cópia
+    para que o arquivo final seja sempre consistente.
+
+    A origem é aberta somente para leitura (mode=ro): um caminho errado não
+    cria um banco vazio e o modo de journal do arquivo não é alterado.
+    """
+    exigir_banco_existente(db_path)
+    origem = abrir_conexao(db_path, somente_leitura=True)
+    copia = sqlite3.connect(destino)
+    try:
+        def progresso(status, restantes, total):
+            if ao_progredir:
+                ao_progredir(total - restantes, total)
+
+        origem.backup(copia, pages=paginas_por_passo, progress=progresso)
+    finally:
+        copia.close()
+        origem.close()
+
+
+# --- EXECUÇÃO PELA LINHA DE COMANDO ---
+# Exemplos:
+#   python exportacao.py exportar colecao.jsonl
+#   python exportacao.py backup copia_estante.db --paginas 2048
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta ou faz backup da Estante Virtual.")
+    parser.add_argument('--db', default=DB_NAME, help="banco de dados de origem")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_exportar = subcomandos.add_parser('exportar', help="exporta os itens para .csv ou .jsonl")
+    parser_exportar.add_argument('arquivo')
+
+    parser_backup = subcomandos.add_parser('backup', help="copia o banco em uso para outro arquivo")
+    parser_backup.add_argument('destino')
+    parser_backup.add_argument('--paginas', type=int, default=1024, help="páginas copiadas por passo")
+    args = parser.parse_args()
+
+    try:
+        exigir_banco_existente(args.db)
+    except FileNotFoundError as erro:
+        raise SystemExit(f"❌ {erro}")
+    if args.comando == 'exportar':
+        with Estante(abrir_conexao(args.db), carregar=False) as estante:
+            total = exportar(estante, args.arquivo,
+                             ao_progredir=lambda n: print(f"\r📤 {n} item(ns) exportado(s)", end='', flush=True))
+        print(f"\n📤 {total} item(ns) exportado(s) para '{args.arquivo}'.")
+    else:
+        fazer_backup(args.destino, args.db, args.paginas,
+                     ao_progredir=lambda feitas, total: print(f"\r💾 {feitas}/{total} páginas copiadas",
+                                                              end='', flush=True))
+        print(f"\n💾 Backup salvo em '{args.destino}'.")
@@ -0,0 +1,65 @@
+import os
+import csv
+import json
+import argparse
+from typing import Dict, Any, Iterator
+
+from banco_de_dados import DB_NAME, abrir_conexao, setup_database, Estante, ResultadoImportacao
+
+# --- LEITORES EM STREAMING ---
+# Os leitores são geradores: cada linha do arquivo é lida, convertida e
+# entregue à Estante sem que o arquivo inteiro seja carregado na memória.
+
+def ler_csv(caminho: str) -> Iterator[Dict[str, Any]]:
+    """Lê um CSV com cabeçalho (tipo, titulo, autor, paginas, edicao, mes_publicacao, desenhista)."""
+    with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+        yield from csv.DictReader(arquivo)
+
+def ler_jsonl(caminho: str) -> Iterator[Any]:
+    """Lê um arquivo JSONL (um objeto JSON por linha), ignorando linhas em branco.
+
+    Linhas com JSON inválido são entregues como texto para que a importação
+    as registre como erro sem interromper o restante do arquivo.
+    """
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                yield linha
+
+def ler_arquivo(caminho: str) -> Iterator[Any]:
+    """Escolhe o leitor pela extensão do arquivo (.csv ou .jsonl/.json)."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.csv':
+        return ler_csv(caminho)
+    if extensao in ('.jsonl', '.json'):
+        return ler_jsonl(caminho)
+    raise ValueError(f"Formato não suportado: '{extensao}' (use .csv ou .jsonl).")
+
+def mostrar_progresso(resultado: ResultadoImportacao) -> None:
+    """Mostra o andamento da importação na mesma linha do terminal."""
+    print(f"\r📥 {resultado.processados} lido(s), {resultado.importados} importado(s), "
+          f"{resultado.total_erros} erro(s)", end='', flush=True)
+
+
+# --- EXECUÇÃO PELA LINHA DE COMANDO ---
+# Exemplo: python importacao.py catalogo.csv --lote 10000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa itens de um CSV ou JSONL para a Estante Virtual.")
+    parser.add_argument('arquivo', help="arquivo .csv ou .jsonl")
+    parser.add_argument('--db', default=DB_NAME, help="banco de dados de destino")
+    parser.add_argument('--lote', type=int, default=5000, help="itens gravados por transação")
+    args = parser.parse_args()
+
+    conexao = abrir_conexao(args.db)
+    setup_database(conexao)
+    with Estante(conexao, carregar=False) as estante:
+        resultado = estante.importar_em_lote(ler_arquivo(args.arquivo), tamanho_lote=args.lote,
+                                             ao_progredir=mostrar_progresso)
+
+    for numero, mensagem in resultado.erros:
+        print(f"  ⚠️ Registro {numero}: {mensagem}")
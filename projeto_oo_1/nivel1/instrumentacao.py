@@ -0,0 +1,343 @@
+import os
+import io
+import time
+import threading
+import functools
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# --- INSTRUMENTAÇÃO (OPCIONAL) ---
+# Mede quantas vezes cada operação roda, quanto tempo leva (histograma),
+# quantas linhas do banco ela tocou e quanto tempo cada comando SQL levou.
+#
+# Desligada, custa NADA: os métodos originais ficam intactos. ativar() troca os
+# métodos registrados por versões medidas e desativar() devolve os originais.
+# Também pode ser ligada por variáveis de ambiente (veja ativar_pelo_ambiente):
+#   ESTANTE_INSTRUMENTACAO=1 ESTANTE_LIMITE_LENTO_MS=50 python gui_estante_virtual.py
+
+# Limites superiores (ms) das faixas do histograma; a última faixa é "acima de 5 s"
+LIMITES_HISTOGRAMA_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Métodos medidos nas classes de banco_de_dados (que se registram ao serem importadas)
+METODOS_ESTANTE = (
+    '_carregar_itens_db', 'primeiras_linhas', 'contar_itens', 'obter_item', 'resolver_prefixo',
+    'carregar_item_db', 'sincronizar_com_db', 'adicionar_item', 'remover_item', 'importar_em_lote',
+    'listar_todos', 'buscar_ids', 'buscar_aproximado_ids', 'filtrar_ids', 'filtrar', 'itens_do_tipo',
+    'carregar_itens_por_ids', 'buscar_por_titulo', 'exibir_detalhes_por_tipo', 'reconstruir_indice_busca',
+    'estatisticas', 'recalcular_estatisticas', 'descarregar', 'desfazer', 'refazer',
+)
+METODOS_PAGINADOR = ('invalidar', 'linhas')
+
+
+class Estatistica:
+    """Números acumulados de uma operação (ou de um comando SQL)."""
+    __slots__ = ('chamadas', 'total_ms', 'maximo_ms', 'linhas', 'erros', 'histograma')
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total_ms = 0.0
+        self.maximo_ms = 0.0
+        self.linhas = 0
+        self.erros = 0
+        self.histograma = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+
+    def registrar(self, ms: float, linhas: int = 0, erro: bool = False) -> None:
+        self.chamadas += 1
+        self.total_ms += ms
+        self.maximo_ms = max(self.maximo_ms, ms)
+        self.linhas += linhas
+        self.erros += erro
+        faixa = 0
+        while faixa < len(LIMITES_HISTOGRAMA_MS) and ms > LIMITES_HISTOGRAMA_MS[faixa]:
+            faixa += 1
+        self.histograma[faixa] += 1
+
+    def percentil(self, fracao: float) -> float:
+        """Estimativa pelo histograma: o limite superior da faixa do percentil."""
+        alvo = fracao * self.chamadas
+        acumulado = 0
+        for faixa, quantidade in enumerate(self.histograma):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                return LIMITES_HISTOGRAMA_MS[faixa] if faixa < len(LIMITES_HISTOGRAMA_MS) else self.maximo_ms
+        return 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'chamadas': self.chamadas,
+            'total_ms': round(self.total_ms, 3),
+            'media_ms': round(self.total_ms / self.chamadas, 3) if self.chamadas else 0.0,
+            'maximo_ms': round(self.maximo_ms, 3),
+            'p50_ms': self.percentil(0.5),
+            'p95_ms': self.percentil(0.95),
+            'p99_ms': self.percentil(0.99),
+            'linhas': self.linhas,
+            'erros': self.erros,
+            'histograma': dict(zip([f"<={limite}" for limite in LIMITES_HISTOGRAMA_MS] + ['>5000'],
+                                   self.histograma)),
+        }
+
+
+class _Estado:
+    def __init__(self):
+        self.ativa = False
+        self.limite_lento_ms = 100.0
+        self.medir_sql = True
+        self.operacoes: Dict[str, Estatistica] = {}
+        self.sql: Dict[str, Estatistica] = {}
+        self.lentas: Deque[Tuple[str, str, float, int]] = deque(maxlen=50)
+        # (operação, arquivo .prof, linhas do relatório) da próxima execução a perfilar
+        self.perfilar: Optional[Tuple[str, str, int]] = None
+        self.trava = threading.Lock()
+        self.alvos: List[Tuple[type, Tuple[str, ...], str]] = []
+        self.classes_com_conexao: List[type] = []
+        self.originais: Dict[Tuple[type, str], Callable] = {}
+
+_estado = _Estado()
+# Linhas lidas/alteradas pela thread atual (as operações guardam o valor inicial)
+_local = threading.local()
+
+def _contar_linhas(quantidade: int) -> None:
+    _local.linhas = getattr(_local, 'linhas', 0) + quantidade
+
+
+# --- REGISTRO DAS MEDIDAS ---
+def _registrar_operacao(nome: str, ms: float, linhas: int, erro: bool) -> None:
+    with _estado.trava:
+        estatistica = _estado.operacoes.get(nome)
+        if estatistica is None:
+            estatistica = _estado.operacoes[nome] = Estatistica()
+        estatistica.registrar(ms, linhas, erro)
+        lenta = ms >= _estado.limite_lento_ms
+        if lenta:
+            _estado.lentas.append((time.strftime('%H:%M:%S'), nome, round(ms, 1), linhas))
+    if lenta:
+        print(f"\n🐢 Operação lenta: {nome} levou {ms:.1f} ms ({linhas} linha(s)).")
+
+def _registrar_sql(sql: str, ms: float, linhas: int) -> None:
+    chave = ' '.join(sql.split())[:120]
+    with _estado.trava:
+        estatistica = _estado.sql.get(chave)
+        if estatistica is None:
+            estatistica = _estado.sql[chave] = Estatistica()
+        estatistica.registrar(ms, linhas)
+
+
+class CursorMedido:
+    """Cursor que conta as linhas entregues (para 'linhas tocadas')."""
+    __slots__ = ('_cursor',)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __iter__(self):
+        for linha in self._cursor:
+            _contar_linhas(1)
+            yield linha
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        if linha is not None:
+            _contar_linhas(1)
+        return linha
+
+    def fetchmany(self, *args):
+        linhas = self._cursor.fetchmany(*args)
+        _contar_linhas(len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        _contar_linhas(len(linhas))
+        return linhas
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+class ConexaoMedida:
+    """Envolve a conexão da Estante medindo cada execute/executemany.
+
+    O tempo medido é o de execute() (preparar e dar o primeiro passo); a
+    leitura das linhas de um SELECT entra no tempo da operação que as consome.
+    """
+    __slots__ = ('_conn',)
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def _medir(self, metodo, sql: str, parametros) -> CursorMedido:
+        inicio = time.perf_counter()
+        cursor = metodo(sql, parametros)
+        alteradas = max(cursor.rowcount, 0)  # INSERT/UPDATE/DELETE; -1 para SELECT
+        _registrar_sql(sql, (time.perf_counter() - inicio) * 1000, alteradas)
+        _contar_linhas(alteradas)
+        return CursorMedido(cursor)
+
+    def execute(self, sql: str, parametros=()):
+        return self._medir(self._conn.execute, sql, parametros)
+
+    def executemany(self, sql: str, parametros):
+        return self._medir(self._conn.executemany, sql, parametros)
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+def _executar_com_perfil(nome: str, funcao: Callable, args, kwargs, arquivo: str, linhas: int):
+    # Importados só aqui: carregá-los custa mais que o resto do módulo (ver linha_de_comando.py)
+    import pstats
+    import cProfile
+    perfil = cProfile.Profile()
+    try:
+        return perfil.runcall(funcao, *args, **kwargs)
+    finally:
+        perfil.dump_stats(arquivo)
+        relatorio = io.StringIO()
+        pstats.Stats(perfil, stream=relatorio).sort_stats('cumulative').print_stats(linhas)
+        print(f"\n🔬 Perfil de {nome} salvo em '{arquivo}':\n{relatorio.getvalue()}")
+
+def _envolver(nome: str, funcao: Callable) -> Callable:
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        perfilar = _estado.perfilar
+        if perfilar is not None and perfilar[0] == nome:
+            _estado.perfilar = None
+            chamar = functools.partial(_executar_com_perfil, nome, funcao, args, kwargs, *perfilar[1:])
+        else:
+            chamar = functools.partial(funcao, *args, **kwargs)
+
+        linhas_antes = getattr(_local, 'linhas', 0)
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            return chamar()
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            _registrar_operacao(nome, (time.perf_counter() - inicio) * 1000,
+                                getattr(_local, 'linhas', 0) - linhas_antes, erro)
+    return medida
+
+def _conexao_medida(self):
+    """Substitui _get_db_connection() enquanto a instrumentação está ativa."""
+    return ConexaoMedida(self._conn)
+
+
+# --- API ---
+def registrar(classe: type, metodos: Tuple[str, ...], prefixo: Optional[str] = None) -> None:
+    """Acrescenta métodos a medir (ex.: callbacks da EstanteApp).
+
+    Os nomes aparecem como 'Classe.metodo'. Se a instrumentação já estiver
+    ativa, os métodos passam a ser medidos imediatamente.
+    """
+    alvo = (classe, tuple(metodos), prefixo or classe.__name__)
+    _estado.alvos.append(alvo)
+    if _estado.ativa:
+        _instrumentar(*alvo)
+
+def registrar_conexao(classe: type) -> None:
+    """Mede o SQL que passa por 'classe._get_db_connection()' (a conexão em self._conn)."""
+    _estado.classes_com_conexao.append(classe)
+    if _estado.ativa and _estado.medir_sql:
+        _medir_conexao(classe)
+
+def _medir_conexao(classe: type) -> None:
+    if (classe, '_get_db_connection') not in _estado.originais:
+        _estado.originais[(classe, '_get_db_connection')] = classe.__dict__['_get_db_connection']
+        classe._get_db_connection = _conexao_medida
+
+def _instrumentar(classe: type, metodos: Tuple[str, ...], prefixo: str) -> None:
+    for metodo in metodos:
+        if (classe, metodo) in _estado.originais:
+            continue
+        original = classe.__dict__[metodo]
+        _estado.originais[(classe, metodo)] = original
+        setattr(classe, metodo, _envolver(f"{prefixo}.{metodo}", original))
+
+def esta_ativa() -> bool:
+    return _estado.ativa
+
+def ativar(limite_lento_ms: float = 100.0, medir_sql: bool = True) -> None:
+    """Liga a instrumentação (operações acima de 'limite_lento_ms' são avisadas)."""
+    _estado.limite_lento_ms = limite_lento_ms
+    if _estado.ativa:
+        return
+    _estado.medir_sql = medir_sql
+    for alvo in _estado.alvos:
+        _instrumentar(*alvo)
+    if medir_sql:
+        for classe in _estado.classes_com_conexao:
+            _medir_conexao(classe)
+    _estado.ativa = True
+
+def desativar() -> None:
+    """Devolve os métodos originais (os números já coletados são mantidos)."""
+    for (classe, metodo), original in _estado.originais.items():
+        setattr(classe, metodo, original)
+    _estado.originais.clear()
+    _estado.ativa = False
+
+def ativar_pelo_ambiente() -> bool:
+    """Liga a instrumentação se ESTANTE_INSTRUMENTACAO estiver definida (e não for '0').
+
+    ESTANTE_LIMITE_LENTO_MS ajusta o limite de lentidão e ESTANTE_PERFILAR
+    escolhe uma operação (ex.: 'Estante._carregar_itens_db') para perfilar.
+    """
+    if os.environ.get('ESTANTE_INSTRUMENTACAO', '0') in ('', '0'):
+        return False
+    ativar(float(os.environ.get('ESTANTE_LIMITE_LENTO_MS', 100.0)))
+    operacao = os.environ.get('ESTANTE_PERFILAR')
+    if operacao:
+        perfilar_proxima(operacao)
+    return True
+
+def perfilar_proxima(operacao: str, arquivo: Optional[str] = None, linhas: int = 25) -> str:
+    """Roda a PRÓXIMA chamada de 'operacao' sob o cProfile.
+
+    O resultado é salvo em 'arquivo' (formato do pstats, abre com snakeviz ou
+    'python -m pstats') e um resumo é impresso. Retorna o caminho do arquivo.
+    """
+    arquivo = arquivo or f"perfil_{operacao.replace('.', '_')}.prof"
+    _estado.perfilar = (operacao, arquivo, linhas)
+    return arquivo
+
+def zerar() -> None:
+    with _estado.trava:
+        _estado.operacoes.clear()
+        _estado.sql.clear()
+        _estado.lentas.clear()
+
+def instantaneo() -> Dict[str, Any]:
+    """Cópia dos números atuais, pronta para JSON."""
+    with _estado.trava:
+        return {
+            'ativa': _estado.ativa,
+            'limite_lento_ms': _estado.limite_lento_ms,
+            'operacoes': {nome: estatistica.to_dict() for nome, estatistica in _estado.operacoes.items()},
+            'sql': {sql: estatistica.to_dict() for sql, estatistica in _estado.sql.items()},
+            'lentas': [dict(zip(('quando', 'operacao', 'ms', 'linhas'), lenta)) for lenta in _estado.lentas],
+        }
+
+def resumo(maximo: int = 15) -> str:
+    """Texto com as operações e comandos SQL que mais consumiram tempo."""
+    dados = instantaneo()
+    linhas = [f"Instrumentação {'ATIVA' if dados['ativa'] else 'desligada'} "
+              f"(lento >= {dados['limite_lento_ms']:.0f} ms)", ""]
+
+    def tabela(titulo: str, medidas: Dict[str, Dict[str, Any]]) -> None:
+        linhas.append(f"{titulo:<48} {'chamadas':>8} {'total ms':>10} {'p95 ms':>8} {'máx ms':>9} {'linhas':>9}")
+        ordenadas = sorted(medidas.items(), key=lambda par: par[1]['total_ms'], reverse=True)
+        for nome, medida in ordenadas[:maximo]:
+            linhas.append(f"{nome[:48]:<48} {medida['chamadas']:>8} {medida['total_ms']:>10.1f} "
+                          f"{medida['p95_ms']:>8} {medida['maximo_ms']:>9.1f} {medida['linhas']:>9}")
+        linhas.append("")
+
+    tabela("OPERAÇÃO", dados['operacoes'])
+    tabela("SQL", dados['sql'])
+    if dados['lentas']:
+        linhas.append("LENTAS (mais recentes)")
+        for lenta in dados['lentas'][-10:]:
+            linhas.append(f"  {lenta['quando']} {lenta['operacao']} {lenta['ms']} ms ({lenta['linhas']} linha(s))")
+    return '\n'.join(linhas)
@@ -0,0 +1,297 @@
+import os
+import sys
+import argparse
+from typing import List, Optional
+
+from constantes import TIPOS, ORDENS
+
+# --- LINHA DE COMANDO PARA SCRIPTS (SEM MENU E SEM INTERFACE GRÁFICA) ---
+# O menu de banco_de_dados.py pergunta tudo por input(), então não serve para
+# scripts. Aqui cada operação é um subcomando:
+#   python linha_de_comando.py adicionar livro "Dom Casmurro" "Machado de Assis" --paginas 256
+#   python linha_de_comando.py remover 3f2a9c
+#   python linha_de_comando.py buscar sandman --limite 5
+#   python linha_de_comando.py filtrar --tipo HQ --autor gaiman --ordem titulo
+#   python linha_de_comando.py importar catalogo.csv
+#   python linha_de_comando.py exportar colecao.jsonl
+#   python linha_de_comando.py estatisticas --json
+#   python linha_de_comando.py --somente-leitura --db backup.db buscar sandman
+#   python linha_de_comando.py lote < comandos.txt
+# (também aceita os nomes em inglês: add, remove, search, filter, import,
+# export, stats, batch).
+#
+# Os resultados vão para a saída padrão, um item por linha, com os campos
+# separados por TAB (ou um objeto JSON por linha, com --json). As mensagens da
+# estante (✅, ⚠️...) vão para a saída de erros. Código de saída: 0 se deu
+# certo, 1 se o comando falhou, 2 se a linha de comando for inválida.
+#
+# 'lote' lê um comando por linha da entrada padrão, com a mesma sintaxe (sem o
+# "python linha_de_comando.py"; linhas vazias e começadas por # são ignoradas)
+# e executa todos numa ÚNICA transação, com uma única conexão: se um falhar,
+# nada é gravado.
+#
+# Abertura rápida: no topo só entram os, sys, argparse e constantes (os e sys
+# já vêm carregados com o interpretador; constantes não importa nada).
+# banco_de_dados (e com ele o sqlite3) é importado ao executar o comando;
+# importacao, exportacao, json e shlex só nos subcomandos que os usam. O
+# tkinter nunca é importado. O tempo de abertura é medido pelo benchmark.py
+# (cli_partida_ms).
+
+
+class _Formatador(argparse.HelpFormatter):
+    # O HelpFormatter padrão importa shutil só para saber a largura do terminal
+    # (ele é criado a cada add_argument, então o custo vem mesmo sem --help)
+    def __init__(self, prog: str, **kwargs):
+        if kwargs.get('width') is None:
+            kwargs['width'] = _largura_do_terminal()
+        super().__init__(prog, **kwargs)
+
+
+def _largura_do_terminal() -> int:
+    try:
+        return int(os.environ['COLUMNS'])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return os.get_terminal_size(sys.__stdout__.fileno()).columns
+    except (AttributeError, ValueError, OSError):
+        return 80
+
+
+class ErroDeComando(Exception):
+    """O comando não pôde ser concluído (a mensagem explica por quê)."""
+
+
+def _tipo(texto: str) -> str:
+    # Aceita "livro", "LIVRO", "hq"...
+    return {tipo.lower(): tipo for tipo in TIPOS}.get(texto.lower(), texto)
+
+
+def _id(texto: str) -> str:
+    # "" e "  " seriam o início de qualquer ID
+    if not texto.strip():
+        raise argparse.ArgumentTypeError("o ID não pode ser vazio")
+    return texto.strip()
+
+
+def _escrever_linhas(args: argparse.Namespace, linhas, colunas=('id', 'tipo', 'titulo', 'autor')) -> int:
+    total = 0
+    if args.json:
+        import json
+        for linha in linhas:
+            print(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False), file=args.saida)
+            total += 1
+    else:
+        for linha in linhas:
+            print('\t'.join('' if valor is None else str(valor) for valor in linha), file=args.saida)
+            total += 1
+    return total
+
+
+# --- SUBCOMANDOS (cada um recebe a estante aberta e os argumentos) ---
+def comando_adicionar(estante, args: argparse.Namespace) -> None:
+    from banco_de_dados import criar_item
+    dados = {'tipo': args.tipo, 'titulo': args.titulo, 'autor': args.autor, 'id': args.id,
+             'paginas': args.paginas, 'edicao': args.edicao, 'mes_publicacao': args.mes,
+             'desenhista': args.desenhista}
+    try:
+        item = criar_item(dados)
+    except ValueError as erro:
+        raise ErroDeComando(str(erro))
+    if not estante.adicionar_item(item, permitir_duplicata=args.permitir_duplicata):
+        raise ErroDeComando(f"'{item.titulo}' não foi adicionado.")
+    print(item.id, file=args.saida)
+
+
+def comando_remover(estante, args: argparse.Namespace) -> None:
+    for item_id in args.ids:
+        removidos = estante.remover_item(item_id)
+        if not removidos:
+            raise ErroDeComando(f"Nenhum item removido com o ID '{item_id}'.")
+        print(removidos[0], file=args.saida)
+
+
+def comando_buscar(estante, args: argparse.Namespace) -> None:
+    filtro = {'tipo': args.tipo, 'autor': args.autor, 'titulo': args.titulo}
+    if args.aproximada:
+        notas = estante.buscar_aproximado_ids(args.termo, args.limite, **filtro)
+        itens = {item.id: item for item in estante.carregar_itens_por_ids([item_id for item_id, _ in notas])}
+        linhas = ((item_id, itens[item_id].__class__.__name__, itens[item_id].titulo, itens[item_id].autor, nota)
+                  for item_id, nota in notas if item_id in itens)
+        _escrever_linhas(args, linhas, ('id', 'tipo', 'titulo', 'autor', 'similaridade'))
+        return
+    _escrever_linhas(args, (linha for _, linha in estante.iterar_busca(args.termo, limite=args.limite, **filtro)))
+
+
+def comando_filtrar(estante, args: argparse.Namespace) -> None:
+    linhas = estante.iterar_filtro(args.tipo, args.autor, args.titulo, args.ordem, args.decrescente,
+                                   limite=args.limite)
+    _escrever_linhas(args, (linha for _, linha in linhas))
+
+
+def comando_importar(estante, args: argparse.Namespace) -> None:
+    from importacao import ler_arquivo
+    try:
+        resultado = estante.importar_em_lote(ler_arquivo(args.arquivo), tamanho_lote=args.lote)
+    except (OSError, ValueError) as erro:
+        raise ErroDeComando(f"Não foi possível importar '{args.arquivo}': {erro}")
+    print(f"{resultado.importados}\t{resultado.duplicados}\t{resultado.total_erros}", file=args.saida)
+    if resultado.total_erros:
+        for numero, mensagem in resultado.erros[:10]:
+            print(f"Registro {numero}: {mensagem}", file=sys.stderr)
+
+
+def comando_exportar(estante, args: argparse.Namespace) -> None:
+    from exportacao import exportar
+    try:
+        total = exportar(estante, args.arquivo)
+    except (OSError, ValueError) as erro:
+        raise ErroDeComando(f"Não foi possível exportar para '{args.arquivo}': {erro}")
+    print(total, file=args.saida)
+
+
+def comando_estatisticas(estante, args: argparse.Namespace) -> None:
+    numeros = estante.estatisticas(args.ranking)
+    if args.json:
+        import json
+        print(json.dumps(numeros.to_dict(), ensure_ascii=False), file=args.saida)
+        return
+    for tipo, quantidade in sorted(numeros.por_tipo.items()):
+        print(f"tipo\t{tipo}\t{quantidade}", file=args.saida)
+    print(f"total\t\t{numeros.total}", file=args.saida)
+    print(f"paginas_livros\t\t{numeros.total_paginas_livros}", file=args.saida)
+    for grupo, pares in (('autor', numeros.principais_autores), ('desenhista', numeros.principais_desenhistas),
+                         ('mes', numeros.revistas_por_mes)):
+        for nome, quantidade in pares:
+            print(f"{grupo}\t{nome}\t{quantidade}", file=args.saida)
+
+
+def comando_lote(estante, args: argparse.Namespace) -> None:
+    import shlex
+    parser = criar_parser()
+    executados = 0
+    with estante.transacao():
+        for numero, linha in enumerate(args.entrada, start=1):
+            linha = linha.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            try:
+                palavras = shlex.split(linha)
+                sub_args = parser.parse_args(palavras)
+            except (ValueError, SystemExit):
+                raise ErroDeComando(f"Linha {numero}: comando inválido: {linha}")
+            if sub_args.executar is comando_lote:
+                raise ErroDeComando(f"Linha {numero}: 'lote' não pode ser usado dentro de um lote.")
+            sub_args.saida, sub_args.json = args.saida, args.json or sub_args.json
+            try:
+                sub_args.executar(estante, sub_args)
+            except ErroDeComando as erro:
+                raise ErroDeComando(f"Linha {numero}: {erro} Nada foi gravado.")
+            executados += 1
+    print(f"\n✅ Lote concluído: {executados} comando(s) gravado(s) em uma única transação.")
+
+
+# --- ARGUMENTOS ---
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='linha_de_comando.py', description="Estante Virtual sem interface, para scripts.",
+        formatter_class=_Formatador)
+    parser.add_argument('--db', help="banco de dados (padrão: estante_virtual.db)")
+    parser.add_argument('--json', action='store_true', help="resultados como JSON, um objeto por linha")
+    parser.add_argument('--somente-leitura', action='store_true',
+                        help="abre o banco com mode=ro e mmap (recusa adicionar, remover e importar)")
+    parser.add_argument('--imutavel', action='store_true',
+                        help="como --somente-leitura, com immutable=1 (só para cópias fechadas, ex.: backups)")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    def novo_subcomando(nome: str, alias: str, ajuda: str) -> argparse.ArgumentParser:
+        return subcomandos.add_parser(nome, aliases=[alias], help=ajuda, formatter_class=_Formatador)
+
+    adicionar = novo_subcomando('adicionar', 'add', "adiciona um item; mostra o ID")
+    adicionar.add_argument('tipo', type=_tipo, choices=TIPOS)
+    adicionar.add_argument('titulo')
+    adicionar.add_argument('autor')
+    adicionar.add_argument('--paginas', type=int, help="Livro")
+    adicionar.add_argument('--edicao', help="Revista")
+    adicionar.add_argument('--mes', help="Revista (mês de publicação)")
+    adicionar.add_argument('--desenhista', help="HQ")
+    adicionar.add_argument('--id', help="ID do item (padrão: um novo)")
+    adicionar.add_argument('--permitir-duplicata', action='store_true',
+                           help="adiciona mesmo que já exista um item igual")
+    adicionar.set_defaults(executar=comando_adicionar, grava=True)
+
+    remover = novo_subcomando('remover', 'remove', "remove itens pelo ID (ou início dele)")
+    remover.add_argument('ids', nargs='+', type=_id)
+    remover.set_defaults(executar=comando_remover, grava=True)
+
+    def argumentos_de_filtro(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument('--tipo', type=_tipo, choices=TIPOS)
+        subparser.add_argument('--autor', help="início do nome do autor")
+        subparser.add_argument('--titulo', help="início do título")
+
+    buscar = novo_subcomando('buscar', 'search', "busca por palavras (FTS5)")
+    buscar.add_argument('termo')
+    buscar.add_argument('--limite', type=int, default=20)
+    buscar.add_argument('--aproximada', action='store_true', help="tolera erros de digitação")
+    argumentos_de_filtro(buscar)
+    buscar.set_defaults(executar=comando_buscar)
+
+    filtrar = novo_subcomando('filtrar', 'filter', "lista os itens do filtro")
+    argumentos_de_filtro(filtrar)
+    filtrar.add_argument('--ordem', choices=ORDENS, default='id')
+    filtrar.add_argument('--decrescente', action='store_true')
+    filtrar.add_argument('--limite', type=int, help="padrão: todos")
+    filtrar.set_defaults(executar=comando_filtrar)
+
+    importar = novo_subcomando('importar', 'import', "importa um .csv ou .jsonl")
+    importar.add_argument('arquivo')
+    importar.add_argument('--lote', type=int, default=5000, help="itens gravados por transação")
+    importar.set_defaults(executar=comando_importar, grava=True)
+
+    exportar = novo_subcomando('exportar', 'export', "exporta para .csv ou .jsonl")
+    exportar.add_argument('arquivo')
+    exportar.set_defaults(executar=comando_exportar)
+
+    estatisticas = novo_subcomando('estatisticas', 'stats', "números da coleção")
+    estatisticas.add_argument('--ranking', type=int, default=10, help="autores/desenhistas listados")
+    estatisticas.set_defaults(executar=comando_estatisticas)
+
+    lote = novo_subcomando('lote', 'batch', "executa os comandos da entrada padrão numa única transação")
+    lote.set_defaults(executar=comando_lote, grava=True)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+    args.saida, args.entrada = sys.stdout, sys.stdin
+
+    somente_leitura = args.somente_leitura or args.imutavel
+    if somente_leitura and getattr(args, 'grava', False):
+        print(f"❌ '{args.comando}' grava na estante, que foi pedida somente para leitura.", file=sys.stderr)
+        return 1
+
+    import sqlite3
+    import contextlib
+    from banco_de_dados import DB_NAME, Estante
+    from migracoes import ErroDeMigracao
+    # As mensagens da estante (print) vão para a saída de erros; a saída
+    # padrão fica só com os resultados, para outros programas lerem
+    with contextlib.redirect_stdout(sys.stderr):
+        caminho = args.db or DB_NAME
+        try:
+            estante = Estante(db_path=caminho, carregar=False, somente_leitura=somente_leitura,
+                              imutavel=args.imutavel)
+        except (sqlite3.Error, ErroDeMigracao) as erro:
+            print(f"❌ Não foi possível abrir '{caminho}': {erro}")
+            return 1
+        with estante:
+            try:
+                args.executar(estante, args)
+            except ErroDeComando as erro:
+                print(f"❌ {erro}")
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,503 @@
+import os
+import time
+import sqlite3
+import argparse
+from typing import List, Optional, Callable, Tuple
+
+# --- VERSÕES DO ESQUEMA (MIGRAÇÕES) ---
+# A versão do esquema fica gravada no próprio arquivo, em PRAGMA user_version.
+# Cada migração leva o banco da versão anterior para a sua e roda em UMA
+# transação junto com a troca de user_version: ou o passo inteiro é aplicado,
+# ou nada muda (se o programa cair no meio, o passo é refeito na próxima vez).
+# Os passos também toleram bancos criados por versões antigas do aplicativo,
+# que já tinham parte dos objetos mas continuavam com user_version = 0.
+#
+# Para mudar o esquema, acrescente uma Migracao no FIM de MIGRACOES; nunca
+# altere uma migração que já foi distribuída.
+
+# Função chamada com (migracao, linhas_processadas, total_de_linhas)
+Progresso = Callable[['Migracao', int, int], None]
+
+
+class ErroDeMigracao(Exception):
+    """O banco não pode ser migrado (ex.: foi criado por uma versão mais nova)."""
+
+
+class Migracao:
+    """Um passo do esquema: 'aplicar(conn, ao_progredir, tamanho_lote)'."""
+
+    def __init__(self, versao: int, descricao: str,
+                 aplicar: Callable[[sqlite3.Connection, Callable[[int, int], None], int], None]):
+        self.versao = versao
+        self.descricao = descricao
+        self.aplicar = aplicar
+
+    def __str__(self) -> str:
+        return f"v{self.versao}: {self.descricao}"
+
+
+def _existe(conn: sqlite3.Connection, nome: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (nome,)).fetchone() is not None
+
+# 1. Tabela principal
+def _criar_tabela_itens(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    # A coluna 'tipo' é crucial para sabermos qual classe instanciar ao carregar os dados
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS itens (
+            id TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            titulo TEXT NOT NULL,
+            autor TEXT,
+            paginas INTEGER,
+            edicao TEXT,
+            mes_publicacao TEXT,
+            desenhista TEXT
+        )
+    """)
+
+# 2. Índices secundários dos filtros e da ordenação
+# Todos terminam no id: a mesma chave serve aos filtros por prefixo, ao ORDER BY
+# de cada coluna (com desempate estável) e às âncoras da paginação por keyset.
+# Autor e título são indexados pela versão em minúsculas (prefixo ignorando
+# maiúsculas); o autor pode ser NULL, então é indexado como '' (ver
+# CHAVES_DE_ORDENACAO) e desempata pelo título.
+def _criar_indices_secundarios(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    indices = (
+        "CREATE INDEX IF NOT EXISTS idx_itens_tipo ON itens(tipo, id)",
+        "CREATE INDEX IF NOT EXISTS idx_itens_titulo ON itens(lower(titulo), id)",
+        "CREATE INDEX IF NOT EXISTS idx_itens_autor ON itens(ifnull(lower(autor), ''), lower(titulo), id)",
+    )
+    for feitos, comando in enumerate(indices, start=1):
+        conn.execute(comando)
+        ao_progredir(feitos, len(indices))
+
+# 3. Índice de texto completo (FTS5)
+# Tabela de "conteúdo externo": o texto não é duplicado, o índice aponta para o
+# rowid de 'itens' e é mantido em sincronia pelos gatilhos.
+def _criar_gatilhos_fts(conn: sqlite3.Connection, tabela: str) -> None:
+    """Gatilhos que mantêm um índice FTS5 de conteúdo externo igual a 'itens'."""
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {tabela}_ai AFTER INSERT ON itens BEGIN
+            INSERT INTO {tabela}(rowid, titulo, autor, desenhista)
+            VALUES (new.rowid, new.titulo, new.autor, new.desenhista);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {tabela}_ad AFTER DELETE ON itens BEGIN
+            INSERT INTO {tabela}({tabela}, rowid, titulo, autor, desenhista)
+            VALUES ('delete', old.rowid, old.titulo, old.autor, old.desenhista);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {tabela}_au AFTER UPDATE ON itens BEGIN
+            INSERT INTO {tabela}({tabela}, rowid, titulo, autor, desenhista)
+            VALUES ('delete', old.rowid, old.titulo, old.autor, old.desenhista);
+            INSERT INTO {tabela}(rowid, titulo, autor, desenhista)
+            VALUES (new.rowid, new.titulo, new.autor, new.desenhista);
+        END
+    """)
+
+def _indexar_em_lotes(conn: sqlite3.Connection, tabela: str, ao_progredir, tamanho_lote: int) -> None:
+    """Indexa as linhas existentes em lotes, seguindo o rowid (memória constante)."""
+    total = conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0]
+    feitos, ultimo_rowid = 0, 0
+    while True:
+        linhas = conn.execute("""
+            SELECT rowid, titulo, autor, desenhista FROM itens
+            WHERE rowid > ? ORDER BY rowid LIMIT ?
+        """, (ultimo_rowid, tamanho_lote)).fetchall()
+        if not linhas:
+            break
+        conn.executemany(
+            f"INSERT INTO {tabela}(rowid, titulo, autor, desenhista) VALUES (?, ?, ?, ?)", linhas)
+        ultimo_rowid = linhas[-1][0]
+        feitos += len(linhas)
+        ao_progredir(feitos, total)
+
+def _criar_indice_de_busca(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    ja_existia = _existe(conn, 'itens_busca')
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS itens_busca USING fts5(
+            titulo, autor, desenhista,
+            content='itens', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    _criar_gatilhos_fts(conn, 'itens_busca')
+    if not ja_existia:
+        _indexar_em_lotes(conn, 'itens_busca', ao_progredir, tamanho_lote)
+
+
+# 4. Contadores das estatísticas, mantidos por gatilhos
+# Cada linha é (grupo, chave) -> quantidade de itens (e, para 'tipo', a soma das
+# páginas dos Livros). Assim as estatísticas saem sem percorrer 'itens'.
+_CONTAR = """
+    INSERT INTO contadores(grupo, chave, quantidade, soma)
+    VALUES ('tipo', {linha}.tipo, 1, CASE WHEN {linha}.tipo = 'Livro' THEN coalesce({linha}.paginas, 0) ELSE 0 END)
+    ON CONFLICT(grupo, chave) DO UPDATE SET quantidade = quantidade + 1, soma = soma + excluded.soma;
+    INSERT INTO contadores(grupo, chave, quantidade, soma)
+    SELECT 'autor', {linha}.autor, 1, 0 WHERE {linha}.autor IS NOT NULL
+    ON CONFLICT(grupo, chave) DO UPDATE SET quantidade = quantidade + 1;
+    INSERT INTO contadores(grupo, chave, quantidade, soma)
+    SELECT 'desenhista', {linha}.desenhista, 1, 0 WHERE {linha}.tipo = 'HQ' AND {linha}.desenhista IS NOT NULL
+    ON CONFLICT(grupo, chave) DO UPDATE SET quantidade = quantidade + 1;
+    INSERT INTO contadores(grupo, chave, quantidade, soma)
+    SELECT 'mes_publicacao', {linha}.mes_publicacao, 1, 0
+    WHERE {linha}.tipo = 'Revista' AND {linha}.mes_publicacao IS NOT NULL
+    ON CONFLICT(grupo, chave) DO UPDATE SET quantidade = quantidade + 1;
+"""
+_DESCONTAR = """
+    UPDATE contadores SET quantidade = quantidade - 1,
+        soma = soma - CASE WHEN {linha}.tipo = 'Livro' THEN coalesce({linha}.paginas, 0) ELSE 0 END
+    WHERE grupo = 'tipo' AND chave = {linha}.tipo;
+    UPDATE contadores SET quantidade = quantidade - 1 WHERE grupo = 'autor' AND chave = {linha}.autor;
+    UPDATE contadores SET quantidade = quantidade - 1
+    WHERE {linha}.tipo = 'HQ' AND grupo = 'desenhista' AND chave = {linha}.desenhista;
+    UPDATE contadores SET quantidade = quantidade - 1
+    WHERE {linha}.tipo = 'Revista' AND grupo = 'mes_publicacao' AND chave = {linha}.mes_publicacao;
+    DELETE FROM contadores WHERE quantidade <= 0 AND (
+        (grupo = 'tipo' AND chave = {linha}.tipo) OR (grupo = 'autor' AND chave = {linha}.autor)
+        OR (grupo = 'desenhista' AND chave = {linha}.desenhista)
+        OR (grupo = 'mes_publicacao' AND chave = {linha}.mes_publicacao));
+"""
+
+def recalcular_contadores(conn: sqlite3.Connection, ao_progredir: Optional[Callable[[int, int], None]] = None) -> None:
+    """Refaz a tabela 'contadores' a partir de 'itens' (um GROUP BY por grupo)."""
+    agregacoes = (
+        """INSERT INTO contadores SELECT 'tipo', tipo, COUNT(*),
+               SUM(CASE WHEN tipo = 'Livro' THEN coalesce(paginas, 0) ELSE 0 END)
+           FROM itens GROUP BY tipo""",
+        """INSERT INTO contadores SELECT 'autor', autor, COUNT(*), 0
+           FROM itens WHERE autor IS NOT NULL GROUP BY autor""",
+        """INSERT INTO contadores SELECT 'desenhista', desenhista, COUNT(*), 0
+           FROM itens WHERE tipo = 'HQ' AND desenhista IS NOT NULL GROUP BY desenhista""",
+        """INSERT INTO contadores SELECT 'mes_publicacao', mes_publicacao, COUNT(*), 0
+           FROM itens WHERE tipo = 'Revista' AND mes_publicacao IS NOT NULL GROUP BY mes_publicacao""",
+    )
+    conn.execute("DELETE FROM contadores")
+    for feitos, comando in enumerate(agregacoes, start=1):
+        conn.execute(comando)
+        if ao_progredir:
+            ao_progredir(feitos, len(agregacoes))
+
+def _criar_contadores(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS contadores (
+            grupo TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            soma INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (grupo, chave)
+        ) WITHOUT ROWID
+    """)
+    # Ranking (ex.: autores com mais itens) direto pelo índice, sem ordenar o grupo todo
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contadores_ranking ON contadores(grupo, quantidade)")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS contadores_ai AFTER INSERT ON itens BEGIN "
+                 f"{_CONTAR.format(linha='new')} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS contadores_ad AFTER DELETE ON itens BEGIN "
+                 f"{_DESCONTAR.format(linha='old')} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS contadores_au AFTER UPDATE ON itens BEGIN "
+                 f"{_DESCONTAR.format(linha='old')} {_CONTAR.format(linha='new')} END")
+    recalcular_contadores(conn, ao_progredir)
+
+
+# 5. Índice de trigramas para a busca aproximada (tolerante a erros de digitação)
+# O tokenizador 'trigram' do FTS5 indexa cada sequência de 3 caracteres; a tabela
+# fts5vocab expõe em quantas linhas cada trigrama aparece, para a busca escolher
+# os trigramas mais raros da consulta (ver banco_de_dados.buscar_aproximado_ids).
+def _criar_indice_de_trigramas(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    ja_existia = _existe(conn, 'itens_trigramas')
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS itens_trigramas USING fts5(
+            titulo, autor, desenhista,
+            content='itens', content_rowid='rowid',
+            tokenize='trigram', detail='none'
+        )
+    """)
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS itens_trigramas_termos USING fts5vocab(itens_trigramas, 'row')")
+    _criar_gatilhos_fts(conn, 'itens_trigramas')
+    if not ja_existia:
+        _indexar_em_lotes(conn, 'itens_trigramas', ao_progredir, tamanho_lote)
+
+
+# 6. Impressões digitais para detectar itens duplicados (ver duplicatas.py)
+# A impressão é calculada em Python (normalização Unicode), então só a remoção
+# é feita por gatilho; uma alteração apaga a impressão, que é recalculada depois.
+def _criar_impressoes(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    from duplicatas import completar_impressoes
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS impressoes (
+            item_id TEXT PRIMARY KEY,
+            impressao TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_impressoes ON impressoes(impressao)")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS impressoes_ad AFTER DELETE ON itens BEGIN
+            DELETE FROM impressoes WHERE item_id = old.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS impressoes_au AFTER UPDATE OF id, tipo, titulo, autor, paginas, edicao, desenhista
+        ON itens BEGIN
+            DELETE FROM impressoes WHERE item_id = old.id;
+        END
+    """)
+    total = conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0]
+    completar_impressoes(conn, tamanho_lote, lambda feitos: ao_progredir(feitos, total))
+
+
+# 7. Índices de ordenação (cabeçalhos clicáveis da lista)
+# A migração 2 já cria os índices de autor e título na forma final (terminando
+# no id). Só os bancos que passaram pela versão antiga dela, com os índices só
+# pela coluna em minúsculas, ganham aqui as versões completas.
+def _criar_indices_de_ordenacao(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    comandos = []
+    for indice, comando in (
+            ('idx_itens_titulo', "CREATE INDEX IF NOT EXISTS idx_itens_titulo_ordem ON itens(lower(titulo), id)"),
+            ('idx_itens_autor', "CREATE INDEX IF NOT EXISTS idx_itens_autor_ordem "
+                                "ON itens(ifnull(lower(autor), ''), lower(titulo), id)")):
+        colunas = conn.execute("SELECT name FROM pragma_index_xinfo(?) WHERE key", (indice,)).fetchall()
+        if colunas[-1:] != [('id',)]:
+            comandos.append(comando)
+    for feitos, comando in enumerate(comandos, start=1):
+        conn.execute(comando)
+        ao_progredir(feitos, len(comandos))
+
+
+# 8. Registro de alterações (change feed) para quem divide o mesmo arquivo
+# Cada INSERT/UPDATE/DELETE em 'itens' anota o id do item com um número de
+# sequência crescente (AUTOINCREMENT: nunca reutilizado, nem após a poda).
+# Quem já viu até a sequência N relê só as linhas anotadas depois dela
+# (ver Estante.sincronizar_alteracoes).
+def _criar_registro_de_alteracoes(conn: sqlite3.Connection, ao_progredir, tamanho_lote: int) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alteracoes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id TEXT NOT NULL,
+            operacao TEXT NOT NULL  -- 'I' (inserido), 'U' (alterado) ou 'D' (removido)
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS alteracoes_ai AFTER INSERT ON itens BEGIN
+            INSERT INTO alteracoes(item_id, operacao) VALUES (new.id, 'I');
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS alteracoes_ad AFTER DELETE ON itens BEGIN
+            INSERT INTO alteracoes(item_id, operacao) VALUES (old.id, 'D');
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS alteracoes_au AFTER UPDATE ON itens BEGIN
+            INSERT INTO alteracoes(item_id, operacao) SELECT old.id, 'D' WHERE old.id != new.id;
+            INSERT INTO alteracoes(item_id, operacao) VALUES (new.id, 'U');
+        END
+    """)
+    ao_progredir(1, 1)
+
+
+MIGRACOES: List[Migracao] = [
+    Migracao(1, "tabela 'itens'", _criar_tabela_itens),
+    Migracao(2, "índices por tipo, autor e título", _criar_indices_secundarios),
+    Migracao(3, "índice de texto completo (FTS5)", _criar_indice_de_busca),
+    Migracao(4, "contadores para as estatísticas", _criar_contadores),
+    Migracao(5, "índice de trigramas (busca aproximada)", _criar_indice_de_trigramas),
+    Migracao(6, "impressões digitais (itens duplicados)", _criar_impressoes),
+    Migracao(7, "índices de ordenação por coluna", _criar_indices_de_ordenacao),
+    Migracao(8, "registro de alterações (change feed)", _criar_registro_de_alteracoes),
+]
+VERSAO_ATUAL = MIGRACOES[-1].versao
+
+
+def versao_do_banco(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migracoes_pendentes(conn: sqlite3.Connection) -> List[Migracao]:
+    """Migrações que ainda não foram aplicadas a este banco, em ordem."""
+    versao = versao_do_banco(conn)
+    if versao > VERSAO_ATUAL:
+        raise ErroDeMigracao(f"O banco está na versão {versao}, mais nova que a suportada "
+                             f"por este programa ({VERSAO_ATUAL}). Atualize o aplicativo.")
+    return [migracao for migracao in MIGRACOES if migracao.versao > versao]
+
+def exigir_versao_atual(conn: sqlite3.Connection) -> None:
+    """Para conexões somente leitura, que não podem migrar: erro se faltar alguma migração."""
+    pendentes = migracoes_pendentes(conn)
+    if pendentes:
+        raise ErroDeMigracao(f"O banco está na versão {versao_do_banco(conn)} e precisa ser atualizado "
+                             f"para a {VERSAO_ATUAL}, o que não é possível somente para leitura. "
+                             "Abra-o uma vez no modo normal.")
+
+def migrar(conn: sqlite3.Connection, ao_progredir: Optional[Progresso] = None,
+           tamanho_lote: int = 5000) -> List[int]:
+    """Aplica as migrações pendentes, cada uma em sua própria transação.
+
+    Passos que percorrem a tabela o fazem em lotes de 'tamanho_lote' linhas,
+    chamando 'ao_progredir' a cada lote. Retorna as versões aplicadas.
+    """
+    aplicadas = []
+    for migracao in migracoes_pendentes(conn):
+        # IMMEDIATE: reserva a escrita já no início, antes de ler o esquema
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Outra conexão pode ter migrado enquanto esperávamos o bloqueio
+            if versao_do_banco(conn) >= migracao.versao:
+                conn.execute("ROLLBACK")
+                continue
+            migracao.aplicar(conn, lambda feitos, total: ao_progredir and ao_progredir(migracao, feitos, total),
+                             tamanho_lote)
+            conn.execute(f"PRAGMA user_version = {migracao.versao}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        aplicadas.append(migracao.versao)
+
+    if aplicadas:
+        print(f"🛠️ Banco de dados atualizado para a versão {VERSAO_ATUAL} "
+              f"({len(aplicadas)} migração(ões) aplicada(s)).")
+    return aplicadas
+
+
+# --- SIMULAÇÃO (DRY RUN) ---
+# As migrações pendentes são aplicadas a uma AMOSTRA das linhas, copiada para
+# um banco em memória com o mesmo esquema; o tempo e o crescimento medidos são
+# então extrapolados para o tamanho real. O arquivo original não é alterado.
+
+class EstimativaMigracao:
+    """Resultado de estimar_migracao(): custo previsto de cada passo pendente."""
+
+    def __init__(self, versao_atual: int, total_itens: int, linhas_amostra: int):
+        self.versao_atual = versao_atual
+        self.total_itens = total_itens
+        self.linhas_amostra = linhas_amostra
+        self.passos: List[Tuple[Migracao, float, int]] = []  # (migração, segundos, bytes)
+        self.tamanho_atual = 0
+        self.espaco_livre: Optional[int] = None
+
+    @property
+    def segundos(self) -> float:
+        return sum(segundos for _, segundos, _ in self.passos)
+
+    @property
+    def bytes(self) -> int:
+        return sum(tamanho for _, _, tamanho in self.passos)
+
+    @property
+    def cabe_no_disco(self) -> bool:
+        # Durante a transação o WAL guarda as páginas novas: conta-se o dobro
+        return self.espaco_livre is None or self.espaco_livre > 2 * self.bytes
+
+
+def _tamanho_do_banco(conn: sqlite3.Connection) -> int:
+    paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+    return paginas * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def _copiar_esquema(origem: sqlite3.Connection, destino: sqlite3.Connection) -> None:
+    """Recria no destino tabelas, índices e gatilhos da origem (sem os dados)."""
+    objetos = origem.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+    """).fetchall()
+    # As tabelas virtuais criam sozinhas suas tabelas internas ('itens_busca_data'...)
+    virtuais = [nome for tipo, nome, sql in objetos if sql.upper().startswith('CREATE VIRTUAL TABLE')]
+    ordem = {'table': 0, 'index': 1, 'trigger': 2}
+    for tipo, nome, sql in sorted(objetos, key=lambda objeto: ordem.get(objeto[0], 3)):
+        if any(nome.startswith(virtual + '_') for virtual in virtuais):
+            continue
+        destino.execute(sql)
+
+def estimar_migracao(conn: sqlite3.Connection, linhas_amostra: int = 5000,
+                     tamanho_lote: int = 5000) -> EstimativaMigracao:
+    """Simula as migrações pendentes e estima o tempo e o espaço em disco."""
+    pendentes = migracoes_pendentes(conn)
+    tem_itens = _existe(conn, 'itens')
+    total = conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0] if tem_itens else 0
+
+    amostra = sqlite3.connect(':memory:', isolation_level=None)
+    try:
+        _copiar_esquema(conn, amostra)
+        copiadas = 0
+        if tem_itens:
+            cursor = conn.execute("SELECT * FROM itens ORDER BY rowid LIMIT ?", (linhas_amostra,))
+            marcadores = ', '.join('?' * len(cursor.description))
+            amostra.executemany(f"INSERT INTO itens VALUES ({marcadores})", cursor)
+            copiadas = amostra.execute("SELECT COUNT(*) FROM itens").fetchone()[0]
+        amostra.execute(f"PRAGMA user_version = {versao_do_banco(conn)}")
+
+        estimativa = EstimativaMigracao(versao_do_banco(conn), total, copiadas)
+        escala = total / copiadas if copiadas else 1.0
+        for migracao in pendentes:
+            antes, inicio = _tamanho_do_banco(amostra), time.perf_counter()
+            amostra.execute("BEGIN")
+            migracao.aplicar(amostra, lambda feitos, total_passo: None, tamanho_lote)
+            amostra.execute("COMMIT")
+            segundos = time.perf_counter() - inicio
+            crescimento = max(0, _tamanho_do_banco(amostra) - antes)
+            estimativa.passos.append((migracao, segundos * escala, int(crescimento * escala)))
+    finally:
+        amostra.close()
+
+    estimativa.tamanho_atual = _tamanho_do_banco(conn)
+    arquivo = conn.execute("PRAGMA database_list").fetchone()[2]
+    if arquivo:
+        import shutil
+        estimativa.espaco_livre = shutil.disk_usage(os.path.dirname(os.path.abspath(arquivo))).free
+    return estimativa
+
+def _formatar_bytes(quantidade: float) -> str:
+    for unidade in ('B', 'KB', 'MB', 'GB'):
+        if quantidade < 1024 or unidade == 'GB':
+            return f"{quantidade:.1f} {unidade}"
+        quantidade /= 1024
+
+def mostrar_estimativa(estimativa: EstimativaMigracao) -> None:
+    """Imprime o relatório da simulação."""
+    if not estimativa.passos:
+        print(f"✅ O banco já está na versão {estimativa.versao_atual}: nada a migrar.")
+        return
+    print(f"🧪 Simulação: versão {estimativa.versao_atual} -> {VERSAO_ATUAL}, "
+          f"{estimativa.total_itens} item(ns) (amostra de {estimativa.linhas_amostra}).")
+    for migracao, segundos, tamanho in estimativa.passos:
+        print(f"  - {migracao}: ~{segundos:.1f} s, +{_formatar_bytes(tamanho)}")
+    print(f"  Total estimado: ~{estimativa.segundos:.1f} s e +{_formatar_bytes(estimativa.bytes)} "
+          f"(banco atual: {_formatar_bytes(estimativa.tamanho_atual)}).")
+    if not estimativa.cabe_no_disco:
+        print(f"  ⚠️ Pouco espaço livre ({_formatar_bytes(estimativa.espaco_livre)}): a migração "
+              f"precisa de cerca de {_formatar_bytes(2 * estimativa.bytes)} durante a transação.")
+
+def mostrar_progresso(migracao: Migracao, feitos: int, total: int) -> None:
+    """Mostra o andamento do passo atual na mesma linha do terminal."""
+    fim = '\n' if feitos >= total else ''
+    print(f"\r🛠️ {migracao}: {feitos}/{total}", end=fim, flush=True)
+
+
+# --- EXECUÇÃO PELA LINHA DE COMANDO ---
+# Exemplos:
+#   python migracoes.py --simular      # só estima tempo e espaço, não altera nada
+#   python migracoes.py --lote 20000   # aplica as migrações pendentes
+if __name__ == "__main__":
+    from banco_de_dados import DB_NAME, abrir_conexao
+
+    parser = argparse.ArgumentParser(description="Atualiza o esquema do banco da Estante Virtual.")
+    parser.add_argument('--db', default=DB_NAME, help="banco de dados a migrar")
+    parser.add_argument('--simular', action='store_true', help="estima o custo sem aplicar nada")
+    parser.add_argument('--lote', type=int, default=5000, help="linhas processadas por lote")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        # abrir_conexao criaria um banco vazio no lugar
+        raise SystemExit(f"❌ O banco '{args.db}' não existe.")
+    # A simulação só lê: mode=ro, sem o PRAGMA journal_mode=WAL (que mudaria
+    # o arquivo para sempre); as migrações rodam numa cópia em memória
+    conexao = abrir_conexao(args.db, somente_leitura=args.simular)
+    try:
+        if args.simular:
+            mostrar_estimativa(estimar_migracao(conexao, tamanho_lote=args.lote))
+        else:
+            print(f"Versão atual: {versao_do_banco(conexao)} (mais recente: {VERSAO_ATUAL})")
+            migrar(conexao, ao_progredir=mostrar_progresso, tamanho_lote=args.lote)
+    finally:
+        conexao.close()
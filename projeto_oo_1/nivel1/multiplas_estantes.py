@@ -0,0 +1,329 @@
+import os
+import heapq
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from banco_de_dados import (abrir_conexao, setup_database, Estante, EstatisticasEstante,
+                            ItemDeLeitura, _ordem_do_mes)
+
+# --- VÁRIAS ESTANTES (UM ARQUIVO .db POR ESTANTE) CONSULTADAS COMO UMA SÓ ---
+# Coleções grandes podem ficar divididas em vários bancos ("fragmentos"). O
+# GerenciadorDeEstantes abre cada um com a sua própria conexão e distribui as
+# consultas entre eles em threads: o SQLite libera o GIL enquanto executa, então
+# as leituras de fragmentos diferentes acontecem de fato ao mesmo tempo.
+#
+# Como os resultados são juntados:
+#   - filtros e buscas: cada fragmento produz um fluxo JÁ ORDENADO (pela chave
+#     da ordenação ou pelo rank do FTS5) numa thread própria, em blocos, por uma
+#     fila limitada; os fluxos são intercalados com heapq.merge. Com um limite
+#     (os N primeiros), cada fragmento lê no máximo N linhas (LIMIT na consulta);
+#   - busca aproximada: o top-k de cada fragmento, e o top-k da união;
+#   - estatísticas: contagens somadas; nos rankings (autores, desenhistas) os
+#     candidatos são os que aparecem no top de algum fragmento, com a quantidade
+#     total recontada em todos eles.
+# Cada conexão tem uma trava: uma thread por vez em cada fragmento. Um fluxo
+# ainda não consumido até o fim mantém a trava do seu fragmento; feche-o (ou
+# deixe-o ser coletado) para liberar o fragmento.
+#
+# Observação: o rank do FTS5 (bm25) usa as estatísticas de cada fragmento. Em
+# coleções divididas sem critério as notas são comparáveis; em fragmentos muito
+# diferentes entre si (ex.: um só de HQs) a intercalação por relevância é aproximada.
+
+TAMANHO_BLOCO = 500   # linhas por bloco entregue por um fragmento
+BLOCOS_NA_FILA = 4    # blocos que um fragmento pode adiantar antes de esperar
+
+T = TypeVar('T')
+_FIM = object()
+
+
+def nome_da_estante(caminho: str) -> str:
+    """Nome curto de uma estante: o arquivo sem pasta nem extensão."""
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def _em_blocos(linhas: Iterator[Any], tamanho: int) -> Iterator[List[Any]]:
+    while True:
+        bloco = list(islice(linhas, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+def _entregar(fila: queue.Queue, valor: Any, parar: threading.Event) -> bool:
+    """Põe 'valor' na fila, desistindo se quem consome já tiver parado."""
+    while not parar.is_set():
+        try:
+            fila.put(valor, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class GerenciadorDeEstantes:
+    """Abre várias estantes e faz buscas, filtros e estatísticas em todas ao mesmo tempo.
+
+    Os resultados identificam a estante de origem: (nome, (id, tipo, titulo, autor)).
+    Escritas vão para uma estante específica (gerenciador['nome'] é a Estante).
+    """
+
+    def __init__(self, caminhos: Iterable[str] = (), max_threads: Optional[int] = None):
+        self._estantes: Dict[str, Estante] = {}
+        self._travas: Dict[str, threading.Lock] = {}
+        self._max_threads = max_threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        for caminho in caminhos:
+            self.abrir(caminho)
+
+    # --- Abrir e fechar estantes ---
+    def abrir(self, caminho: str) -> str:
+        """Abre (criando, se preciso) o banco em 'caminho' e devolve o nome da estante.
+
+        Um arquivo já aberto (mesmo que por outro caminho) devolve o nome que já tem.
+        """
+        arquivo = os.path.realpath(caminho)
+        for nome, estante in self._estantes.items():
+            if os.path.realpath(estante.db_path) == arquivo:
+                return nome
+        nome = nome_da_estante(caminho)
+        if nome in self._estantes:
+            # Dois arquivos com o mesmo nome em pastas diferentes: o caminho completo os distingue
+            nome, sufixo = os.path.abspath(caminho), 2
+            while nome in self._estantes:
+                nome, sufixo = f"{os.path.abspath(caminho)} ({sufixo})", sufixo + 1
+        # check_same_thread=False: a conexão é usada pelas threads de consulta,
+        # uma por vez (veja _travas)
+        conexao = abrir_conexao(caminho, check_same_thread=False)
+        setup_database(conexao)
+        self._estantes[nome] = Estante(conexao, carregar=False)
+        self._travas[nome] = threading.Lock()
+        self._recriar_executor()
+        return nome
+
+    def fechar_estante(self, nome: str) -> None:
+        with self._travas[nome]:
+            self._estantes.pop(nome).fechar()
+        del self._travas[nome]
+        self._recriar_executor()
+
+    def fechar(self) -> None:
+        for nome in list(self._estantes):
+            self.fechar_estante(nome)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _recriar_executor(self) -> None:
+        # Uma thread por estante (ou 'max_threads'), para que nenhuma espere pela outra
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=self._max_threads or max(1, len(self._estantes)),
+                                            thread_name_prefix='estantes')
+
+    def __enter__(self) -> 'GerenciadorDeEstantes':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.fechar()
+
+    def __getitem__(self, nome: str) -> Estante:
+        return self._estantes[nome]
+
+    def __len__(self) -> int:
+        return len(self._estantes)
+
+    @property
+    def nomes(self) -> List[str]:
+        return list(self._estantes)
+
+    # --- Distribuição das consultas ---
+    def _em_paralelo(self, consulta: Callable[[Estante], T]) -> List[Tuple[str, T]]:
+        """Roda 'consulta' em todas as estantes ao mesmo tempo; (nome, resultado) na ordem de abertura."""
+        def executar(nome: str) -> T:
+            with self._travas[nome]:
+                return consulta(self._estantes[nome])
+
+        futuros = [(nome, self._executor.submit(executar, nome)) for nome in self._estantes]
+        return [(nome, futuro.result()) for nome, futuro in futuros]
+
+    def _produzir(self, nome: str, fluxo: Callable[[Estante], Iterator[Tuple[Any, tuple]]],
+                  fila: queue.Queue, parar: threading.Event, tamanho_bloco: int) -> None:
+        try:
+            with self._travas[nome]:
+                linhas = fluxo(self._estantes[nome])
+                try:
+                    for bloco in _em_blocos(linhas, tamanho_bloco):
+                        if not _entregar(fila, bloco, parar):
+                            return
+                finally:
+                    linhas.close()  # fecha o cursor antes de liberar a conexão
+        except Exception as erro:
+            _entregar(fila, erro, parar)
+            return
+        _entregar(fila, _FIM, parar)
+
+    @staticmethod
+    def _consumir(nome: str, fila: queue.Queue) -> Iterator[Tuple[Any, str, tuple]]:
+        while True:
+            bloco = fila.get()
+            if bloco is _FIM:
+                return
+            if isinstance(bloco, Exception):
+                raise bloco
+            for chave, linha in bloco:
+                yield chave, nome, linha
+
+    def _intercalar(self, fluxo: Callable[[Estante], Iterator[Tuple[Any, tuple]]],
+                    decrescente: bool = False, tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[Tuple[str, tuple]]:
+        """Intercala os fluxos ordenados de todas as estantes em um só, sob demanda.
+
+        Cada estante produz numa thread própria (não do executor: heapq.merge
+        precisa do primeiro bloco de TODAS antes de devolver o primeiro item).
+        """
+        parar = threading.Event()
+        fluxos, threads = [], []
+        for nome in self._estantes:
+            fila: queue.Queue = queue.Queue(maxsize=BLOCOS_NA_FILA)
+            thread = threading.Thread(target=self._produzir, args=(nome, fluxo, fila, parar, tamanho_bloco),
+                                      name=f'estante-{nome}', daemon=True)
+            thread.start()
+            threads.append(thread)
+            fluxos.append(self._consumir(nome, fila))
+        try:
+            for _, nome, linha in heapq.merge(*fluxos, key=itemgetter(0), reverse=decrescente):
+                yield nome, linha
+        finally:
+            parar.set()
+            for thread in threads:
+                thread.join()
+
+    # --- Consultas ---
+    def contar_itens(self) -> Dict[str, int]:
+        return dict(self._em_paralelo(lambda estante: estante.contar_itens()))
+
+    def iterar_filtro(self, tipo: Optional[str] = None, autor: Optional[str] = None,
+                      titulo: Optional[str] = None, ordem: str = 'id', decrescente: bool = False,
+                      limite: Optional[int] = None) -> Iterator[Tuple[str, tuple]]:
+        """Itens de todas as estantes que atendem ao filtro, na ordem pedida (como na GUI).
+
+        Com 'limite', o fluxo termina depois dos 'limite' primeiros.
+        """
+        bloco = min(TAMANHO_BLOCO, limite or TAMANHO_BLOCO)
+        fluxo = self._intercalar(lambda estante: estante.iterar_filtro(
+            tipo, autor, titulo, ordem, decrescente, bloco, limite), decrescente, bloco)
+        return islice(fluxo, limite) if limite is not None else fluxo
+
+    def filtrar(self, tipo: Optional[str] = None, autor: Optional[str] = None,
+                titulo: Optional[str] = None, limite: Optional[int] = 100, ordem: str = 'id',
+                decrescente: bool = False) -> List[Tuple[str, tuple]]:
+        return list(self.iterar_filtro(tipo, autor, titulo, ordem, decrescente, limite))
+
+    def iterar_busca(self, termo: str, limite: Optional[int] = None,
+                     **filtro: Optional[str]) -> Iterator[Tuple[str, tuple]]:
+        """Resultados da busca FTS5 em todas as estantes, do mais para o menos relevante."""
+        bloco = min(TAMANHO_BLOCO, limite or TAMANHO_BLOCO)
+        fluxo = self._intercalar(lambda estante: estante.iterar_busca(termo, bloco, limite, **filtro),
+                                 tamanho_bloco=bloco)
+        return islice(fluxo, limite) if limite is not None else fluxo
+
+    def buscar(self, termo: str, limite: Optional[int] = 50, **filtro: Optional[str]) -> List[Tuple[str, tuple]]:
+        return list(self.iterar_busca(termo, limite, **filtro))
+
+    def buscar_aproximado(self, termo: str, limite: int = 20,
+                          **filtro: Any) -> List[Tuple[str, str, float]]:
+        """(nome da estante, id, similaridade) dos 'limite' itens mais parecidos, em todas as estantes."""
+        por_estante = self._em_paralelo(lambda estante: estante.buscar_aproximado_ids(termo, limite, **filtro))
+        candidatos = ((nota, nome, item_id) for nome, resultados in por_estante for item_id, nota in resultados)
+        return [(nome, item_id, nota) for nota, nome, item_id in heapq.nlargest(limite, candidatos)]
+
+    def obter_item(self, item_id: str) -> Optional[Tuple[str, ItemDeLeitura]]:
+        """Procura o ID em todas as estantes; devolve (nome da estante, item)."""
+        for nome, item in self._em_paralelo(lambda estante: estante.obter_item(item_id)):
+            if item is not None:
+                return nome, item
+        return None
+
+    def estatisticas(self, limite_ranking: int = 10) -> EstatisticasEstante:
+        """As estatísticas de todas as estantes somadas."""
+        por_estante = [resultado for _, resultado in
+                       self._em_paralelo(lambda estante: estante.estatisticas(limite_ranking))]
+        total = EstatisticasEstante()
+        por_tipo: Counter = Counter()
+        meses: Counter = Counter()
+        for resultado in por_estante:
+            por_tipo.update(resultado.por_tipo)
+            meses.update(dict(resultado.revistas_por_mes))
+            total.total_paginas_livros += resultado.total_paginas_livros
+        total.por_tipo = dict(por_tipo)
+        total.revistas_por_mes = sorted(meses.items(), key=lambda par: _ordem_do_mes(par[0]))
+        total.principais_autores = self._somar_rankings(
+            'autor', [r.principais_autores for r in por_estante], limite_ranking)
+        total.principais_desenhistas = self._somar_rankings(
+            'desenhista', [r.principais_desenhistas for r in por_estante], limite_ranking)
+        return total
+
+    def _somar_rankings(self, grupo: str, rankings: List[List[Tuple[str, int]]],
+                        limite: int) -> List[Tuple[str, int]]:
+        candidatos = {chave for ranking in rankings for chave, _ in ranking}
+        if not candidatos:
+            return []
+        somas: Counter = Counter()
+        for _, quantidades in self._em_paralelo(
+                lambda estante: estante.quantidades_nos_contadores(grupo, candidatos)):
+            somas.update(quantidades)
+        return sorted(somas.items(), key=lambda par: (-par[1], par[0]))[:limite]
+
+
+# --- LINHA DE COMANDO ---
+# Exemplos:
+#   python multiplas_estantes.py --db livros.db --db hqs.db buscar sandman
+#   python multiplas_estantes.py --db livros.db --db hqs.db filtrar --tipo HQ --ordem titulo
+#   python multiplas_estantes.py --db livros.db --db hqs.db estatisticas
+if __name__ == "__main__":
+    import json
+    import argparse
+    from banco_de_dados import CHAVES_DE_ORDENACAO, TIPOS_DE_ITEM
+
+    parser = argparse.ArgumentParser(description="Consulta várias estantes (arquivos .db) de uma vez.")
+    parser.add_argument('--db', action='append', default=[], help="banco de uma estante (repita a opção)")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_buscar = subcomandos.add_parser('buscar', help="busca por palavras (FTS5)")
+    parser_buscar.add_argument('termo')
+    parser_buscar.add_argument('--limite', type=int, default=20)
+
+    parser_aproximado = subcomandos.add_parser('aproximado', help="busca tolerante a erros de digitação")
+    parser_aproximado.add_argument('termo')
+    parser_aproximado.add_argument('--limite', type=int, default=20)
+
+    parser_filtrar = subcomandos.add_parser('filtrar', help="filtra por tipo/autor/título")
+    parser_filtrar.add_argument('--tipo', choices=sorted(TIPOS_DE_ITEM))
+    parser_filtrar.add_argument('--autor')
+    parser_filtrar.add_argument('--titulo')
+    parser_filtrar.add_argument('--ordem', choices=sorted(CHAVES_DE_ORDENACAO), default='id')
+    parser_filtrar.add_argument('--decrescente', action='store_true')
+    parser_filtrar.add_argument('--limite', type=int, default=20)
+
+    subcomandos.add_parser('estatisticas', help="estatísticas somadas de todas as estantes")
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("informe ao menos uma estante com --db")
+    with GerenciadorDeEstantes(args.db) as gerenciador:
+        if args.comando == 'buscar':
+            for nome, (item_id, tipo, titulo, autor) in gerenciador.buscar(args.termo, args.limite):
+                print(f"[{nome}] [{tipo}] {titulo} - {autor} ({item_id[:8]})")
+        elif args.comando == 'aproximado':
+            for nome, item_id, nota in gerenciador.buscar_aproximado(args.termo, args.limite):
+                print(f"[{nome}] {gerenciador[nome].obter_item(item_id)} ({nota:.0%})")
+        elif args.comando == 'filtrar':
+            for nome, (item_id, tipo, titulo, autor) in gerenciador.filtrar(
+                    args.tipo, args.autor, args.titulo, args.limite, args.ordem, args.decrescente):
+                print(f"[{nome}] [{tipo}] {titulo} - {autor} ({item_id[:8]})")
+        else:
+            print(json.dumps(gerenciador.estatisticas().to_dict(), ensure_ascii=False, indent=2))
@@ -0,0 +1,459 @@
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from banco_de_dados import (DB_NAME, CHAVES_DE_ORDENACAO, TIPOS_DE_ITEM, abrir_conexao, setup_database,
+                            Estante, criar_item)
+
+# --- SERVIDOR HTTP/JSON LOCAL (ASYNCIO) ---
+# Outros programas da rede consultam e alteram a estante sem a janela e sem o
+# menu. Rotas (respostas em JSON; os itens no formato de ItemDeLeitura.to_dict):
+#   GET    /itens              lista e filtra: ?tipo=HQ&autor=gaiman&titulo=san
+#                              &ordem=titulo&decrescente=1&limite=50&completo=1
+#                              Paginada por keyset: a resposta traz "proxima" (a
+#                              chave da última linha); a página seguinte é a mesma
+#                              consulta com &depois=<proxima em JSON>
+#   GET    /itens/<id>         o item completo; aceita o início do ID
+#   GET    /busca?q=sandman    busca FTS5 (&limite, &tipo/&autor/&titulo,
+#                              &aproximada=1 para tolerar erros de digitação)
+#   GET    /estatisticas       números da coleção (&ranking=10)
+#   POST   /itens              corpo: objeto com os campos de to_dict (o 'id' é
+#                              opcional); &permitir_duplicata=1 aceita repetidos
+#   DELETE /itens/<id>         remove; aceita o início do ID
+# Erros: {"erro": "..."} com o status HTTP: 400 (parâmetro ou corpo inválido),
+# 404, 405, 409 (ID ambíguo, item duplicado, ID já usado), 411, 413.
+#
+# Concorrência: o laço do asyncio só lê e escreve nos sockets. Cada consulta
+# roda numa thread com uma das N conexões de LEITURA (Estante somente leitura,
+# com mmap), emprestadas de uma fila: até N consultas ao mesmo tempo, e o
+# SQLite libera o GIL enquanto executa. As escritas passam por UMA thread, com
+# a única conexão de escrita, uma de cada vez; em WAL, as leituras não esperam
+# por elas. Uma escrita confirmada já aparece na próxima leitura (o cache de
+# consultas de cada conexão é esvaziado quando o PRAGMA data_version muda). Com
+# escrita adiada (--escrita-adiada ou ESTANTE_ESCRITA_ADIADA=1), as alterações
+# são gravadas em grupos e só aparecem nas leituras quando o grupo é gravado.
+#
+# Sem autenticação nem HTTPS: feito para a rede local (por padrão, só 127.0.0.1).
+
+PORTA_PADRAO = 8765
+LEITORES_PADRAO = 4
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+TAMANHO_MAXIMO_CORPO = 1 << 20  # 1 MiB
+INTERVALO_DESCARGA_S = 0.5      # com escrita adiada: confere o prazo do grupo pendente
+
+COLUNAS_RESUMO = ('id', 'tipo', 'titulo', 'autor')
+
+
+class ErroHTTP(Exception):
+    """Resposta de erro: o status HTTP e o corpo JSON ({'erro': mensagem, ...})."""
+
+    def __init__(self, status: HTTPStatus, mensagem: str, **detalhes: Any):
+        super().__init__(mensagem)
+        self.status = status
+        self.corpo = {'erro': mensagem, **detalhes}
+
+
+# --- PARÂMETROS DA URL ---
+def _inteiro(consulta: Dict[str, str], nome: str, padrao: int, maximo: Optional[int] = None) -> int:
+    try:
+        valor = int(consulta.get(nome, padrao))
+    except ValueError:
+        raise ErroHTTP(HTTPStatus.BAD_REQUEST, f"'{nome}' deve ser um número inteiro.")
+    if valor < 1 or (maximo is not None and valor > maximo):
+        raise ErroHTTP(HTTPStatus.BAD_REQUEST, f"'{nome}' deve estar entre 1 e {maximo or 'infinito'}.")
+    return valor
+
+def _booleano(consulta: Dict[str, str], nome: str) -> bool:
+    return consulta.get(nome, '').lower() in ('1', 'true', 'sim')
+
+def _filtro(consulta: Dict[str, str]) -> Dict[str, Optional[str]]:
+    tipo = consulta.get('tipo') or None
+    if tipo is not None:
+        # Aceita "hq", "LIVRO"...
+        tipo = {nome.lower(): nome for nome in TIPOS_DE_ITEM}.get(tipo.lower())
+        if tipo is None:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, f"'tipo' deve ser um de: {', '.join(TIPOS_DE_ITEM)}.")
+    return {'tipo': tipo, 'autor': consulta.get('autor') or None, 'titulo': consulta.get('titulo') or None}
+
+def _itens_json(estante: Estante, linhas: List[tuple], completo: bool) -> List[Dict[str, Any]]:
+    """Linhas (id, tipo, titulo, autor) como objetos JSON; com 'completo', o to_dict() de cada item."""
+    if not completo:
+        return [dict(zip(COLUNAS_RESUMO, linha)) for linha in linhas]
+    return [item.to_dict() for item in estante.carregar_itens_por_ids([linha[0] for linha in linhas])]
+
+def _exigir_um(prefixo: str, ids: List[str]) -> None:
+    if not ids:
+        raise ErroHTTP(HTTPStatus.NOT_FOUND, f"Nenhum item com o ID '{prefixo}'.")
+    if len(ids) > 1:
+        raise ErroHTTP(HTTPStatus.CONFLICT, f"O ID '{prefixo}' é ambíguo: use mais caracteres.",
+                       candidatos=ids[:5])
+
+
+# --- SERVIDOR ---
+Rota = Callable[..., Awaitable[Tuple[HTTPStatus, Any]]]
+
+class ServidorEstante:
+    """Servidor HTTP/JSON de uma estante: N conexões de leitura e uma única de escrita."""
+
+    def __init__(self, db_path: str = DB_NAME, leitores: int = LEITORES_PADRAO, escrita_adiada: bool = False):
+        # A conexão de escrita abre primeiro: ela cria/atualiza o esquema, que
+        # as conexões somente leitura não podem migrar
+        conexao = abrir_conexao(db_path, check_same_thread=False)
+        setup_database(conexao)
+        self.escritor = Estante(conexao, carregar=False, escrita_adiada=escrita_adiada)
+        # check_same_thread=False: cada conexão passa por várias threads do
+        # executor, mas só por uma de cada vez (a fila de leitores garante isso)
+        self._todos_os_leitores = [
+            Estante(abrir_conexao(db_path, check_same_thread=False, somente_leitura=True), somente_leitura=True)
+            for _ in range(leitores)]
+        self._executor_leitura = ThreadPoolExecutor(leitores, thread_name_prefix='leitura')
+        self._executor_escrita = ThreadPoolExecutor(1, thread_name_prefix='escrita')
+        self._leitores: Optional[asyncio.Queue] = None  # criada já dentro do laço do asyncio
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._conexoes: Set[asyncio.StreamWriter] = set()
+        self._tarefa_descarga: Optional[asyncio.Task] = None
+        self.requisicoes = 0
+        self._rotas: Dict[Tuple[str, str, int], Rota] = {
+            # (método, primeiro trecho do caminho, quantidade de trechos)
+            ('GET', 'itens', 1): self._listar,
+            ('GET', 'itens', 2): self._obter,
+            ('POST', 'itens', 1): self._adicionar,
+            ('DELETE', 'itens', 2): self._remover,
+            ('GET', 'busca', 1): self._buscar,
+            ('GET', 'estatisticas', 1): self._estatisticas,
+        }
+
+    async def iniciar(self, host: str = '127.0.0.1', porta: int = PORTA_PADRAO) -> Tuple[str, int]:
+        """Começa a aceitar conexões; devolve o endereço (porta=0 escolhe uma livre)."""
+        self._leitores = asyncio.Queue()
+        for leitor in self._todos_os_leitores:
+            self._leitores.put_nowait(leitor)
+        self._servidor = await asyncio.start_server(self._atender_conexao, host, porta)
+        if self.escritor.diario.adiado:
+            self._tarefa_descarga = asyncio.create_task(self._descarregar_periodicamente())
+        return self._servidor.sockets[0].getsockname()[:2]
+
+    async def fechar(self) -> None:
+        """Para de aceitar conexões, grava o grupo pendente e fecha todas as conexões do banco."""
+        if self._servidor is not None:
+            self._servidor.close()
+            for saida in list(self._conexoes):
+                saida.close()
+            await self._servidor.wait_closed()
+        if self._tarefa_descarga is not None:
+            self._tarefa_descarga.cancel()
+        await self._escrever(lambda estante: estante.fechar())
+        self._executor_escrita.shutdown()
+        self._executor_leitura.shutdown()
+        for leitor in self._todos_os_leitores:
+            leitor.fechar()
+
+    async def _ler(self, operacao: Callable[[Estante], Any]) -> Any:
+        """Roda 'operacao(estante)' numa thread, com uma conexão de leitura livre."""
+        leitor = await self._leitores.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor_leitura, operacao, leitor)
+        finally:
+            self._leitores.put_nowait(leitor)
+
+    async def _escrever(self, operacao: Callable[[Estante], Any]) -> Any:
+        """Roda 'operacao(estante)' na thread de escrita, depois das escritas já enfileiradas."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor_escrita, operacao, self.escritor)
+
+    async def _descarregar_periodicamente(self) -> None:
+        while True:
+            await asyncio.sleep(INTERVALO_DESCARGA_S)
+            await self._escrever(lambda estante: estante.descarregar_se_vencido())
+
+    # --- HTTP/1.1 (só o necessário: Content-Length e keep-alive) ---
+    async def _atender_conexao(self, entrada: asyncio.StreamReader, saida: asyncio.StreamWriter) -> None:
+        """Uma conexão TCP: várias requisições, uma depois da outra (keep-alive)."""
+        self._conexoes.add(saida)
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(entrada)
+                except ErroHTTP as erro:
+                    # Requisição malformada: responde e fecha (o resto do fluxo é ilegível)
+                    self._enviar(saida, erro.status, erro.corpo, manter_aberta=False)
+                    await saida.drain()
+                    break
+                if requisicao is None:
+                    break
+                metodo, alvo, manter_aberta, corpo = requisicao
+                status, resposta = await self._responder(metodo, alvo, corpo)
+                self._enviar(saida, status, resposta, manter_aberta)
+                await saida.drain()
+                if not manter_aberta:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass  # O cliente desistiu no meio: nada a responder
+        finally:
+            self._conexoes.discard(saida)
+            saida.close()
+
+    @staticmethod
+    async def _ler_requisicao(entrada: asyncio.StreamReader) -> Optional[Tuple[str, str, bool, bytes]]:
+        """(método, alvo, manter a conexão aberta, corpo), ou None se o cliente fechou a conexão."""
+        linha = await entrada.readline()
+        if not linha:
+            return None
+        partes = linha.decode('latin-1').split()
+        if len(partes) != 3 or not partes[2].startswith('HTTP/'):
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Linha de requisição inválida.")
+        metodo, alvo, versao = partes
+
+        cabecalhos: Dict[str, str] = {}
+        while True:
+            linha = await entrada.readline()
+            if linha in (b'\r\n', b'\n'):
+                break
+            if not linha:
+                raise asyncio.IncompleteReadError(b'', None)
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if 'transfer-encoding' in cabecalhos:
+            raise ErroHTTP(HTTPStatus.LENGTH_REQUIRED, "Envie o corpo com Content-Length.")
+        try:
+            tamanho = int(cabecalhos.get('content-length', 0))
+        except ValueError:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise ErroHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                           f"Corpo maior que {TAMANHO_MAXIMO_CORPO // 1024} KiB.")
+        corpo = await entrada.readexactly(tamanho) if tamanho > 0 else b''
+
+        conexao = cabecalhos.get('connection', '').lower()
+        manter_aberta = conexao != 'close' if versao == 'HTTP/1.1' else conexao == 'keep-alive'
+        return metodo.upper(), alvo, manter_aberta, corpo
+
+    @staticmethod
+    def _enviar(saida: asyncio.StreamWriter, status: HTTPStatus, resposta: Any, manter_aberta: bool) -> None:
+        dados = json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+        cabecalho = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                     "Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(dados)}\r\n"
+                     f"Connection: {'keep-alive' if manter_aberta else 'close'}\r\n\r\n")
+        saida.write(cabecalho.encode('latin-1') + dados)
+
+    async def _responder(self, metodo: str, alvo: str, corpo: bytes) -> Tuple[HTTPStatus, Any]:
+        self.requisicoes += 1
+        partes = urlsplit(alvo)
+        trechos = [unquote(trecho) for trecho in partes.path.split('/') if trecho]
+        consulta = {nome: valores[-1] for nome, valores in parse_qs(partes.query).items()}
+        chave = (metodo, trechos[0] if trechos else '', len(trechos))
+        rota = self._rotas.get(chave)
+        if rota is None:
+            if any(outra[1:] == chave[1:] for outra in self._rotas):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'erro': f"Método {metodo} não aceito em {partes.path}."}
+            return HTTPStatus.NOT_FOUND, {'erro': f"Rota desconhecida: {partes.path}"}
+        try:
+            return await rota(consulta, corpo, *trechos[1:])
+        except ErroHTTP as erro:
+            return erro.status, erro.corpo
+        except ValueError as erro:
+            # criar_item, ordenacao_sql e condicao_apos_chave explicam o que está errado
+            return HTTPStatus.BAD_REQUEST, {'erro': str(erro)}
+        except Exception as erro:
+            print(f"\n❌ ERRO em {metodo} {partes.path}: {erro!r}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'erro': "Erro interno do servidor."}
+
+    # --- ROTAS ---
+    async def _listar(self, consulta: Dict[str, str], corpo: bytes) -> Tuple[HTTPStatus, Any]:
+        filtro = _filtro(consulta)
+        ordem = consulta.get('ordem', 'id')
+        if ordem not in CHAVES_DE_ORDENACAO:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, f"'ordem' deve ser uma de: {', '.join(CHAVES_DE_ORDENACAO)}.")
+        decrescente = _booleano(consulta, 'decrescente')
+        limite = _inteiro(consulta, 'limite', LIMITE_PADRAO, LIMITE_MAXIMO)
+        completo = _booleano(consulta, 'completo')
+        depois = None
+        if 'depois' in consulta:
+            try:
+                depois = json.loads(consulta['depois'])
+            except ValueError:
+                depois = None
+            if not isinstance(depois, list):
+                raise ErroHTTP(HTTPStatus.BAD_REQUEST, "'depois' deve ser o valor de 'proxima' (uma lista JSON).")
+
+        def consultar(estante: Estante) -> Dict[str, Any]:
+            # Uma linha a mais diz se existe a página seguinte
+            linhas = list(estante.iterar_filtro(**filtro, ordem=ordem, decrescente=decrescente,
+                                                limite=limite + 1, depois=depois))
+            proxima = list(linhas[limite - 1][0]) if len(linhas) > limite else None
+            return {'itens': _itens_json(estante, [linha for _, linha in linhas[:limite]], completo),
+                    'proxima': proxima}
+
+        return HTTPStatus.OK, await self._ler(consultar)
+
+    async def _obter(self, consulta: Dict[str, str], corpo: bytes, prefixo: str) -> Tuple[HTTPStatus, Any]:
+        def consultar(estante: Estante) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+            ids = estante.resolver_prefixo(prefixo, limite=6)
+            item = estante.obter_item(ids[0]) if len(ids) == 1 else None
+            return ids, item.to_dict() if item else None
+
+        ids, dados = await self._ler(consultar)
+        _exigir_um(prefixo, ids)
+        if dados is None:
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, f"Nenhum item com o ID '{prefixo}'.")
+        return HTTPStatus.OK, dados
+
+    async def _buscar(self, consulta: Dict[str, str], corpo: bytes) -> Tuple[HTTPStatus, Any]:
+        termo = consulta.get('q', '').strip()
+        if not termo:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Informe o termo da busca: /busca?q=...")
+        filtro = _filtro(consulta)
+        limite = _inteiro(consulta, 'limite', LIMITE_PADRAO, LIMITE_MAXIMO)
+        completo = _booleano(consulta, 'completo')
+        aproximada = _booleano(consulta, 'aproximada')
+
+        def consultar(estante: Estante) -> List[Dict[str, Any]]:
+            # buscar_ids passa pelo cache de consultas da conexão: os termos mais
+            # pedidos não refazem o ranking do FTS5 até a próxima escrita
+            notas = (estante.buscar_aproximado_ids(termo, limite, **filtro) if aproximada
+                     else [(item_id, None) for item_id in estante.buscar_ids(termo, limite, **filtro)])
+            itens = {item.id: item for item in estante.carregar_itens_por_ids([item_id for item_id, _ in notas])}
+            resultados = []
+            for item_id, nota in notas:
+                if item_id in itens:
+                    dados = itens[item_id].to_dict()
+                    if not completo:
+                        dados = {coluna: dados[coluna] for coluna in COLUNAS_RESUMO}
+                    resultados.append(dados if nota is None else {**dados, 'similaridade': nota})
+            return resultados
+
+        return HTTPStatus.OK, {'itens': await self._ler(consultar)}
+
+    async def _estatisticas(self, consulta: Dict[str, str], corpo: bytes) -> Tuple[HTTPStatus, Any]:
+        ranking = _inteiro(consulta, 'ranking', 10, LIMITE_MAXIMO)
+        return HTTPStatus.OK, await self._ler(lambda estante: estante.estatisticas(ranking).to_dict())
+
+    async def _adicionar(self, consulta: Dict[str, str], corpo: bytes) -> Tuple[HTTPStatus, Any]:
+        try:
+            dados = json.loads(corpo or b'null')
+        except ValueError:
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "O corpo não é um JSON válido.")
+        item = criar_item(dados)  # ValueError -> 400 com a mensagem da validação
+        permitir_duplicata = _booleano(consulta, 'permitir_duplicata')
+
+        def gravar(estante: Estante) -> Tuple[str, Optional[str]]:
+            if estante.adicionar_item(item, permitir_duplicata=permitir_duplicata):
+                return 'adicionado', None
+            existente = estante.encontrar_duplicata(item)
+            if existente:
+                return 'duplicata', existente
+            if estante.carregar_item_db(item.id) is not None:
+                return 'id_em_uso', item.id
+            return 'erro', None
+
+        resultado, existente = await self._escrever(gravar)
+        if resultado == 'adicionado':
+            return HTTPStatus.CREATED, item.to_dict()
+        if resultado == 'duplicata':
+            raise ErroHTTP(HTTPStatus.CONFLICT, "Já existe um item igual (use permitir_duplicata=1).",
+                           existente=existente)
+        if resultado == 'id_em_uso':
+            raise ErroHTTP(HTTPStatus.CONFLICT, f"Já existe um item com o ID '{existente}'.", existente=existente)
+        raise ErroHTTP(HTTPStatus.INTERNAL_SERVER_ERROR, "Não foi possível gravar o item.")
+
+    async def _remover(self, consulta: Dict[str, str], corpo: bytes, prefixo: str) -> Tuple[HTTPStatus, Any]:
+        def remover(estante: Estante) -> Tuple[List[str], List[str]]:
+            ids = estante.resolver_prefixo(prefixo, limite=6)
+            return ids, estante.remover_item(ids[0]) if len(ids) == 1 else []
+
+        ids, removidos = await self._escrever(remover)
+        _exigir_um(prefixo, ids)
+        if not removidos:
+            raise ErroHTTP(HTTPStatus.INTERNAL_SERVER_ERROR, f"Não foi possível remover '{prefixo}'.")
+        return HTTPStatus.OK, {'removidos': removidos}
+
+
+# --- CLIENTE (usado pelos testes e por carga_http.py) ---
+class ClienteHTTP:
+    """Cliente mínimo do servidor: HTTP/1.1 com keep-alive, uma requisição por vez."""
+
+    def __init__(self, host: str = '127.0.0.1', porta: int = PORTA_PADRAO):
+        self.host = host
+        self.porta = porta
+        self._entrada: Optional[asyncio.StreamReader] = None
+        self._saida: Optional[asyncio.StreamWriter] = None
+
+    async def requisitar(self, metodo: str, caminho: str, dados: Any = None) -> Tuple[int, Any]:
+        """Envia a requisição ('caminho' já codificado, com a query) e devolve (status, JSON)."""
+        if self._saida is None:
+            self._entrada, self._saida = await asyncio.open_connection(self.host, self.porta)
+        corpo = b'' if dados is None else json.dumps(dados).encode('utf-8')
+        self._saida.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Length: {len(corpo)}\r\n\r\n".encode('latin-1') + corpo)
+        await self._saida.drain()
+
+        status = int((await self._entrada.readline()).split()[1])
+        tamanho, fechar = 0, False
+        while True:
+            linha = await self._entrada.readline()
+            if linha in (b'\r\n', b'\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            if nome.strip().lower() == 'content-length':
+                tamanho = int(valor)
+            elif nome.strip().lower() == 'connection':
+                fechar = valor.strip().lower() == 'close'
+        resposta = json.loads(await self._entrada.readexactly(tamanho))
+        if fechar:
+            await self.fechar()
+        return status, resposta
+
+    async def fechar(self) -> None:
+        if self._saida is not None:
+            self._saida.close()
+            self._saida = self._entrada = None
+
+
+# --- EXECUÇÃO PELA LINHA DE COMANDO ---
+# Exemplos:
+#   python servidor_http.py servir                                   # estante_virtual.db em 127.0.0.1:8765
+#   python servidor_http.py servir --db hqs.db --porta 9000 --leitores 8
+#   curl 'http://127.0.0.1:8765/busca?q=sandman&limite=5'
+#   curl -X POST http://127.0.0.1:8765/itens -d '{"tipo": "Livro", "titulo": "Dom Casmurro", "autor": "Machado de Assis", "paginas": 256}'
+#   python carga_http.py --iniciar --conexoes 16 --duracao 10        # teste de carga
+if __name__ == "__main__":
+    import signal
+    import argparse
+    from escrita_adiada import ativada_pelo_ambiente
+
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON local da Estante Virtual.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    parser_servir = subcomandos.add_parser('servir', help="atende requisições até Ctrl+C")
+    parser_servir.add_argument('--db', default=DB_NAME, help="banco de dados (padrão: estante_virtual.db)")
+    parser_servir.add_argument('--host', default='127.0.0.1', help="0.0.0.0 aceita conexões de outras máquinas")
+    parser_servir.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser_servir.add_argument('--leitores', type=int, default=LEITORES_PADRAO, help="conexões de leitura")
+    parser_servir.add_argument('--escrita-adiada', action='store_true', help="grava as alterações em grupos")
+    args = parser.parse_args()
+
+    async def servir() -> None:
+        servidor = ServidorEstante(args.db, args.leitores, args.escrita_adiada or ativada_pelo_ambiente())
+        host, porta = await servidor.iniciar(args.host, args.porta)
+        print(f"\n🌐 Servindo '{args.db}' em http://{host}:{porta} "
+              f"({args.leitores} conexão(ões) de leitura, 1 de escrita). Ctrl+C encerra.", flush=True)
+        parar = asyncio.Event()
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(sinal, parar.set)
+            except (NotImplementedError, AttributeError, ValueError):
+                pass  # Windows: o Ctrl+C chega como KeyboardInterrupt e cancela a espera
+        try:
+            await parar.wait()
+        finally:
+            await servidor.fechar()
+            print(f"\n👋 Servidor encerrado ({servidor.requisicoes} requisição(ões) atendida(s)).")
+
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
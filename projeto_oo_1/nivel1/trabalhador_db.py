@@ -0,0 +1,123 @@
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+from banco_de_dados import Estante
+
+# --- TRABALHADOR DE BANCO DE DADOS (THREAD DE FUNDO) ---
+# A interface gráfica nunca deve esperar pelo SQLite. As operações da Estante
+# são enviadas a uma única thread de trabalho (que é a única a usar a conexão
+# da estante) e os resultados voltam por uma fila. Quem chama
+# despachar_resultados() — a GUI, via after(), ou um script sem interface —
+# executa os callbacks na SUA própria thread.
+
+class OperacaoCancelada(Exception):
+    """A tarefa foi cancelada antes de começar a executar."""
+
+
+class Tarefa:
+    """Uma operação enviada ao TrabalhadorDB; permite acompanhar e cancelar."""
+
+    def __init__(self, operacao: Callable[[Estante, 'Tarefa'], Any],
+                 ao_concluir: Optional[Callable[[Any], None]],
+                 ao_falhar: Optional[Callable[[BaseException], None]],
+                 ao_progredir: Optional[Callable[[Any], None]],
+                 cancelavel: bool, resultados: queue.Queue):
+        self.operacao = operacao
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.ao_progredir = ao_progredir
+        self.cancelavel = cancelavel
+        self.concluida = False
+        self._resultados = resultados
+        self._cancelamento = threading.Event()
+
+    def cancelar(self) -> None:
+        """Pede o cancelamento. Tarefas que ainda não começaram nem chegam a rodar;
+        as que já estão rodando param no próximo ponto em que consultam 'cancelada'."""
+        if self.cancelavel:
+            self._cancelamento.set()
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelamento.is_set()
+
+    def informar_progresso(self, informacao: Any) -> None:
+        """Chamado pela operação (na thread de trabalho) para relatar andamento."""
+        self._resultados.put((self, 'progresso', informacao))
+
+
+class TrabalhadorDB:
+    """Executa operações da Estante, em ordem, numa thread própria.
+
+    Depois de entregue ao trabalhador, a estante só deve ser usada pela thread
+    de trabalho (a conexão precisa ter sido aberta com check_same_thread=False).
+    A leitura de 'estante.itens' em outra thread continua segura.
+    """
+
+    def __init__(self, estante: Estante):
+        self.estante = estante
+        self._tarefas: queue.Queue = queue.Queue()
+        self._resultados: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._executar, name='TrabalhadorDB', daemon=True)
+        self._thread.start()
+
+    def submeter(self, operacao: Callable[[Estante, Tarefa], Any],
+                 ao_concluir: Optional[Callable[[Any], None]] = None,
+                 ao_falhar: Optional[Callable[[BaseException], None]] = None,
+                 ao_progredir: Optional[Callable[[Any], None]] = None,
+                 cancelavel: bool = False) -> Tarefa:
+        """Agenda 'operacao(estante, tarefa)' e devolve a Tarefa correspondente."""
+        tarefa = Tarefa(operacao, ao_concluir, ao_falhar, ao_progredir, cancelavel, self._resultados)
+        self._tarefas.put(tarefa)
+        return tarefa
+
+    def _executar(self) -> None:
+        while True:
+            tarefa = self._tarefas.get()
+            if tarefa is None:
+                break
+            if tarefa.cancelada:
+                self._resultados.put((tarefa, 'erro', OperacaoCancelada()))
+                continue
+            try:
+                resultado = tarefa.operacao(self.estante, tarefa)
+            except Exception as e:
+                self._resultados.put((tarefa, 'erro', e))
+            else:
+                self._resultados.put((tarefa, 'ok', resultado))
+        # A conexão é fechada pela mesma thread que a utilizou
+        self.estante.fechar()
+
+    def despachar_resultados(self, limite: int = 100) -> int:
+        """Executa, na thread que chamar, os callbacks dos resultados prontos.
+
+        Não bloqueia: processa no máximo 'limite' mensagens e retorna quantas foram.
+        """
+        processados = 0
+        while processados < limite:
+            try:
+                tarefa, tipo, valor = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            processados += 1
+
+            if tipo == 'progresso':
+                if tarefa.ao_progredir:
+                    tarefa.ao_progredir(valor)
+                continue
+
+            tarefa.concluida = True
+            if tipo == 'ok':
+                if tarefa.ao_concluir:
+                    tarefa.ao_concluir(valor)
+            elif tarefa.ao_falhar:
+                tarefa.ao_falhar(valor)
+            elif not isinstance(valor, OperacaoCancelada):
+                print(f"\n❌ ERRO em operação de segundo plano: {valor}")
+        return processados
+
+    def encerrar(self, timeout: Optional[float] = None) -> None:
+        """Termina as tarefas já enviadas, fecha a estante e para a thread."""
+        self._tarefas.put(None)
+        self._thread.join(timeout)
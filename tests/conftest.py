@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Os módulos do projeto se importam pelo nome (ex.: "from banco_de_dados import ...")
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'projeto_oo_1')
+sys.path.insert(0, os.path.join(RAIZ, 'nivel1'))
+sys.path.insert(0, RAIZ)
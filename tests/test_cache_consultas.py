@@ -0,0 +1,60 @@
+import pytest
+
+from banco_de_dados import Estante, HQ, Livro
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    caminho = str(tmp_path / 'cache.db')
+    with Estante(db_path=caminho, carregar=False) as estante:
+        estante.adicionar_item(HQ("Sandman", "Neil Gaiman", "Sam Kieth", "sandman-1"))
+        estante.adicionar_item(Livro("Dom Casmurro", "Machado de Assis", 256, "dom-1"))
+    return caminho
+
+
+@pytest.fixture
+def estante(caminho):
+    with Estante(db_path=caminho, carregar=False) as estante:
+        yield estante
+
+
+def test_consulta_repetida_vem_do_cache(estante):
+    assert estante.buscar_ids('sandman') == ['sandman-1']
+    falhas = estante.cache.falhas
+    assert estante.buscar_ids('  SANDMAN ') == ['sandman-1']
+    assert estante.cache.falhas == falhas and estante.cache.acertos == 1
+
+
+def test_insercao_descarta_so_os_resultados_afetados(estante):
+    estante.buscar_ids('sandman')
+    estante.filtrar_ids(tipo='Livro')
+    estante.adicionar_item(HQ("Sandman: Prelúdios", "Neil Gaiman", "Sam Kieth", "sandman-2"))
+    assert estante.cache.estatisticas()['entradas'] == 1  # O filtro por Livro continua guardado
+    assert sorted(estante.buscar_ids('sandman')) == ['sandman-1', 'sandman-2']
+    acertos = estante.cache.acertos
+    assert estante.filtrar_ids(tipo='Livro') == ['dom-1']
+    assert estante.cache.acertos == acertos + 1
+
+
+def test_remocao_descarta_os_resultados_com_o_item(estante):
+    estante.filtrar_ids(tipo='HQ')
+    estante.filtrar_ids(tipo='Livro')
+    estante.remover_item('sandman-1')
+    assert estante.cache.estatisticas()['entradas'] == 1
+    assert estante.filtrar_ids(tipo='HQ') == []
+
+
+def test_escrita_de_outra_conexao_esvazia_o_cache(estante, caminho):
+    assert estante.filtrar_ids(tipo='Livro') == ['dom-1']
+    with Estante(db_path=caminho, carregar=False) as outra:
+        outra.adicionar_item(Livro("Memórias Póstumas", "Machado de Assis", 300, "dom-2"))
+    # O critério do filtro nem chega a ser consultado: PRAGMA data_version mudou
+    assert estante.filtrar_ids(tipo='Livro') == ['dom-1', 'dom-2']
+    assert estante.cache.estatisticas()['entradas'] == 1 and estante.cache.acertos == 0
+
+
+def test_orcamento_zero_desliga_o_cache(caminho):
+    with Estante(db_path=caminho, carregar=False, orcamento_cache=0) as estante:
+        estante.buscar_ids('sandman')
+        estante.buscar_ids('sandman')
+        assert estante.cache.acertos == 0 and estante.cache.estatisticas()['entradas'] == 0
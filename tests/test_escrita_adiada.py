@@ -0,0 +1,107 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+import contextlib
+import subprocess
+from typing import List
+
+# Os módulos do projeto se importam pelo nome (ex.: "from banco_de_dados import ...")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'projeto_oo_1', 'nivel1'))
+
+from banco_de_dados import abrir_conexao, setup_database, Estante, Livro
+from escrita_adiada import ADICIONAR, REMOVER
+
+# --- SEGURANÇA DA ESCRITA ADIADA EM QUEDAS ---
+# Um processo filho grava 3 itens (confirmados com descarregar()), adiciona
+# mais 2 e remove 1 no grupo ainda aberto. Em 'queda' ele morre com os._exit
+# (sem fechar nem atexit): o banco deve ter exatamente o que foi confirmado.
+# Em 'fechamento' ele chama fechar(): o grupo pendente também é gravado.
+
+def _processo_filho(caminho: str, cenario: str) -> None:
+    estante = Estante(abrir_conexao(caminho), carregar=False, escrita_adiada=True)
+    for numero in range(3):
+        estante.adicionar_item(Livro(f"Confirmado {numero}", "Autor", 100, f"confirmado-{numero}"))
+    estante.descarregar()
+    for numero in range(2):
+        estante.adicionar_item(Livro(f"Pendente {numero}", "Autor", 100, f"pendente-{numero}"))
+    estante.remover_item("confirmado-0")
+    if cenario == 'queda':
+        os._exit(1)
+    estante.fechar()
+
+
+class TestEscritaAdiada(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+    def _banco_novo(self, nome: str) -> str:
+        caminho = os.path.join(self.pasta, nome)
+        conexao = abrir_conexao(caminho)
+        setup_database(conexao)
+        conexao.close()
+        return caminho
+
+    def _ids_no_banco(self, caminho: str) -> List[str]:
+        conexao = abrir_conexao(caminho)
+        try:
+            self.assertEqual(conexao.execute("PRAGMA integrity_check").fetchone()[0], 'ok')
+            ids = [item_id for (item_id,) in conexao.execute("SELECT id FROM itens ORDER BY id")]
+            # Os índices derivados acompanham a tabela (mesma transação)
+            self.assertEqual(conexao.execute("SELECT COUNT(*) FROM impressoes").fetchone()[0], len(ids))
+            return ids
+        finally:
+            conexao.close()
+
+    def _executar_filho(self, cenario: str) -> str:
+        caminho = self._banco_novo(f'{cenario}.db')
+        processo = subprocess.run([sys.executable, os.path.abspath(__file__), caminho, cenario],
+                                  stdout=subprocess.DEVNULL, timeout=60)
+        self.assertEqual(processo.returncode, 1 if cenario == 'queda' else 0)
+        return caminho
+
+    def test_queda_perde_so_o_grupo_pendente(self):
+        caminho = self._executar_filho('queda')
+        self.assertEqual(self._ids_no_banco(caminho), ['confirmado-0', 'confirmado-1', 'confirmado-2'])
+
+    def test_fechamento_grava_o_grupo_pendente(self):
+        caminho = self._executar_filho('fechamento')
+        self.assertEqual(self._ids_no_banco(caminho),
+                         ['confirmado-1', 'confirmado-2', 'pendente-0', 'pendente-1'])
+
+    def test_grupo_pendente_nao_aparece_em_outra_conexao(self):
+        caminho = self._banco_novo('isolamento.db')
+        with Estante(abrir_conexao(caminho), carregar=False, escrita_adiada=True) as estante:
+            estante.adicionar_item(Livro("Pendente", "Autor", 100, "pendente"))
+            self.assertEqual(self._ids_no_banco(caminho), [])
+            estante.descarregar()
+            self.assertEqual(self._ids_no_banco(caminho), ['pendente'])
+
+    def test_desfazer_e_refazer_com_grupo_aberto_e_confirmado(self):
+        caminho = self._banco_novo('historico.db')
+        with Estante(abrir_conexao(caminho), carregar=False, escrita_adiada=True) as estante:
+            livro = Livro("Dom Casmurro", "Machado de Assis", 256)
+            estante.adicionar_item(livro)
+            estante.remover_item(livro.id)
+            self.assertEqual(estante.desfazer()[0], ADICIONAR)
+            self.assertIsNotNone(estante.obter_item(livro.id))
+            estante.descarregar()
+            self.assertEqual(estante.desfazer()[0], REMOVER)
+            self.assertEqual(estante.contar_itens(), 0)
+            self.assertEqual(estante.refazer()[0], ADICIONAR)
+            self.assertEqual(estante.contar_itens(), 1)
+            self.assertEqual(estante.refazer()[0], REMOVER)
+            self.assertEqual(estante.contar_itens(), 0)
+            self.assertIsNone(estante.refazer())
+        self.assertEqual(self._ids_no_banco(caminho), [])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        # Chamado por _executar_filho: python test_escrita_adiada.py <banco> <cenario>
+        _processo_filho(sys.argv[1], sys.argv[2])
+    else:
+        unittest.main()
@@ -0,0 +1,63 @@
+import io
+import sys
+
+import pytest
+
+from banco_de_dados import Estante, Livro
+from linha_de_comando import main
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    caminho = str(tmp_path / 'cli.db')
+    with Estante(db_path=caminho, carregar=False) as estante:
+        estante.adicionar_item(Livro("Dom Casmurro", "Machado de Assis", 256, "dom-1"))
+    return caminho
+
+
+def _executar(monkeypatch, argv, entrada=''):
+    """Roda main(argv) com a entrada dada; retorna (código de saída, saída padrão)."""
+    saida = io.StringIO()
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(entrada))
+    monkeypatch.setattr(sys, 'stdout', saida)
+    return main(argv), saida.getvalue()
+
+
+def _ids(caminho):
+    with Estante(db_path=caminho, carregar=False) as estante:
+        return sorted(linha[0] for _, linha in estante.iterar_filtro())
+
+
+LOTE_VALIDO = """
+# comentários e linhas vazias são ignorados
+adicionar livro "Memórias Póstumas" "Machado de Assis" --paginas 300 --id memorias-1
+add hq Sandman "Neil Gaiman" --desenhista "Sam Kieth" --id sandman-1
+
+remover dom
+"""
+
+
+def test_lote_grava_todos_os_comandos(monkeypatch, caminho):
+    codigo, saida = _executar(monkeypatch, ['--db', caminho, 'lote'], LOTE_VALIDO)
+    assert codigo == 0
+    assert saida.split() == ['memorias-1', 'sandman-1', 'dom-1']
+    assert _ids(caminho) == ['memorias-1', 'sandman-1']
+
+
+@pytest.mark.parametrize('linha_ruim', [
+    'remover inexistente',                                   # o comando falha
+    'adicionar livro "Dom Casmurro" "Machado de Assis"',     # duplicata recusada
+    'adicionar gibi Titulo Autor',                           # tipo inválido (argparse)
+    'buscar "aspas sem fim',                                 # shlex não consegue separar
+    'lote',                                                  # lote dentro de lote
+])
+def test_linha_ruim_desfaz_o_lote_inteiro(monkeypatch, caminho, linha_ruim):
+    codigo, _ = _executar(monkeypatch, ['--db', caminho, 'lote'], LOTE_VALIDO + linha_ruim + '\n')
+    assert codigo == 1
+    assert _ids(caminho) == ['dom-1']
+
+
+def test_lote_recusado_somente_para_leitura(monkeypatch, caminho):
+    codigo, _ = _executar(monkeypatch, ['--db', caminho, '--somente-leitura', 'lote'], LOTE_VALIDO)
+    assert codigo == 1
+    assert _ids(caminho) == ['dom-1']
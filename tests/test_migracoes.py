@@ -0,0 +1,93 @@
+import sqlite3
+
+import pytest
+
+from banco_de_dados import abrir_conexao, Estante
+from migracoes import (MIGRACOES, VERSAO_ATUAL, ErroDeMigracao, estimar_migracao,
+                       exigir_versao_atual, migrar, versao_do_banco)
+
+# A tabela como o aplicativo a criava antes do esquema versionado (user_version = 0)
+ESQUEMA_V0 = """
+    CREATE TABLE itens (
+        id TEXT PRIMARY KEY, tipo TEXT NOT NULL, titulo TEXT NOT NULL, autor TEXT,
+        paginas INTEGER, edicao TEXT, mes_publicacao TEXT, desenhista TEXT
+    )
+"""
+ITENS_V0 = [
+    ('livro-1', 'Livro', 'Dom Casmurro', 'Machado de Assis', 256, None, None, None),
+    ('revista-1', 'Revista', 'Superinteressante', 'Abril', None, '42', 'maio', None),
+    ('hq-1', 'HQ', 'Sandman', 'Neil Gaiman', None, None, None, 'Sam Kieth'),
+    ('hq-2', 'HQ', 'Watchmen', None, None, None, None, 'Dave Gibbons'),
+]
+
+
+@pytest.fixture
+def banco_v0(tmp_path):
+    caminho = str(tmp_path / 'v0.db')
+    conexao = sqlite3.connect(caminho)
+    conexao.execute(ESQUEMA_V0)
+    conexao.executemany("INSERT INTO itens VALUES (?, ?, ?, ?, ?, ?, ?, ?)", ITENS_V0)
+    conexao.commit()
+    conexao.close()
+    return caminho
+
+
+def _objetos(conexao: sqlite3.Connection):
+    return {nome for (nome,) in conexao.execute("SELECT name FROM sqlite_master")}
+
+
+def test_migra_um_banco_v0_ate_a_versao_atual(banco_v0):
+    conexao = abrir_conexao(banco_v0)
+    progresso = []
+    assert migrar(conexao, lambda migracao, feitos, total: progresso.append(migracao.versao),
+                  tamanho_lote=2) == [migracao.versao for migracao in MIGRACOES]
+    assert versao_do_banco(conexao) == VERSAO_ATUAL
+    assert progresso == sorted(progresso)
+    assert {'itens_busca', 'itens_trigramas', 'contadores', 'impressoes', 'alteracoes',
+            'idx_itens_titulo', 'idx_itens_autor'} <= _objetos(conexao)
+    # Os índices de ordenação já nascem na forma final: a migração 7 não cria cópias
+    assert not {'idx_itens_titulo_ordem', 'idx_itens_autor_ordem'} & _objetos(conexao)
+    assert conexao.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+    exigir_versao_atual(conexao)
+    # Migrar de novo não faz nada
+    assert migrar(conexao) == []
+
+    # Os dados antigos entram nos índices derivados
+    with Estante(conexao, carregar=False) as estante:
+        assert estante.contar_itens() == len(ITENS_V0)
+        assert estante.buscar_ids('sandman') == ['hq-1']
+        assert [item_id for item_id, _ in estante.buscar_aproximado_ids('casmuro')][:1] == ['livro-1']
+        estatisticas = estante.estatisticas()
+        assert estatisticas.total == len(ITENS_V0) and estatisticas.total_paginas_livros == 256
+        assert estante.filtrar_ids(ordem='autor') == ['hq-2', 'revista-1', 'livro-1', 'hq-1']
+
+
+def test_banco_com_os_indices_antigos_ganha_os_de_ordenacao(banco_v0):
+    conexao = abrir_conexao(banco_v0)
+    conexao.execute("CREATE INDEX idx_itens_titulo ON itens(lower(titulo))")
+    conexao.execute("CREATE INDEX idx_itens_autor ON itens(lower(autor))")
+    migrar(conexao)
+    assert {'idx_itens_titulo_ordem', 'idx_itens_autor_ordem'} <= _objetos(conexao)
+    plano = conexao.execute("EXPLAIN QUERY PLAN SELECT id FROM itens "
+                            "ORDER BY ifnull(lower(autor), ''), lower(titulo), id").fetchall()
+    assert 'idx_itens_autor_ordem' in plano[0][-1]
+    conexao.close()
+
+
+def test_simulacao_nao_altera_o_banco(banco_v0):
+    conexao = abrir_conexao(banco_v0, somente_leitura=True)
+    estimativa = estimar_migracao(conexao)
+    assert [migracao.versao for migracao, _, _ in estimativa.passos] == list(range(1, VERSAO_ATUAL + 1))
+    assert estimativa.total_itens == len(ITENS_V0)
+    assert versao_do_banco(conexao) == 0 and _objetos(conexao) == {'itens', 'sqlite_autoindex_itens_1'}
+    with pytest.raises(ErroDeMigracao):
+        exigir_versao_atual(conexao)
+    conexao.close()
+
+
+def test_recusa_banco_de_versao_mais_nova(banco_v0):
+    conexao = abrir_conexao(banco_v0)
+    conexao.execute(f"PRAGMA user_version = {VERSAO_ATUAL + 1}")
+    with pytest.raises(ErroDeMigracao):
+        migrar(conexao)
+    conexao.close()
@@ -0,0 +1,117 @@
+import os
+import time
+import random
+
+import pytest
+
+from banco_de_dados import CHAVES_DE_ORDENACAO, TIPOS_DE_ITEM, Estante, criar_item
+from multiplas_estantes import GerenciadorDeEstantes
+
+# Os mesmos itens numa estante única e espalhados por 3 estantes: os
+# resultados juntados precisam ser iguais aos da estante única.
+
+TOTAL_ITENS = 6000
+
+
+def _registros(quantidade: int):
+    rng = random.Random(22)
+    autores = [f"Autor {n}" for n in range(60)] + ["Neil Gaiman", "Machado de Assis"]
+    registros = []
+    for numero in range(quantidade):
+        tipo = rng.choice(sorted(TIPOS_DE_ITEM))
+        dados = {'tipo': tipo, 'titulo': f"{rng.choice(['Sandman', 'Dom', 'Casmurro', 'Watchmen'])} {numero}",
+                 'autor': rng.choice(autores)}
+        if tipo == 'Livro':
+            dados['paginas'] = rng.randint(50, 900)
+        elif tipo == 'Revista':
+            dados.update(edicao=str(numero), mes_publicacao=rng.choice(['janeiro', 'maio', 'dezembro']))
+        else:
+            dados['desenhista'] = rng.choice(autores)
+        registros.append(criar_item(dados).to_dict())
+    return registros
+
+
+@pytest.fixture(scope='module')
+def estantes(tmp_path_factory):
+    """(estante única, gerenciador com 3 fragmentos, registros)."""
+    pasta = tmp_path_factory.mktemp('estantes')
+    registros = _registros(TOTAL_ITENS)
+    unica = Estante(db_path=str(pasta / 'unica.db'), carregar=False)
+    unica.importar_em_lote(registros)
+    caminhos = [str(pasta / f'fragmento{n}.db') for n in range(3)]
+    for n, caminho in enumerate(caminhos):
+        with Estante(db_path=caminho, carregar=False) as fragmento:
+            fragmento.importar_em_lote(registros[n::3])
+    gerenciador = GerenciadorDeEstantes(caminhos)
+    yield unica, gerenciador, registros
+    gerenciador.fechar()
+    unica.fechar()
+
+
+@pytest.mark.parametrize('decrescente', [False, True])
+@pytest.mark.parametrize('ordem', sorted(CHAVES_DE_ORDENACAO))
+def test_filtro_intercalado_igual_ao_da_estante_unica(estantes, ordem, decrescente):
+    unica, gerenciador, _ = estantes
+    esperado = unica.filtrar_ids(autor='autor 1', ordem=ordem, decrescente=decrescente)
+    obtido = [linha[0] for _, linha in gerenciador.iterar_filtro(autor='autor 1', ordem=ordem,
+                                                                   decrescente=decrescente)]
+    assert obtido == esperado
+
+
+def test_contagem_e_primeiros_do_filtro(estantes):
+    unica, gerenciador, _ = estantes
+    assert sum(gerenciador.contar_itens().values()) == TOTAL_ITENS
+    primeiros = gerenciador.filtrar(ordem='titulo', limite=10)
+    assert [linha[0] for _, linha in primeiros] == unica.filtrar_ids(ordem='titulo', limite=10)
+
+
+def test_buscas(estantes):
+    unica, gerenciador, _ = estantes
+    encontrados = {linha[0] for _, linha in gerenciador.buscar('sandman', limite=None)}
+    assert encontrados == set(unica.buscar_ids('sandman', limite=None))
+    assert gerenciador.buscar('sandman', tipo='HQ', limite=5)
+    notas = [nota for _, _, nota in gerenciador.buscar_aproximado('sandmn', limite=10)]
+    assert notas == [nota for _, nota in unica.buscar_aproximado_ids('sandmn', limite=10)]
+
+
+def test_estatisticas_somadas(estantes):
+    unica, gerenciador, _ = estantes
+    esperado = unica.estatisticas().to_dict()
+    obtido = gerenciador.estatisticas().to_dict()
+    for campo in ('total', 'por_tipo', 'total_paginas_livros', 'revistas_por_mes'):
+        assert obtido[campo] == esperado[campo], campo
+    contagens = dict(unica.quantidades_nos_contadores('autor', [nome for nome, _ in obtido['principais_autores']]))
+    assert all(contagens[nome] == quantidade for nome, quantidade in obtido['principais_autores'])
+
+
+def test_obter_item_informa_a_estante(estantes):
+    _, gerenciador, registros = estantes
+    nome, item = gerenciador.obter_item(registros[4]['id'])
+    assert nome == 'fragmento1' and item.titulo == registros[4]['titulo']
+
+
+def test_fluxo_fechado_libera_as_estantes(estantes):
+    _, gerenciador, _ = estantes
+    fluxo = gerenciador.iterar_filtro()
+    next(fluxo)
+    fluxo.close()
+    inicio = time.perf_counter()
+    gerenciador.contar_itens()
+    assert time.perf_counter() - inicio < 1
+
+
+def test_abrir_o_mesmo_arquivo_devolve_a_estante_aberta(tmp_path, monkeypatch):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    monkeypatch.chdir(tmp_path)
+    with GerenciadorDeEstantes() as gerenciador:
+        nome = gerenciador.abrir('a/x.db')
+        estante = gerenciador[nome]
+        assert gerenciador.abrir('a/x.db') == nome
+        assert gerenciador.abrir(os.path.abspath('a/x.db')) == nome
+        assert gerenciador[nome] is estante
+        # Mesmo nome de arquivo em outra pasta: outra estante, com o caminho completo como nome
+        outro = gerenciador.abrir('b/x.db')
+        assert outro == os.path.abspath('b/x.db')
+        assert gerenciador.abrir('./b/../b/x.db') == outro
+        assert len(gerenciador) == 2
@@ -0,0 +1,43 @@
+import pytest
+
+from banco_de_dados import Estante, Livro
+
+IDS = ['ab12-0001', 'ab12-0002', 'ab99-0001', 'cd00-0001']
+
+
+@pytest.fixture(params=[True, False], ids=['memoria', 'banco'])
+def estante(request, tmp_path):
+    """A mesma estante com os itens em memória (busca binária) e só no banco (faixa no índice)."""
+    caminho = str(tmp_path / 'prefixo.db')
+    with Estante(db_path=caminho, carregar=False) as inicial:
+        for item_id in IDS:
+            inicial.adicionar_item(Livro(f"Livro {item_id}", "Autor", 100, item_id))
+    with Estante(db_path=caminho, carregar=request.param) as estante:
+        yield estante
+
+
+def test_prefixo_unico_e_id_completo(estante):
+    assert estante.resolver_prefixo('cd') == ['cd00-0001']
+    assert estante.resolver_prefixo('ab99') == ['ab99-0001']
+    assert estante.resolver_prefixo('ab12-0002') == ['ab12-0002']
+
+
+def test_prefixo_ambiguo_respeita_o_limite(estante):
+    assert estante.resolver_prefixo('ab') == ['ab12-0001', 'ab12-0002']
+    assert estante.resolver_prefixo('ab', limite=5) == ['ab12-0001', 'ab12-0002', 'ab99-0001']
+    assert estante.resolver_prefixo('ab12-') == ['ab12-0001', 'ab12-0002']
+
+
+def test_prefixo_vazio_ou_inexistente_nao_corresponde_a_nada(estante):
+    assert estante.resolver_prefixo('') == []
+    assert estante.resolver_prefixo('', limite=10) == []
+    assert estante.resolver_prefixo('zz') == []
+    assert estante.resolver_prefixo('ab12-00019') == []
+
+
+def test_remover_recusa_prefixo_ambiguo_ou_vazio(estante):
+    assert estante.remover_item('ab') == []
+    assert estante.remover_item('   ') == []
+    assert estante.contar_itens() == len(IDS)
+    assert estante.remover_item('ab9') == ['ab99-0001']
+    assert estante.resolver_prefixo('ab', limite=5) == ['ab12-0001', 'ab12-0002']
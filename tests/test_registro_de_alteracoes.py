@@ -0,0 +1,79 @@
+import pytest
+
+from banco_de_dados import Estante, HQ, Livro
+
+
+@pytest.fixture
+def estantes(tmp_path):
+    """(local, outra): duas estantes no mesmo arquivo, como dois programas."""
+    caminho = str(tmp_path / 'alteracoes.db')
+    with Estante(db_path=caminho, carregar=False) as inicial:
+        for numero in range(3):
+            inicial.adicionar_item(Livro(f"Livro {numero}", "Autor", 100 + numero, f"livro-{numero}"))
+    with Estante(db_path=caminho) as local, Estante(db_path=caminho, carregar=False) as outra:
+        yield local, outra
+
+
+def _na_memoria(estante: Estante):
+    return {item.id: item.titulo for item in estante.itens}
+
+
+def test_aplica_so_as_alteracoes_da_outra_conexao(estantes):
+    local, outra = estantes
+    outra.adicionar_item(HQ("Sandman", "Neil Gaiman", "Sam Kieth", "hq-1"))
+    outra.remover_item("livro-0")
+    with outra.transacao() as conn:
+        conn.execute("UPDATE itens SET titulo = 'Livro 1 (2ª edição)' WHERE id = 'livro-1'")
+
+    assert local.houve_escrita_externa()
+    novos, removidos, alterados = local.sincronizar_alteracoes()
+    assert [item.id for item in novos] == ['hq-1']
+    assert removidos == ['livro-0']
+    assert [item.titulo for item in alterados] == ['Livro 1 (2ª edição)']
+    assert _na_memoria(local) == {'livro-1': 'Livro 1 (2ª edição)', 'livro-2': 'Livro 2', 'hq-1': 'Sandman'}
+    # Nada novo: nem a sincronização nem o data_version acusam mudança
+    assert local.sincronizar_alteracoes() == ([], [], [])
+    assert not local.houve_escrita_externa()
+
+
+def test_escritas_da_propria_estante_sao_ignoradas(estantes):
+    local, _ = estantes
+    local.adicionar_item(Livro("Livro 3", "Autor", 103, "livro-3"))
+    local.remover_item("livro-0")
+    assert local.sincronizar_alteracoes() == ([], [], [])
+    assert sorted(_na_memoria(local)) == ['livro-1', 'livro-2', 'livro-3']
+
+
+def test_muitas_alteracoes_viram_sincronizacao_completa(estantes):
+    local, outra = estantes
+    for numero in range(3, 6):
+        outra.adicionar_item(Livro(f"Livro {numero}", "Autor", 100 + numero, f"livro-{numero}"))
+    novos, removidos, alterados = local.sincronizar_alteracoes(limite=2)
+    assert sorted(item.id for item in novos) == ['livro-3', 'livro-4', 'livro-5']
+    assert removidos == [] and alterados == []
+    # A sincronização completa também avança a sequência vista
+    assert local.sincronizar_alteracoes() == ([], [], [])
+
+
+def test_entradas_podadas_viram_sincronizacao_completa(estantes):
+    local, outra = estantes
+    outra.remover_item("livro-2")
+    for numero in range(3, 6):
+        outra.adicionar_item(Livro(f"Livro {numero}", "Autor", 100 + numero, f"livro-{numero}"))
+    # A remoção de livro-2 sai do registro: só a releitura completa a percebe
+    assert outra.podar_alteracoes(manter=2) > 0
+    novos, removidos, _ = local.sincronizar_alteracoes()
+    assert sorted(item.id for item in novos) == ['livro-3', 'livro-4', 'livro-5']
+    assert removidos == ['livro-2']
+
+
+def test_poda_mantem_as_ultimas_entradas(estantes):
+    _, outra = estantes
+    conn = outra._get_db_connection()
+    assert outra.podar_alteracoes(manter=10) == 0  # Só 3 entradas: nada a apagar
+    for numero in range(3, 10):
+        outra.adicionar_item(Livro(f"Livro {numero}", "Autor", 100, f"livro-{numero}"))
+    maior = conn.execute("SELECT MAX(seq) FROM alteracoes").fetchone()[0]
+    outra.podar_alteracoes(manter=4)
+    assert [seq for (seq,) in conn.execute("SELECT seq FROM alteracoes ORDER BY seq")] == \
+        list(range(maior - 3, maior + 1))
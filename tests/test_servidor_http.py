@@ -0,0 +1,92 @@
+import json
+import asyncio
+from urllib.parse import quote
+
+from servidor_http import ClienteHTTP, ServidorEstante
+
+LIVROS = [{'tipo': 'Livro', 'titulo': f"Dom Casmurro {n}", 'autor': "Machado de Assis", 'paginas': 200 + n}
+          for n in range(5)]
+HQ = {'tipo': 'HQ', 'titulo': "Sandman", 'autor': "Neil Gaiman", 'desenhista': "Sam Kieth"}
+
+
+def _com_servidor(pasta, verificar):
+    """Sobe o servidor numa porta livre, grava os 5 livros e a HQ e roda
+    verificar(cliente, ids, host, porta) no mesmo laço do asyncio."""
+    async def executar():
+        servidor = ServidorEstante(str(pasta / 'servidor.db'), leitores=3)
+        host, porta = await servidor.iniciar('127.0.0.1', 0)
+        cliente = ClienteHTTP(host, porta)
+        try:
+            ids = []
+            for dados in LIVROS + [HQ]:
+                status, resposta = await cliente.requisitar('POST', '/itens', dados)
+                assert status == 201, (status, resposta)
+                ids.append(resposta['id'])
+            await verificar(cliente, ids, host, porta)
+        finally:
+            await cliente.fechar()
+            await servidor.fechar()
+    asyncio.run(executar())
+
+
+def test_adicionar_recusa_duplicata_e_corpo_invalido(tmp_path):
+    async def verificar(cliente, ids, host, porta):
+        assert (await cliente.requisitar('POST', '/itens', HQ))[0] == 409
+        assert (await cliente.requisitar('POST', '/itens?permitir_duplicata=1', HQ))[0] == 201
+        assert (await cliente.requisitar('POST', '/itens', {'tipo': 'Livro', 'titulo': 'X'}))[0] == 400
+        assert (await cliente.requisitar('GET', '/estatisticas'))[1]['total'] == 7
+    _com_servidor(tmp_path, verificar)
+
+
+def test_lista_paginada_pela_chave(tmp_path):
+    async def verificar(cliente, ids, host, porta):
+        vistos, depois = [], None
+        while True:
+            caminho = '/itens?ordem=titulo&limite=4' + (f"&depois={quote(json.dumps(depois))}" if depois else '')
+            status, pagina = await cliente.requisitar('GET', caminho)
+            assert status == 200, pagina
+            vistos += [linha['titulo'] for linha in pagina['itens']]
+            depois = pagina['proxima']
+            if depois is None:
+                break
+        assert vistos == sorted(vistos, key=str.lower) and len(vistos) == 6, vistos
+        status, filtrados = await cliente.requisitar('GET', '/itens?tipo=hq&autor=neil&completo=1')
+        assert [item['desenhista'] for item in filtrados['itens']] == ["Sam Kieth"]
+    _com_servidor(tmp_path, verificar)
+
+
+def test_obter_buscar_e_remover(tmp_path):
+    async def verificar(cliente, ids, host, porta):
+        status, item = await cliente.requisitar('GET', f"/itens/{ids[0][:8]}")
+        assert status == 200 and item['paginas'] == 200, item
+        assert (await cliente.requisitar('GET', '/itens/zzzz'))[0] == 404
+        status, busca = await cliente.requisitar('GET', '/busca?q=casmurro&limite=10')
+        assert len(busca['itens']) == 5, busca
+        status, busca = await cliente.requisitar('GET', '/busca?q=sandmn&aproximada=1')
+        assert busca['itens'][0]['titulo'] == "Sandman", busca
+
+        assert (await cliente.requisitar('DELETE', f"/itens/{ids[1]}"))[0] == 200
+        assert (await cliente.requisitar('DELETE', f"/itens/{ids[1]}"))[0] == 404
+        assert (await cliente.requisitar('GET', '/estatisticas'))[1]['total'] == 5
+    _com_servidor(tmp_path, verificar)
+
+
+def test_rotas_e_parametros_invalidos(tmp_path):
+    async def verificar(cliente, ids, host, porta):
+        assert (await cliente.requisitar('PUT', '/itens'))[0] == 405
+        assert (await cliente.requisitar('GET', '/nada'))[0] == 404
+        assert (await cliente.requisitar('GET', '/itens?limite=0'))[0] == 400
+    _com_servidor(tmp_path, verificar)
+
+
+def test_leituras_simultaneas(tmp_path):
+    async def verificar(cliente, ids, host, porta):
+        # Cada cliente com a sua conexão TCP
+        clientes = [ClienteHTTP(host, porta) for _ in range(20)]
+        try:
+            respostas = await asyncio.gather(*(outro.requisitar('GET', '/busca?q=dom') for outro in clientes))
+        finally:
+            for outro in clientes:
+                await outro.fechar()
+        assert all(status == 200 and len(resposta['itens']) == 5 for status, resposta in respostas)
+    _com_servidor(tmp_path, verificar)
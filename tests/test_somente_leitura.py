@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from banco_de_dados import abrir_conexao, Estante, Livro
+from migracoes import ErroDeMigracao
+
+MODOS = [{'somente_leitura': True}, {'imutavel': True}]
+NOMES_DOS_MODOS = ['mode=ro', 'immutable=1']
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    caminho = str(tmp_path / 'leitura.db')
+    with Estante(db_path=caminho, carregar=False) as estante:
+        estante.adicionar_item(Livro("Dom Casmurro", "Machado de Assis", 256, "dom-1"))
+    return caminho
+
+
+@pytest.mark.parametrize('modo', MODOS, ids=NOMES_DOS_MODOS)
+def test_conexao_recusa_escritas_no_sqlite(caminho, modo):
+    conexao = abrir_conexao(caminho, **modo)
+    try:
+        assert conexao.execute("SELECT COUNT(*) FROM itens").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            conexao.execute("DELETE FROM itens")
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            conexao.execute("CREATE TABLE outra (x)")
+    finally:
+        conexao.close()
+
+
+@pytest.mark.parametrize('modo', MODOS, ids=NOMES_DOS_MODOS)
+def test_estante_recusa_escritas_sem_tocar_no_banco(caminho, modo):
+    with Estante(db_path=caminho, carregar=False, **modo) as estante:
+        assert estante.somente_leitura
+        assert estante.adicionar_item(Livro("Outro", "Autor", 100, "outro-1")) is False
+        assert estante.remover_item('dom') == []
+        resultado = estante.importar_em_lote([{'tipo': 'Livro', 'titulo': 'X', 'autor': 'Y', 'paginas': 1}])
+        assert resultado.importados == 0
+        assert estante.buscar_ids('casmurro') == ['dom-1']
+    with Estante(db_path=caminho, carregar=False) as estante:
+        assert [linha[0] for _, linha in estante.iterar_filtro()] == ['dom-1']
+
+
+@pytest.mark.parametrize('modo', MODOS, ids=NOMES_DOS_MODOS)
+def test_arquivo_inexistente_nao_e_criado(tmp_path, modo):
+    caminho = tmp_path / 'nao_existe.db'
+    with pytest.raises(sqlite3.OperationalError):
+        abrir_conexao(str(caminho), **modo).execute("SELECT 1 FROM sqlite_master")
+    assert not caminho.exists()
+
+
+def test_banco_desatualizado_nao_e_migrado(tmp_path):
+    caminho = str(tmp_path / 'antigo.db')
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("CREATE TABLE itens (id TEXT PRIMARY KEY, tipo TEXT NOT NULL, titulo TEXT NOT NULL, "
+                    "autor TEXT, paginas INTEGER, edicao TEXT, mes_publicacao TEXT, desenhista TEXT)")
+    conexao.close()
+    with pytest.raises(ErroDeMigracao):
+        Estante(db_path=caminho, carregar=False, somente_leitura=True)
+    conexao = abrir_conexao(caminho)
+    assert conexao.execute("PRAGMA user_version").fetchone()[0] == 0
+    conexao.close()
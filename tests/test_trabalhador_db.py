@@ -0,0 +1,111 @@
+import io
+import os
+import sys
+import time
+import tempfile
+import unittest
+import threading
+import contextlib
+
+# Os módulos do projeto se importam pelo nome (ex.: "from banco_de_dados import ...")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'projeto_oo_1', 'nivel1'))
+
+from banco_de_dados import abrir_conexao, setup_database, Estante, Livro
+from trabalhador_db import OperacaoCancelada, Tarefa, TrabalhadorDB
+
+
+class TestTrabalhadorDB(unittest.TestCase):
+    """O trabalhador sem Tk: o teste faz o papel do after() da GUI."""
+
+    def setUp(self):
+        pasta = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        conexao = abrir_conexao(os.path.join(pasta, 'estante_teste.db'), check_same_thread=False)
+        setup_database(conexao)
+        self.trabalhador = TrabalhadorDB(Estante(conexao, carregar=False))
+        self.addCleanup(self.trabalhador.encerrar, 10)
+
+    def aguardar(self, tarefa: Tarefa, timeout: float = 30.0) -> None:
+        """Despacha resultados até a tarefa terminar."""
+        limite = time.monotonic() + timeout
+        while not tarefa.concluida:
+            if time.monotonic() > limite:
+                self.fail("A tarefa não terminou a tempo.")
+            self.trabalhador.despachar_resultados()
+            time.sleep(0.01)
+
+    def test_resultado_volta_na_thread_que_despacha(self):
+        eventos = []
+        livro = Livro("Dom Casmurro", "Machado de Assis", 256)
+        tarefa = self.trabalhador.submeter(
+            lambda estante, t: estante.adicionar_item(livro),
+            ao_concluir=lambda ok: eventos.append((ok, threading.current_thread().name)))
+        self.aguardar(tarefa)
+        self.assertEqual(eventos, [(True, threading.current_thread().name)])
+
+    def test_tarefas_executam_na_ordem_de_envio(self):
+        executadas, concluidas = [], []
+        tarefas = [self.trabalhador.submeter(lambda estante, t, n=n: executadas.append(n) or n,
+                                             ao_concluir=concluidas.append)
+                   for n in range(20)]
+        self.aguardar(tarefas[-1])
+        self.assertEqual(executadas, list(range(20)))
+        self.assertEqual(concluidas, list(range(20)))
+
+    def test_importacao_relata_progresso_e_pode_ser_cancelada(self):
+        registros = ({'tipo': 'HQ', 'titulo': f'HQ {n}', 'autor': 'Autor', 'desenhista': 'Arte'}
+                     for n in range(50000))
+        progresso, resultados = [], []
+
+        def importar(estante: Estante, t: Tarefa):
+            return estante.importar_em_lote(
+                registros, tamanho_lote=1000,
+                ao_progredir=lambda r: t.informar_progresso(r.processados),
+                deve_parar=lambda: t.cancelada)
+
+        def ao_progredir(processados):
+            progresso.append(processados)
+            if processados >= 3000:
+                tarefa.cancelar()
+
+        tarefa = self.trabalhador.submeter(importar, ao_concluir=resultados.append,
+                                           ao_progredir=ao_progredir, cancelavel=True)
+        self.aguardar(tarefa)
+        self.assertTrue(progresso)
+        self.assertEqual(progresso, sorted(progresso))
+        resultado = resultados[0]
+        self.assertTrue(resultado.interrompido)
+        self.assertTrue(0 < resultado.importados < 50000, resultado.importados)
+
+    def test_tarefa_cancelada_antes_de_comecar_nao_executa(self):
+        livro = Livro("Dom Casmurro", "Machado de Assis", 256)
+        self.aguardar(self.trabalhador.submeter(lambda estante, t: estante.adicionar_item(livro)))
+        erros = []
+        self.trabalhador.submeter(lambda estante, t: time.sleep(0.2))
+        cancelada = self.trabalhador.submeter(lambda estante, t: estante.remover_item(livro.id),
+                                              ao_falhar=erros.append, cancelavel=True)
+        cancelada.cancelar()
+        self.aguardar(cancelada)
+        self.assertEqual([type(erro) for erro in erros], [OperacaoCancelada])
+
+        restantes = []
+        self.aguardar(self.trabalhador.submeter(lambda estante, t: estante.contar_itens(),
+                                                ao_concluir=restantes.append))
+        self.assertEqual(restantes, [1])
+
+    def test_tarefa_nao_cancelavel_ignora_o_pedido(self):
+        resultados = []
+        tarefa = self.trabalhador.submeter(lambda estante, t: 'feito', ao_concluir=resultados.append)
+        tarefa.cancelar()
+        self.aguardar(tarefa)
+        self.assertEqual(resultados, ['feito'])
+
+    def test_erro_da_operacao_chega_ao_callback_de_falha(self):
+        erros = []
+        tarefa = self.trabalhador.submeter(lambda estante, t: 1 / 0, ao_falhar=erros.append)
+        self.aguardar(tarefa)
+        self.assertEqual([type(erro) for erro in erros], [ZeroDivisionError])
+
+
+if __name__ == "__main__":
+    unittest.main()